@@ -32,6 +32,8 @@ from app.models import (  # noqa: F401,E402
     download,
     social_account,
     audit_log,
+    email_outbox,
+    scheduler,
 )
 
 target_metadata = Base.metadata
@@ -0,0 +1,34 @@
+"""
+Magazine upload processing status
+
+Revision ID: 20261018_0002
+Revises: 20250819_0001
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0002"
+down_revision: Union[str, None] = "20250819_0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+processing_status = sa.Enum("pending", "processing", "ready", "failed", name="magazine_processing_status")
+
+
+def upgrade() -> None:
+    # No-op on MySQL/SQLite; backends with named enum types need it before add_column
+    processing_status.create(op.get_bind(), checkfirst=True)
+    op.add_column("magazines", sa.Column("processing_status", processing_status, nullable=True))
+    op.add_column("magazines", sa.Column("processing_error", sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("magazines", "processing_error")
+    op.drop_column("magazines", "processing_status")
+    processing_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,31 @@
+"""
+Composite indexes for keyset pagination of magazines
+
+Revision ID: 20261018_0003
+Revises: 20261018_0002
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0003"
+down_revision: Union[str, None] = "20261018_0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_magazines_publish_date_id", "magazines", ["publish_date", "id"], unique=False)
+    op.create_index("idx_magazines_created_at_id", "magazines", ["created_at", "id"], unique=False)
+    # Prefix of idx_magazines_publish_date_id
+    op.drop_index("idx_publish_date", table_name="magazines")
+
+
+def downgrade() -> None:
+    op.create_index("idx_publish_date", "magazines", ["publish_date"], unique=False)
+    op.drop_index("idx_magazines_created_at_id", table_name="magazines")
+    op.drop_index("idx_magazines_publish_date_id", table_name="magazines")
@@ -0,0 +1,37 @@
+"""
+Maintained magazine counters for estimated listing totals
+
+Revision ID: 20261018_0004
+Revises: 20261018_0003
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0004"
+down_revision: Union[str, None] = "20261018_0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "magazine_counters",
+        sa.Column("name", sa.String(length=50), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+    )
+    magazines = sa.table("magazines", sa.column("is_published", sa.Boolean()))
+    counters = sa.table("magazine_counters", sa.column("name", sa.String()), sa.column("value", sa.BigInteger()))
+    for name, published in (("published", True), ("unpublished", False)):
+        seed = sa.select(sa.literal(name), sa.func.count()).select_from(magazines).where(
+            magazines.c.is_published == published
+        )
+        op.execute(counters.insert().from_select(["name", "value"], seed))
+
+
+def downgrade() -> None:
+    op.drop_table("magazine_counters")
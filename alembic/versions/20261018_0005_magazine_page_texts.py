@@ -0,0 +1,38 @@
+"""
+Extracted PDF page text for full-text search
+
+Revision ID: 20261018_0005
+Revises: 20261018_0004
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0005"
+down_revision: Union[str, None] = "20261018_0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("magazines", sa.Column("page_text_path", sa.String(length=500), nullable=True))
+    op.create_table(
+        "magazine_page_texts",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("magazine_id", sa.BigInteger(), sa.ForeignKey("magazines.id"), nullable=False),
+        sa.Column("page_number", sa.Integer(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+    )
+    op.create_index(
+        "uq_magazine_page_texts_page", "magazine_page_texts", ["magazine_id", "page_number"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_magazine_page_texts_page", table_name="magazine_page_texts")
+    op.drop_table("magazine_page_texts")
+    op.drop_column("magazines", "page_text_path")
@@ -0,0 +1,34 @@
+"""
+Per-user monthly download counters for quota checks
+
+Revision ID: 20261018_0006
+Revises: 20261018_0005
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0006"
+down_revision: Union[str, None] = "20261018_0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are created on first use from a COUNT over downloads, so no backfill is needed here
+    op.create_table(
+        "download_quota_usage",
+        sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("month", sa.String(length=7), primary_key=True),
+        sa.Column("used", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.create_index("idx_downloads_user_time", "downloads", ["user_id", "download_time"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_downloads_user_time", table_name="downloads")
+    op.drop_table("download_quota_usage")
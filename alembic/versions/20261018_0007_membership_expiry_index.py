@@ -0,0 +1,25 @@
+"""
+Index user_memberships (status, end_date) for the chunked expiry job
+
+Revision ID: 20261018_0007
+Revises: 20261018_0006
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0007"
+down_revision: Union[str, None] = "20261018_0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_user_memberships_status_end_date", "user_memberships", ["status", "end_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_user_memberships_status_end_date", table_name="user_memberships")
@@ -0,0 +1,36 @@
+"""
+Magazine categories and due-subscription index for digests
+
+Revision ID: 20261018_0010
+Revises: 20261018_0009
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0010"
+down_revision: Union[str, None] = "20261018_0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "magazine_category_links",
+        sa.Column("magazine_id", sa.BigInteger(), sa.ForeignKey("magazines.id"), primary_key=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("magazine_categories.id"), primary_key=True),
+    )
+    op.create_index(
+        "idx_magazine_category_links_category", "magazine_category_links", ["category_id", "magazine_id"]
+    )
+    op.create_index("idx_subscriptions_status_next_send", "subscriptions", ["status", "next_send_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_subscriptions_status_next_send", table_name="subscriptions")
+    op.drop_index("idx_magazine_category_links_category", table_name="magazine_category_links")
+    op.drop_table("magazine_category_links")
@@ -0,0 +1,28 @@
+"""
+Owner and heartbeat of in-flight magazine uploads
+
+Revision ID: 20261018_0011
+Revises: 20261018_0010
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0011"
+down_revision: Union[str, None] = "20261018_0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("magazines", sa.Column("processing_owner", sa.String(length=100), nullable=True))
+    op.add_column("magazines", sa.Column("processing_heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("magazines", "processing_heartbeat_at")
+    op.drop_column("magazines", "processing_owner")
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_db
+from app.services.file_delivery_service import decrypted_files
+from app.services.magazine_service import get_magazine_by_id, iter_magazine_file, open_magazine_file
+from app.services.storage_service import LocalStorageBackend, get_storage_backend
+from app.utils.security import verify_signed_url
+
+# Links handed out by download_magazine / LocalStorageBackend.generate_temp_link. The signature is the
+# authorization: permission checks and the download record happened when the link was issued.
+router = APIRouter()
+
+
+def _check_signature(path: str, exp: int, sig: str) -> None:
+    if not verify_signed_url(path, exp, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired link")
+
+
+@router.get("/objects/{path:path}")
+async def get_stored_object(path: str, exp: int = Query(...), sig: str = Query(...)):
+    _check_signature(f"/files/objects/{path}", exp, sig)
+    storage = get_storage_backend()
+    if not isinstance(storage, LocalStorageBackend):
+        raise HTTPException(status_code=404, detail="Not found")
+    full_path = storage.local_path(path)
+    if not os.path.isfile(full_path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(full_path, media_type="application/octet-stream")
+
+
+@router.get("/magazines/{magazine_id}")
+async def get_magazine_download(
+    magazine_id: int, exp: int = Query(...), sig: str = Query(...), db: AsyncSession = Depends(get_db)
+):
+    _check_signature(f"/files/magazines/{magazine_id}", exp, sig)
+    magazine = await get_magazine_by_id(db, magazine_id)
+    if not magazine or not magazine.file_path:
+        raise HTTPException(status_code=404, detail="Magazine not found")
+    filename = f"magazine-{magazine_id}.pdf"
+    cacheable = not magazine.is_sensitive
+
+    local = decrypted_files.lookup(magazine.file_path) if cacheable else None
+    if local is not None:
+        # FileResponse handles Range itself and lets the server send the file (pathsend/sendfile)
+        return FileResponse(local, media_type="application/pdf", filename=filename)
+
+    storage = get_storage_backend()
+    try:
+        file = await open_magazine_file(magazine, storage)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cacheable:
+        decrypted_files.materialize(
+            magazine.file_path, lambda: iter_magazine_file(magazine, file, storage, 0, file.plaintext_size)
+        )
+    return StreamingResponse(
+        iter_magazine_file(magazine, file, storage, 0, file.plaintext_size),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(file.plaintext_size),
+        },
+    )
@@ -1,8 +1,21 @@
 from fastapi import APIRouter
 
+from app.core.metrics import metrics
+from app.services.scheduler_service import scheduler
+
 router = APIRouter()
 
 
 @router.get("/health")
 async def healthcheck():
     return {"status": "ok"}
+
+
+@router.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+
+@router.get("/jobs")
+async def get_jobs():
+    return {"leader": scheduler.is_leader, "jobs": await scheduler.status()}
@@ -1,32 +1,53 @@
 from __future__ import annotations
 
-from typing import Any
+import secrets
+from datetime import date, datetime, timedelta, timezone
+from hashlib import sha256
+from typing import Any, AsyncIterator
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
-from app.core.db import get_db
+from app.core.db import get_db, get_session_maker
 from app.schemas.common import Page
-from app.schemas.magazine import MagazineCreate, MagazineOut, MagazineUpdate
+from app.schemas.magazine import MagazineCreate, MagazineOut, MagazineProcessingOut, MagazineUpdate
 from app.services.magazine_service import (
     get_current_week_magazines,
     get_magazine_by_id,
+    count_magazines,
     query_magazines,
+    query_magazines_after,
     create_magazine,
     update_magazine,
-    upload_magazine_file,
-    get_decrypted_pdf_bytes,
+    invalidate_magazine_caches,
+    submit_magazine_upload,
+    ingest_queue,
+    iter_magazine_file,
+    open_magazine_file,
 )
+from app.services.count_service import COUNT_MODES
+from app.services.download_event_service import DownloadEvent, download_recorder
+from app.services.entitlement_service import entitlements
+from app.services.ingest_service import IngestQueueFull
+from app.services.quota_service import consume_download
+from app.services.storage_service import get_storage_backend
+from app.services.view_counter_service import view_counter
+from app.utils.pagination import InvalidCursor
+from app.utils.security import create_signed_url
+from app.utils.http_range import RangeNotSatisfiable, content_range, parse_range_header
 from app.schemas.category import CategoryOut
 from app.services.category_service import get_active_categories_tree
+from app.services.response_cache_service import CachedResponse, category_responses, magazine_responses
 from app.core.config import settings
 from app.services.membership_service import MembershipService
-from app.models.download import Download
 from jose import jwt, JWTError
 
 router = APIRouter()
 
+COUNT_MODE_PATTERN = "^(" + "|".join(COUNT_MODES) + ")$"
+
 
 @router.get("")
 async def list_magazines(
@@ -36,8 +57,25 @@ async def list_magazines(
     size: int = Query(default=20, ge=1, le=100),
     sort_by: str = Query(default="publish_date"),
     order: str = Query(default="desc"),
+    cursor: str | None = Query(default=None, description="Keyset mode: empty for the first page, then next_cursor"),
+    count: str | None = Query(default=None, pattern=COUNT_MODE_PATTERN, description="How to compute total"),
     db: AsyncSession = Depends(get_db),
 ) -> Page:
+    if cursor is not None:
+        try:
+            items, next_cursor = await query_magazines_after(
+                db=db,
+                q=q,
+                is_published=is_published,
+                size=size,
+                sort_by=sort_by,
+                order=order,
+                cursor=cursor,
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return Page(items=[MagazineOut.model_validate(x) for x in items], size=size, next_cursor=next_cursor)
+
     total, items = await query_magazines(
         db=db,
         q=q,
@@ -46,20 +84,54 @@ async def list_magazines(
         size=size,
         sort_by=sort_by,
         order=order,
+        count=count or settings.MAGAZINE_COUNT_MODE,
     )
     return Page(items=[MagazineOut.model_validate(x) for x in items], total=total, page=page, size=size)
 
 
-@router.get("/current-week")
-async def get_current_week(db: AsyncSession = Depends(get_db)) -> Page:
-    items = await get_current_week_magazines(db)
-    return Page(items=[MagazineOut.model_validate(x) for x in items], total=len(items), page=1, size=len(items))
+@router.get("/count")
+async def count_magazine_listing(
+    q: str | None = Query(default=None),
+    is_published: bool | None = Query(default=None),
+    count: str | None = Query(default=None, pattern=COUNT_MODE_PATTERN),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    # Lets clients list with count=none and fetch the total separately, only when they show it
+    total = await count_magazines(db, q, is_published, count or settings.MAGAZINE_COUNT_MODE)
+    return {"total": total}
+
+
+def _cached_json(request: Request, cached: CachedResponse) -> Response:
+    # no-cache: clients may store the body but revalidate with If-None-Match, which costs a 304
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if cached.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+@router.get("/current-week", response_model=Page)
+async def get_current_week(request: Request, sessions: sessionmaker = Depends(get_session_maker)) -> Response:
+    # The render is shared by every request waiting on the key, so it must not use one request's session
+    async def render() -> Page:
+        async with sessions() as db:
+            items = await get_current_week_magazines(db)
+        return Page(items=[MagazineOut.model_validate(x) for x in items], total=len(items), page=1, size=len(items))
 
+    # The week is part of the key so the cached page rolls over on Monday
+    today = date.today()
+    week = (today - timedelta(days=today.weekday())).isoformat()
+    return _cached_json(request, await magazine_responses.get_or_render(f"current-week:{week}", render))
 
-@router.get("/categories")
-async def list_categories(db: AsyncSession = Depends(get_db)) -> list[CategoryOut]:
-    tree = await get_active_categories_tree(db)
-    return tree
+
+@router.get("/categories", response_model=list[CategoryOut])
+async def list_categories(request: Request, sessions: sessionmaker = Depends(get_session_maker)) -> Response:
+    async def render() -> list[CategoryOut]:
+        async with sessions() as db:
+            return await get_active_categories_tree(db)
+
+    # Categories are only edited in the database, so nothing invalidates this: edits show once the
+    # cached tree expires (RESPONSE_CACHE_TTL_SECONDS, plus RESPONSE_CACHE_REDIS_TTL_SECONDS with Redis)
+    return _cached_json(request, await category_responses.get_or_render("tree", render))
 
 
 @router.get("/{magazine_id}")
@@ -74,6 +146,7 @@ async def get_magazine_detail(magazine_id: int, db: AsyncSession = Depends(get_d
 async def create_magazine_metadata(payload: MagazineCreate, db: AsyncSession = Depends(get_db)) -> MagazineOut:
     magazine = await create_magazine(db, payload)
     await db.commit()
+    await invalidate_magazine_caches()
     await db.refresh(magazine)
     return MagazineOut.model_validate(magazine)
 
@@ -86,29 +159,46 @@ async def update_magazine_metadata(
     if magazine is None:
         raise HTTPException(status_code=404, detail="Magazine not found")
     await db.commit()
+    await invalidate_magazine_caches()
     await db.refresh(magazine)
     return MagazineOut.model_validate(magazine)
 
 
-@router.post("/{magazine_id}/upload")
+@router.post("/{magazine_id}/upload", status_code=202)
 async def upload_pdf(
     magazine_id: int,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
 ) -> MagazineOut:
-    data = await file.read()
-    magazine = await upload_magazine_file(
-        db=db,
-        magazine_id=magazine_id,
-        filename=file.filename or "file.pdf",
-        content_type=file.content_type,
-        data=data,
-    )
+    # UploadFile is spooled to a temp file by the multipart parser; it is staged and handed to the ingest
+    # pipeline (page count, compression, encryption) and the client polls /processing for the outcome
+    try:
+        magazine = await submit_magazine_upload(
+            db=db,
+            magazine_id=magazine_id,
+            filename=file.filename or "file.pdf",
+            content_type=file.content_type,
+            data=file.file,
+        )
+    except IngestQueueFull:
+        raise HTTPException(status_code=503, detail="Upload queue is full, retry later", headers={"Retry-After": "30"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     await db.commit()
+    await invalidate_magazine_caches()
+    await ingest_queue.put(magazine.id)
     await db.refresh(magazine)
     return MagazineOut.model_validate(magazine)
 
 
+@router.get("/{magazine_id}/processing")
+async def get_upload_processing(magazine_id: int, db: AsyncSession = Depends(get_db)) -> MagazineProcessingOut:
+    magazine = await get_magazine_by_id(db, magazine_id)
+    if not magazine:
+        raise HTTPException(status_code=404, detail="Magazine not found")
+    return MagazineProcessingOut.model_validate(magazine)
+
+
 def _optional_user_id(authorization: str | None) -> int | None:
     if not authorization:
         return None
@@ -162,10 +252,37 @@ async def view_magazine(magazine_id: int, request: Request, db: AsyncSession = D
     perm = await MembershipService.check_access_permission(db, user_id, magazine)
     if not perm["can_view"]:
         raise HTTPException(status_code=403, detail="No permission to view this magazine")
+    await view_counter.record(magazine.id, _viewer_id(request, user_id))
     # For local backend, return a token-less inline preview via API streaming in future
     return {"can_view": True}
 
 
+def _viewer_id(request: Request, user_id: int) -> str:
+    # Identity for unique-viewer counting: the user when signed in, else client address and agent
+    if user_id:
+        return f"u:{user_id}"
+    ip = request.client.host if request.client else ""
+    return f"a:{ip}:{request.headers.get('user-agent', '')}"
+
+
+@router.get("/{magazine_id}/stats")
+async def get_magazine_stats(
+    magazine_id: int, day: date | None = Query(default=None), db: AsyncSession = Depends(get_db)
+) -> dict:
+    magazine = await get_magazine_by_id(db, magazine_id)
+    if not magazine:
+        raise HTTPException(status_code=404, detail="Magazine not found")
+    day = day or view_counter.today()
+    return {
+        "id": magazine.id,
+        # Stored count plus this worker's not yet flushed views
+        "view_count": (magazine.view_count or 0) + view_counter.pending(magazine.id),
+        "download_count": magazine.download_count or 0,
+        "day": day,
+        "unique_viewers": await view_counter.unique_viewers(magazine.id, day),
+    }
+
+
 @router.post("/{magazine_id}/download")
 async def download_magazine(magazine_id: int, request: Request, authorization: str, db: AsyncSession = Depends(get_db)):
     user_id = _require_user_id(authorization)
@@ -175,22 +292,31 @@ async def download_magazine(magazine_id: int, request: Request, authorization: s
     perm = await MembershipService.check_access_permission(db, user_id, magazine)
     if not perm["can_download"]:
         raise HTTPException(status_code=403, detail="No permission to download this magazine")
-    # Record download
-    ip = request.client.host if request.client else None
-    user_agent = request.headers.get("user-agent")
-    record = Download(
-        user_id=user_id,
-        magazine_id=magazine.id,
-        ip_address=ip,
-        user_agent=user_agent,
-        status="success",
-    )
-    db.add(record)
-    # Increase download_count for magazine
-    magazine.download_count = (magazine.download_count or 0) + 1
+    # The permission check may come from a cached snapshot; the quota counter is the authoritative check
+    entitlement = await MembershipService.get_entitlement(db, user_id)
+    if not await consume_download(db, user_id, entitlement.download_limit):
+        await db.rollback()
+        await entitlements.invalidate(user_id)
+        raise HTTPException(status_code=403, detail="Monthly download quota exhausted")
+    # Commits the quota consumption; the download log and download_count are written behind
     await db.commit()
-    # For local-first, respond with a simple ok and let client call a file endpoint (to be added later)
-    return {"message": "ok"}
+    await entitlements.invalidate(user_id)  # remaining quota changed
+    await download_recorder.record(
+        DownloadEvent(
+            user_id=user_id,
+            magazine_id=magazine.id,
+            download_time=datetime.now(timezone.utc),
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+        )
+    )
+    url, expires_at = create_signed_url(f"/files/magazines/{magazine.id}")
+    return {"message": "ok", "url": url, "expires_at": expires_at}
+
+
+def _file_etag(file_path: str) -> str:
+    # file_path is unique per upload, so it identifies the exact bytes being served
+    return '"' + sha256(file_path.encode("utf-8")).hexdigest()[:32] + '"'
 
 
 @router.get("/{magazine_id}/file")
@@ -204,9 +330,73 @@ async def get_magazine_file(magazine_id: int, request: Request, db: AsyncSession
     perm = await MembershipService.check_access_permission(db, user_id, magazine)
     if not perm["can_view"]:
         raise HTTPException(status_code=403, detail="No permission to access this file")
+    storage = get_storage_backend()
     try:
-        data = await get_decrypted_pdf_bytes(db, magazine_id)
+        file = await open_magazine_file(magazine, storage)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    headers = {"Content-Disposition": f"inline; filename=magazine-{magazine_id}.pdf"}
-    return StreamingResponse(iter([data]), media_type="application/pdf", headers=headers)
+
+    size = file.plaintext_size
+    etag = _file_etag(magazine.file_path)
+    headers = {
+        "Content-Disposition": f"inline; filename=magazine-{magazine_id}.pdf",
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+    }
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range != etag:
+        # Representation changed since the client cached its first part: send it all again
+        range_header = None
+    try:
+        ranges = parse_range_header(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if ranges is None or ranges[0][0] == 0:
+        # PDF viewers fetch a file in many ranges: only the request starting at the top counts as a view
+        await view_counter.record(magazine.id, _viewer_id(request, user_id))
+
+    if ranges is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            iter_magazine_file(magazine, file, storage, 0, size), media_type="application/pdf", headers=headers
+        )
+
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        headers["Content-Range"] = content_range(start, stop, size)
+        headers["Content-Length"] = str(stop - start)
+        return StreamingResponse(
+            iter_magazine_file(magazine, file, storage, start, stop),
+            status_code=206,
+            media_type="application/pdf",
+            headers=headers,
+        )
+
+    boundary = secrets.token_hex(16)
+    part_headers = [
+        (
+            f"--{boundary}\r\nContent-Type: application/pdf\r\n"
+            f"Content-Range: {content_range(start, stop, size)}\r\n\r\n"
+        ).encode("latin-1")
+        for start, stop in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode("latin-1")
+    headers["Content-Length"] = str(
+        sum(len(h) + (stop - start) + 2 for h, (start, stop) in zip(part_headers, ranges)) + len(closing)
+    )
+
+    async def multipart_body() -> AsyncIterator[bytes]:
+        for part_header, (start, stop) in zip(part_headers, ranges):
+            yield part_header
+            async for chunk in iter_magazine_file(magazine, file, storage, start, stop):
+                yield chunk
+            yield b"\r\n"
+        yield closing
+
+    return StreamingResponse(
+        multipart_body(),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import date
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -59,10 +61,15 @@ async def get_current_membership(authorization: str, db: AsyncSession = Depends(
 @router.get("/history", response_model=list[MembershipHistoryItem])
 async def get_membership_history(authorization: str, db: AsyncSession = Depends(get_db)) -> list[MembershipHistoryItem]:
     user_id = _require_user_id(authorization)
-    # Expire due before returning history for freshness
-    await MembershipService.expire_due_memberships(db)
     items = await MembershipService.get_membership_history(db, user_id)
-    return [MembershipHistoryItem.model_validate(it) for it in items]
+    # Expiry is a background job; report memberships past their end date as expired even if it has not run yet
+    today = date.today()
+    return [
+        MembershipHistoryItem.model_validate(it).model_copy(
+            update={"status": MembershipService.effective_status(it, today)}
+        )
+        for it in items
+    ]
 
 
 @router.post("/upgrade", response_model=UpgradeResponse)
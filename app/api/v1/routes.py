@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, members, magazines, subscriptions, payments, search, health
+from app.api.v1 import auth, members, magazines, subscriptions, payments, search, health, files
 from app.api.v1 import member_tiers
 from app.api.v1 import members as memberships
 
@@ -13,4 +13,5 @@ api_router.include_router(magazines.router, prefix="/magazines", tags=["magazine
 api_router.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscriptions"])
 api_router.include_router(payments.router, prefix="/payment", tags=["payment"])
 api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(files.router, prefix="/files", tags=["files"])
 api_router.include_router(health.router, tags=["health"])
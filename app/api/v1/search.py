@@ -1,8 +1,34 @@
-from fastapi import APIRouter
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_db
+from app.models.magazine import Magazine
+from app.schemas.common import Page
+from app.schemas.magazine import MagazineSearchHit
+from app.services.search_service import get_search_backend
 
 router = APIRouter()
 
 
 @router.get("/magazines")
-async def search_magazines(q: str | None = None):
-    return {"items": [], "query": q}
+async def search_magazines(
+    q: str = Query(min_length=1, max_length=200),
+    page: int = Query(default=1, ge=1),
+    size: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+) -> Page:
+    hits = await get_search_backend().search(q, offset=(page - 1) * size, limit=size)
+    magazines = {}
+    if hits.ids:
+        result = await db.execute(select(Magazine).where(Magazine.id.in_(hits.ids)))
+        magazines = {m.id: m for m in result.scalars().all()}
+    # Keep ranking order; ids deleted since they were indexed are dropped
+    items = [
+        MagazineSearchHit.model_validate(magazines[i]).model_copy(update={"pages": hits.pages.get(i, [])})
+        for i in hits.ids
+        if i in magazines
+    ]
+    return Page(items=items, total=hits.total, page=page, size=size)
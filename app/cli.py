@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.core import db as core_db
+
+
+async def _rebuild_search_index() -> None:
+    from app.services.search_service import rebuild_search_index
+
+    await core_db.init_db()
+    assert core_db.async_session_maker is not None
+    async with core_db.async_session_maker() as session:  # type: ignore
+        count = await rebuild_search_index(session)
+    print(f"Indexed {count} magazines")
+
+
+async def _extract_page_text() -> None:
+    from app.services.magazine_service import extract_missing_page_texts
+
+    await core_db.init_db()
+    assert core_db.async_session_maker is not None
+    async with core_db.async_session_maker() as session:  # type: ignore
+        count = await extract_missing_page_texts(session)
+    print(f"Extracted page text for {count} magazines")
+
+
+async def _send_digests() -> None:
+    from app.services.digest_service import digest_dispatcher
+
+    await core_db.init_db()
+    stats = await digest_dispatcher.run()
+    print(
+        f"Queued {stats.emails} digests for {stats.subscriptions} subscriptions "
+        f"({stats.categories} categories) in {stats.seconds:.1f}s"
+    )
+
+
+COMMANDS = {
+    "extract-page-text": _extract_page_text,
+    "rebuild-search-index": _rebuild_search_index,
+    "send-digests": _send_digests,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,10 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./dev.db"
     REDIS_URL: str = "redis://localhost:6379/0"
     ELASTICSEARCH_URL: str = "http://localhost:9200"
+    SEARCH_BACKEND: str = "memory"  # options: 'memory' | 'elasticsearch'
+    SEARCH_INDEX_NAME: str = "magazines"
+    # Page-level text in the memory index is held in full by every worker; Elasticsearch always indexes it
+    SEARCH_MEMORY_PAGES: bool = False
 
     JWT_SECRET_KEY: str = "change-me"
     JWT_ALGORITHM: str = "HS256"
@@ -28,11 +32,28 @@ class Settings(BaseSettings):
     # Storage configuration
     STORAGE_BACKEND: str = "local"  # options: 'oss' | 'local'
     LOCAL_STORAGE_DIR: str = "storage"
+    # Uploads are read, encrypted and written in chunks of this size (bounds per-upload memory)
+    STORAGE_CHUNK_SIZE: int = 1024 * 1024
+    # Blocking file / oss2 calls run on a bounded thread pool of this size instead of the event loop
+    STORAGE_IO_THREADS: int = 16
 
     OSS_BUCKET: str = ""
     OSS_ENDPOINT: str = ""
     OSS_ACCESS_KEY_ID: str = ""
     OSS_ACCESS_KEY_SECRET: str = ""
+    OSS_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # OSS requires >= 100 KB for all but the last part
+    OSS_UPLOAD_CONCURRENCY: int = 4  # multipart parts in flight per upload
+    OSS_DOWNLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    OSS_DOWNLOAD_CONCURRENCY: int = 4  # ranged GETs in flight per download
+    OSS_RETRIES: int = 3
+    OSS_RETRY_BACKOFF_SECONDS: float = 0.2
+    # Checkpoints of multipart uploads that pass a resume_key (magazine ingest does);
+    # empty = <INGEST_STAGING_DIR>/oss-checkpoints
+    OSS_CHECKPOINT_DIR: str = ""
+    # Local read-through disk tier in front of OSS (e.g. on NVMe); empty disables it. The cap is enforced per
+    # worker, so a directory shared by N workers can hold up to N x STORAGE_CACHE_MAX_BYTES
+    STORAGE_CACHE_DIR: str = ""
+    STORAGE_CACHE_MAX_BYTES: int = 20 * 1024 * 1024 * 1024
 
     # Alipay configuration
     ALIPAY_APP_ID: str = ""
@@ -61,7 +82,57 @@ class Settings(BaseSettings):
 
     # File encryption
     FILE_CRYPT_MASTER_KEY: str = "change-me-please"
+    FILE_CRYPT_SEGMENT_SIZE: int = 1024 * 1024  # plaintext bytes per independently encrypted segment
     TEMP_URL_EXPIRES_SECONDS: int = 3600
+    URL_SIGNING_KEY: str = "change-me"  # HMAC key for signed /files links
+    PUBLIC_BASE_URL: str = ""  # e.g. https://api.example.com; empty yields host-relative links
+    # Fully decrypted copies of non-sensitive issues served with FileResponse; empty disables. As with the
+    # storage cache, the cap is per worker
+    FILE_DECRYPTED_DIR: str = ""
+    FILE_DECRYPTED_MAX_BYTES: int = 10 * 1024 * 1024 * 1024
+
+    # Listing totals: exact | cached | estimated | none (overridable per request with ?count=).
+    # "cached" totals can lag other workers' writes by up to the TTL
+    MAGAZINE_COUNT_MODE: str = "exact"
+    MAGAZINE_COUNT_CACHE_TTL_SECONDS: int = 60
+
+    # Rendered responses of hot anonymous endpoints (per-worker LRU, optional shared Redis tier)
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    RESPONSE_CACHE_REDIS: bool = False
+    RESPONSE_CACHE_REDIS_TTL_SECONDS: int = 300
+
+    # Per-user entitlement snapshots (tier, access window, remaining quota) used for permission checks
+    ENTITLEMENT_CACHE_TTL_SECONDS: int = 30
+    ENTITLEMENT_CACHE_MAX_ENTRIES: int = 10000
+    ENTITLEMENT_CACHE_REDIS: bool = False
+
+    # Download events are written behind the request: flushed every N ms or M events
+    DOWNLOAD_EVENTS_FLUSH_MS: int = 500
+    DOWNLOAD_EVENTS_BATCH_SIZE: int = 500
+    DOWNLOAD_EVENTS_QUEUE_SIZE: int = 10000
+
+    # Magazine views are buffered (in memory, or Redis HINCRBY/PFADD when enabled) and flushed in bulk.
+    # Unique viewers are counted per worker without Redis: enable it when running more than one worker.
+    VIEW_COUNTER_FLUSH_SECONDS: int = 10
+    VIEW_COUNTER_REDIS: bool = False
+    VIEW_UNIQUE_RETENTION_DAYS: int = 7
+
+    # Membership expiry job: rows updated per transaction
+    MEMBERSHIP_EXPIRE_BATCH_SIZE: int = 1000
+
+    # Upload ingest: PDF parsing/compression runs in a process pool fed by a bounded queue
+    INGEST_PROCESSES: int = 2
+    INGEST_QUEUE_SIZE: int = 32
+    INGEST_STAGING_DIR: str = ""  # empty = <tmp>/nmb-ingest
+    # Pending/processing uploads whose worker has not heartbeated for this long are taken over or failed
+    INGEST_LEASE_SECONDS: int = 120
+
+    # Decrypted file cache (per worker); FILE_CACHE_MAX_BYTES=0 disables it
+    FILE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    FILE_CACHE_BLOCK_SIZE: int = 1024 * 1024
+    FILE_CACHE_SPILL_DIR: str = ""  # e.g. /dev/shm/nmb-file-cache; empty = memory only
+    FILE_CACHE_SPILL_MAX_BYTES: int = 1024 * 1024 * 1024
 
     # Email (simple SMTP)
     SMTP_HOST: str = ""
@@ -69,7 +140,41 @@ class Settings(BaseSettings):
     SMTP_USERNAME: str = ""
     SMTP_PASSWORD: str = ""
     SMTP_USE_SSL: bool = True
+    SMTP_STARTTLS: bool = True  # without SMTP_USE_SSL; turn off only for a trusted local relay
     MAIL_FROM: str = ""
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    # Async sends: messages in flight, each on a kept-alive connection; NOOP before reusing one idle longer
+    SMTP_POOL_SIZE: int = 4
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_IDLE_CHECK_SECONDS: float = 30.0
+    RENEWAL_REMINDER_BATCH_SIZE: int = 500
+    # Outbox worker: claim batch, poll interval, claim lease, retries with exponential backoff
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100
+    EMAIL_OUTBOX_POLL_SECONDS: float = 2.0
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_RETRY_BASE_SECONDS: float = 30.0
+    EMAIL_RETRY_MAX_SECONDS: float = 3600.0
+    # Per recipient domain and worker: sustained rate and burst; overrides e.g. {"qq.com": 30}
+    EMAIL_DOMAIN_RATE_PER_MINUTE: int = 120
+    EMAIL_DOMAIN_BURST: int = 20
+    EMAIL_DOMAIN_RATE_LIMITS: dict[str, int] = {}
+
+    # Subscription digests: subscriptions claimed per transaction, magazines per digest, send hour
+    DIGEST_BATCH_SIZE: int = 2000
+    DIGEST_MAX_ITEMS: int = 10
+    DIGEST_SEND_HOUR: int = 8  # in SCHEDULER_TIMEZONE; next_send_at is advanced to this hour
+
+    # Background jobs: one leader among all workers runs them (lease in "database" or "redis")
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LEASE_BACKEND: str = "database"
+    SCHEDULER_LEASE_SECONDS: int = 60
+    SCHEDULER_TICK_SECONDS: float = 15.0
+    SCHEDULER_JITTER_SECONDS: float = 60.0  # max random delay after each scheduled time
+    SCHEDULER_TIMEZONE: str = "UTC"  # cron schedules are read in this zone
+    MEMBERSHIP_EXPIRE_CRON: str = "0 */6 * * *"
+    RENEWAL_REMINDER_CRON: str = "0 9 * * *"
+    DIGEST_CRON: str = "*/15 * * * *"
 
     # Login throttle & lockout
     LOGIN_FAIL_LIMIT: int = 5
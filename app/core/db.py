@@ -32,6 +32,7 @@ async def init_db() -> None:
         assert async_session_maker is not None
         async with async_session_maker() as session:
             await _seed_member_tiers(session)
+            await _seed_magazine_counters(session)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -42,6 +43,14 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_session_maker() -> sessionmaker:
+    """For work shared between requests (or outliving one), which must open sessions of its own."""
+    if async_session_maker is None:
+        await init_db()
+    assert async_session_maker is not None
+    return async_session_maker
+
+
 async def _seed_member_tiers(session: AsyncSession) -> None:
     from sqlalchemy import select
 
@@ -109,3 +118,19 @@ async def _seed_member_tiers(session: AsyncSession) -> None:
     ]
     session.add_all(tiers)
     await session.commit()
+
+
+async def _seed_magazine_counters(session: AsyncSession) -> None:
+    from sqlalchemy import func, select
+
+    from app.models.magazine import Magazine, MagazineCounter
+
+    result = await session.execute(select(MagazineCounter).limit(1))
+    if result.scalars().first():
+        return
+    for name, published in (("published", True), ("unpublished", False)):
+        count = (
+            await session.execute(select(func.count()).select_from(Magazine).where(Magazine.is_published == published))
+        ).scalar_one()
+        session.add(MagazineCounter(name=name, value=count))
+    await session.commit()
@@ -31,41 +31,64 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def on_startup() -> None:
         await init_db()
-        # Fire-and-forget background tasks: expiration & renewal reminders
-        async def expire_loop() -> None:
-            while True:
-                try:
-                    # every 6 hours
-                    await asyncio.sleep(60 * 60 * 6)
-                    # run once per cycle
-                    from app.core.db import async_session_maker
-                    if async_session_maker is None:
-                        continue
-                    async with async_session_maker() as session:  # type: ignore
-                        assert isinstance(session, AsyncSession)
-                        await MembershipService.expire_due_memberships(session)
-                except Exception:
-                    # swallow errors to keep loop alive
-                    pass
-
-        asyncio.create_task(expire_loop())
-
-        async def renewal_reminder_loop() -> None:
-            while True:
-                try:
-                    # run daily
-                    await asyncio.sleep(60 * 60 * 24)
-                    from app.core.db import async_session_maker
-                    if async_session_maker is None:
-                        continue
-                    async with async_session_maker() as session:  # type: ignore
-                        assert isinstance(session, AsyncSession)
-                        # send reminders 3 days before expiry
-                        await MembershipService.notify_renewal_reminders(session, days_before=3)
-                except Exception:
-                    pass
-
-        asyncio.create_task(renewal_reminder_loop())
+        # Keep this worker's in-flight uploads alive; take over those of workers that stopped
+        from app.core.db import async_session_maker
+        from app.services.magazine_service import upload_recovery
+
+        if async_session_maker is not None:
+            upload_recovery.start()
+
+        # The in-process search index lives in memory: load it from the database in the background
+        if settings.SEARCH_BACKEND == "memory" and async_session_maker is not None:
+            from app.services.search_service import rebuild_search_index
+
+            async def build_search_index() -> None:
+                async with async_session_maker() as session:  # type: ignore
+                    await rebuild_search_index(session)
+
+            asyncio.create_task(build_search_index())
+
+        # Periodic jobs: the scheduler makes sure each run happens in one worker only
+        if settings.SCHEDULER_ENABLED and async_session_maker is not None:
+            from app.services.digest_service import digest_dispatcher
+            from app.services.scheduler_service import scheduler
+
+            async def expire_memberships() -> None:
+                async with async_session_maker() as session:  # type: ignore
+                    await MembershipService.expire_due_memberships(session)
+
+            async def renewal_reminders() -> None:
+                async with async_session_maker() as session:  # type: ignore
+                    # remind 3 days before expiry
+                    await MembershipService.notify_renewal_reminders(session, days_before=3)
+
+            scheduler.register("expire-memberships", settings.MEMBERSHIP_EXPIRE_CRON, expire_memberships)
+            scheduler.register("renewal-reminders", settings.RENEWAL_REMINDER_CRON, renewal_reminders)
+            scheduler.register("subscription-digests", settings.DIGEST_CRON, digest_dispatcher.run)
+            scheduler.start()
+
+        # Business code only queues emails; this worker sends them
+        if async_session_maker is not None:
+            from app.services.email_outbox_service import outbox_worker
+
+            outbox_worker.start()
+
+    @app.on_event("shutdown")
+    async def on_shutdown() -> None:
+        from app.services.download_event_service import download_recorder
+        from app.services.email_outbox_service import outbox_worker
+        from app.services.email_service import email_pool
+        from app.services.magazine_service import upload_recovery
+        from app.services.scheduler_service import scheduler
+        from app.services.view_counter_service import view_counter
+
+        # Write out download events and view counts still buffered in memory
+        await download_recorder.drain()
+        await view_counter.drain()
+        await upload_recovery.stop()
+        await scheduler.stop()
+        await outbox_worker.stop()
+        await email_pool.close()
 
     return app
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -25,3 +25,16 @@ class Download(Base):
 
     user = relationship("User")
     magazine = relationship("Magazine")
+
+    # Seeds a user's monthly quota counter with a range COUNT
+    __table_args__ = (Index("idx_downloads_user_time", "user_id", "download_time"),)
+
+
+class DownloadQuotaUsage(Base):
+    """Successful downloads per user and calendar month (UTC), kept in step with ``downloads`` rows."""
+
+    __tablename__ = "download_quota_usage"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)  # YYYY-MM
+    used: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import BigInteger, Boolean, Date, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -21,6 +21,16 @@ class Magazine(Base):
     encrypted_key: Mapped[str | None] = mapped_column(String(255))
     file_size: Mapped[int | None] = mapped_column(BigInteger)
     page_count: Mapped[int | None] = mapped_column(Integer)
+    # Background ingest of the latest upload; NULL until a file is submitted
+    processing_status: Mapped[str | None] = mapped_column(
+        Enum("pending", "processing", "ready", "failed", name="magazine_processing_status")
+    )
+    processing_error: Mapped[str | None] = mapped_column(String(500))
+    # Worker process that staged the upload (its staging files are local to it) and its last heartbeat
+    processing_owner: Mapped[str | None] = mapped_column(String(100))
+    processing_heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # file_path whose page text is stored in magazine_page_texts; differs from file_path until extracted
+    page_text_path: Mapped[str | None] = mapped_column(String(500))
     is_sensitive: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     is_published: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     view_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -30,9 +40,45 @@ class Magazine(Base):
         DateTime(timezone=True), server_default="CURRENT_TIMESTAMP", onupdate="CURRENT_TIMESTAMP"
     )
 
-    # Relationships can be defined via association table in future if needed
+    # Categories are linked through MagazineCategoryLink
 
     __table_args__ = (
-        Index("idx_publish_date", "publish_date"),
+        # (sort column, id) for keyset pagination; also serves plain publish_date lookups
+        Index("idx_magazines_publish_date_id", "publish_date", "id"),
+        Index("idx_magazines_created_at_id", "created_at", "id"),
         Index("idx_issue_number", "issue_number"),
     )
+
+
+class MagazineCategoryLink(Base):
+    """A magazine's membership in a category (a magazine can be in several)."""
+
+    __tablename__ = "magazine_category_links"
+
+    magazine_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("magazines.id"), primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, ForeignKey("magazine_categories.id"), primary_key=True)
+
+    # Newest magazines of a category (subscription digests)
+    __table_args__ = (Index("idx_magazine_category_links_category", "category_id", "magazine_id"),)
+
+
+class MagazineCounter(Base):
+    """Row counts maintained on magazine writes (``published`` / ``unpublished``) for cheap listing totals."""
+
+    __tablename__ = "magazine_counters"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class MagazinePageText(Base):
+    """Extracted text of one PDF page (1-based ``page_number``) of a magazine's current file."""
+
+    __tablename__ = "magazine_page_texts"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    magazine_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("magazines.id"), nullable=False)
+    page_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+
+    __table_args__ = (Index("uq_magazine_page_texts_page", "magazine_id", "page_number", unique=True),)
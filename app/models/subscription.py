@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Integer
+from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -29,3 +29,6 @@ class Subscription(Base):
 
     user = relationship("User")
     category = relationship("MagazineCategory")
+
+    # Due active subscriptions, oldest first (digest dispatcher)
+    __table_args__ = (Index("idx_subscriptions_status_next_send", "status", "next_send_at"),)
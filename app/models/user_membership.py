@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Integer
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -25,3 +25,6 @@ class UserMembership(Base):
 
     user = relationship("User", back_populates="memberships")
     tier = relationship("MemberTier", back_populates="memberships")
+
+    # Range scan for the expiry job (status = 'active' AND end_date < today)
+    __table_args__ = (Index("idx_user_memberships_status_end_date", "status", "end_date"),)
@@ -13,6 +13,7 @@ class Pagination(BaseModel):
 
 class Page(BaseModel):
     items: list
-    total: int
-    page: int
+    total: int | None = None  # not computed in cursor mode
+    page: int | None = None
     size: int
+    next_cursor: str | None = None
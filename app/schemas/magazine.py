@@ -43,12 +43,17 @@ class MagazineOut(MagazineBase):
     id: int
     file_size: int | None = None
     page_count: int | None = None
+    processing_status: str | None = None
     view_count: int
     download_count: int
     created_at: datetime
     updated_at: datetime | None = None
 
 
+class MagazineSearchHit(MagazineOut):
+    pages: list[int] = []  # pages whose text matched, best first
+
+
 class MagazineCreate(BaseModel):
     title: str
     issue_number: str
@@ -57,6 +62,7 @@ class MagazineCreate(BaseModel):
     cover_image_url: str | None = None
     is_sensitive: bool = False
     is_published: bool = False
+    category_ids: list[int] = []
 
 
 class MagazineUpdate(BaseModel):
@@ -67,3 +73,12 @@ class MagazineUpdate(BaseModel):
     cover_image_url: str | None = None
     is_sensitive: bool | None = None
     is_published: bool | None = None
+    category_ids: list[int] | None = None  # replaces the magazine's categories when given
+
+
+class MagazineProcessingOut(ORMModel):
+    id: int
+    processing_status: str | None = None
+    processing_error: str | None = None
+    file_size: int | None = None
+    page_count: int | None = None
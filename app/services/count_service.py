@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+COUNT_MODES = ("exact", "cached", "estimated", "none")
+
+
+class CountCache:
+    """Per-process TTL cache of listing totals keyed by normalized filter.
+
+    Writes in this process call ``invalidate``; other workers converge within ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, int]] = OrderedDict()
+
+    def get(self, key: Hashable) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            metrics.incr("count_cache_misses")
+            return None
+        self._entries.move_to_end(key)
+        metrics.incr("count_cache_hits")
+        return entry[1]
+
+    def put(self, key: Hashable, value: int) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+
+
+magazine_counts = CountCache(settings.MAGAZINE_COUNT_CACHE_TTL_SECONDS)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import html
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from datetime import time as dtime
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.magazine import Magazine, MagazineCategoryLink
+from app.models.magazine_category import MagazineCategory
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.services.email_outbox_service import enqueue_many
+from app.services.scheduler_service import configured_timezone
+
+# Dialects that can skip subscriptions locked by another dispatcher's batch
+_SKIP_LOCKED_DIALECTS = ("postgresql", "mysql")
+
+# Days a first digest looks back; later ones start at the previous digest, at most _MAX_LOOKBACK_DAYS back
+_PERIOD_DAYS = {"daily": 1, "weekly": 7, "monthly": 31}
+_MAX_LOOKBACK_DAYS = 31
+
+
+def next_send_at(frequency: str, now: datetime, send_hour: int, tz: tzinfo) -> datetime:
+    """Next digest time after ``now``: ``send_hour`` one day, week or month (day capped at 28) later."""
+    local = now.astimezone(tz)
+    base = datetime.combine(local.date(), dtime(send_hour), tzinfo=tz)
+    if frequency == "daily":
+        result = base + timedelta(days=1)
+    elif frequency == "weekly":
+        result = base + timedelta(days=7)
+    else:
+        years, month = divmod(local.month, 12)
+        result = base.replace(year=local.year + years, month=month + 1, day=min(local.day, 28))
+    return result.astimezone(timezone.utc)
+
+
+@dataclass
+class DigestItem:
+    magazine_id: int
+    title: str
+    issue_number: str
+    publish_date: date
+
+
+@dataclass
+class _Category:
+    name: str
+    items: list[DigestItem]  # newest first
+
+
+@dataclass
+class DigestStats:
+    subscriptions: int = 0
+    emails: int = 0
+    categories: int = 0
+    conflicts: int = 0
+    seconds: float = 0.0
+
+
+def render_digest(category_name: str, items: Sequence[DigestItem]) -> str:
+    rows = "".join(
+        f"<li>《{html.escape(item.title)}》第 {html.escape(item.issue_number)} 期（{item.publish_date}）</li>"
+        for item in items
+    )
+    return f"<p>您订阅的「{html.escape(category_name)}」有新刊上架：</p><ul>{rows}</ul><p>感谢您的订阅！</p>"
+
+
+class DigestDispatcher:
+    """Queues subscription digests for every due subscription.
+
+    Due subscriptions (active, ``next_send_at`` passed) are taken ``batch_size`` at a time, oldest first.
+    Each category's newest magazines are read once per run and each distinct digest (category and
+    look-back start) is rendered once, however many subscribers share it. Per batch, one transaction
+    queues the emails through the outbox with a multi-row INSERT and moves ``next_send_at`` on with one
+    UPDATE per frequency, so a digest is queued exactly when its subscription advances. Batches are
+    claimed with ``FOR UPDATE SKIP LOCKED`` on PostgreSQL/MySQL; elsewhere a batch whose UPDATE does not
+    match every row (another dispatcher got there first) is rolled back and re-read.
+
+    A digest lists the category's published magazines dated from the last digest's day (one period back
+    for a first digest, 31 days at most) up to yesterday, so each day's issues go out once; subscriptions
+    with nothing new advance without an email.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        max_items: int,
+        send_hour: int,
+        tz: tzinfo = timezone.utc,
+        session_factory: Callable[[], Any] | None = None,
+    ) -> None:
+        self.batch_size = batch_size
+        self.max_items = max_items
+        self.send_hour = send_hour
+        self.tz = tz
+        self.session_factory = session_factory
+
+    def _sessions(self) -> Callable[[], Any]:
+        if self.session_factory is not None:
+            return self.session_factory
+        from app.core.db import async_session_maker
+
+        assert async_session_maker is not None
+        return async_session_maker
+
+    async def run(self, now: datetime | None = None) -> DigestStats:
+        now = now or datetime.now(timezone.utc)
+        today = now.astimezone(self.tz).date()
+        stats = DigestStats()
+        categories: dict[int, _Category] = {}
+        rendered: dict[tuple[int, date], str | None] = {}
+        started = time.perf_counter()
+        while True:
+            async with self._sessions()() as session:
+                claimed = await self._dispatch_batch(session, now, today, categories, rendered, stats)
+            if claimed == 0:
+                break
+        stats.categories = len(categories)
+        stats.seconds = time.perf_counter() - started
+        metrics.incr("digest_subscriptions", stats.subscriptions)
+        metrics.incr("digest_emails_queued", stats.emails)
+        metrics.observe("digest_run_seconds", stats.seconds)
+        return stats
+
+    async def _load_categories(
+        self, session: AsyncSession, category_ids: set[int], today: date
+    ) -> dict[int, _Category]:
+        names = dict(
+            (await session.execute(select(MagazineCategory.id, MagazineCategory.name).where(
+                MagazineCategory.id.in_(category_ids)
+            ))).all()
+        )
+        oldest = today - timedelta(days=_MAX_LOOKBACK_DAYS)
+        loaded = {}
+        for category_id in sorted(category_ids):
+            # Newest first: a subscriber's items are a prefix of this list
+            stmt = (
+                select(Magazine.id, Magazine.title, Magazine.issue_number, Magazine.publish_date)
+                .join(MagazineCategoryLink, MagazineCategoryLink.magazine_id == Magazine.id)
+                .where(
+                    MagazineCategoryLink.category_id == category_id,
+                    Magazine.is_published == True,
+                    Magazine.publish_date >= oldest,
+                    Magazine.publish_date < today,
+                )
+                .order_by(Magazine.publish_date.desc(), Magazine.id.desc())
+                .limit(self.max_items)
+            )
+            items = [DigestItem(*row) for row in (await session.execute(stmt)).all()]
+            loaded[category_id] = _Category(names.get(category_id, ""), items)
+        return loaded
+
+    def _digest(
+        self,
+        category_id: int,
+        category: _Category,
+        since: date,
+        rendered: dict[tuple[int, date], str | None],
+    ) -> str | None:
+        key = (category_id, since)
+        if key not in rendered:
+            items = [item for item in category.items if item.publish_date >= since]
+            rendered[key] = render_digest(category.name, items) if items else None
+        return rendered[key]
+
+    async def _dispatch_batch(
+        self,
+        session: AsyncSession,
+        now: datetime,
+        today: date,
+        categories: dict[int, _Category],
+        rendered: dict[tuple[int, date], str | None],
+        stats: DigestStats,
+    ) -> int:
+        stmt = (
+            select(
+                Subscription.id,
+                Subscription.category_id,
+                Subscription.frequency,
+                Subscription.last_sent_at,
+                User.email,
+            )
+            .join(User, User.id == Subscription.user_id)
+            .where(Subscription.status == "active", Subscription.next_send_at <= now)
+            .order_by(Subscription.next_send_at, Subscription.id)
+            .limit(self.batch_size)
+        )
+        if session.get_bind().dialect.name in _SKIP_LOCKED_DIALECTS:
+            stmt = stmt.with_for_update(skip_locked=True, of=Subscription)
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return 0
+        missing = {row.category_id for row in rows} - categories.keys()
+        if missing:
+            categories.update(await self._load_categories(session, missing, today))
+
+        emails = []
+        groups: dict[tuple[str, bool], list[int]] = defaultdict(list)
+        for row in rows:
+            if row.last_sent_at is None:
+                since = today - timedelta(days=_PERIOD_DAYS[row.frequency])
+            else:
+                last_sent = row.last_sent_at.replace(tzinfo=row.last_sent_at.tzinfo or timezone.utc)
+                since = max(today - timedelta(days=_MAX_LOOKBACK_DAYS), last_sent.astimezone(self.tz).date())
+            category = categories[row.category_id]
+            body = self._digest(row.category_id, category, since, rendered)
+            sent = body is not None and bool(row.email)
+            if sent:
+                emails.append((row.email, f"订阅更新：{category.name}", body))
+            groups[(row.frequency, sent)].append(row.id)
+
+        advanced = 0
+        for (frequency, sent), ids in groups.items():
+            values: dict[str, Any] = {
+                "next_send_at": next_send_at(frequency, now, self.send_hour, self.tz),
+                "updated_at": now,
+            }
+            if sent:
+                values["last_sent_at"] = now
+            result = await session.execute(
+                update(Subscription)
+                .where(Subscription.id.in_(ids), Subscription.next_send_at <= now)
+                .values(**values)
+            )
+            advanced += result.rowcount
+        if advanced != len(rows):
+            # Some rows were advanced by another dispatcher since the SELECT: start the batch over
+            await session.rollback()
+            stats.conflicts += 1
+            metrics.incr("digest_claim_conflicts")
+            return len(rows)
+        await enqueue_many(session, emails)
+        await session.commit()
+        stats.subscriptions += len(rows)
+        stats.emails += len(emails)
+        return len(rows)
+
+
+digest_dispatcher = DigestDispatcher(
+    batch_size=settings.DIGEST_BATCH_SIZE,
+    max_items=settings.DIGEST_MAX_ITEMS,
+    send_hour=settings.DIGEST_SEND_HOUR,
+    tz=configured_timezone(),
+)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import insert, update
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.download import Download
+from app.models.magazine import Magazine
+
+
+@dataclass
+class DownloadEvent:
+    user_id: int
+    magazine_id: int
+    download_time: datetime
+    ip_address: str | None = None
+    user_agent: str | None = None
+    status: str = "success"
+
+
+class DownloadRecorder:
+    """Write-behind recorder for download events.
+
+    Requests enqueue events and return; a single flusher task writes them in batches of up to
+    ``batch_size`` (or whatever arrived within ``flush_interval`` seconds of the first event): one
+    multi-row INSERT into ``downloads`` plus one ``download_count = download_count + n`` UPDATE per
+    magazine, in one transaction. A full queue makes ``record`` wait, which pushes back on callers
+    instead of growing memory. ``drain`` flushes what is queued and stops the flusher (on shutdown).
+
+    A batch that fails to commit is kept and retried with exponential backoff (``retry_base`` up to
+    ``retry_max`` seconds) until it does; events arriving meanwhile queue up behind it. Only once ``drain``
+    has been called is a batch given up after one more failed attempt. Events still queued when the
+    process dies are lost; the authoritative quota counter is written synchronously by the request, so
+    only the download log and ``download_count`` can lag.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float,
+        batch_size: int,
+        maxsize: int,
+        session_factory: Callable[[], Any] | None = None,
+        retry_base: float = 0.5,
+        retry_max: float = 30.0,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.maxsize = maxsize
+        self.session_factory = session_factory
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._queue: asyncio.Queue[DownloadEvent | None] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping = asyncio.Event()
+
+    def _ensure_started(self) -> asyncio.Queue[DownloadEvent | None]:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._stopping = asyncio.Event()
+            self._task = None
+        if self._task is None or self._task.done():
+            # A flusher that died would leave record() blocked on a full queue forever
+            if self._task is not None:
+                metrics.incr("download_events_flusher_restarts")
+            self._task = asyncio.ensure_future(self._run(self._queue))
+        return self._queue
+
+    async def record(self, event: DownloadEvent) -> None:
+        queue = self._ensure_started()
+        await queue.put(event)
+        metrics.set_gauge("download_events_queue_depth", queue.qsize())
+
+    async def _run(self, queue: asyncio.Queue[DownloadEvent | None]) -> None:
+        # None is the stop marker put by drain(): flush what has been collected and exit
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+            metrics.set_gauge("download_events_queue_depth", queue.qsize())
+            await self._flush(batch)
+
+    async def _write(self, batch: list[DownloadEvent]) -> None:
+        session_factory = self.session_factory
+        if session_factory is None:
+            from app.core.db import async_session_maker
+
+            session_factory = async_session_maker
+        assert session_factory is not None
+        async with session_factory() as session:
+            await session.execute(insert(Download), [asdict(event) for event in batch])
+            counts = Counter(event.magazine_id for event in batch if event.status == "success")
+            # Sorted so concurrent flushers (other workers) lock magazine rows in the same order
+            for magazine_id, n in sorted(counts.items()):
+                # updated_at is kept as is: a download is not an edit of the magazine
+                await session.execute(
+                    update(Magazine)
+                    .where(Magazine.id == magazine_id)
+                    .values(download_count=Magazine.download_count + n, updated_at=Magazine.updated_at)
+                )
+            await session.commit()
+
+    async def _flush(self, batch: list[DownloadEvent]) -> None:
+        started = time.perf_counter()
+        delay = self.retry_base
+        while True:
+            try:
+                await self._write(batch)
+                break
+            except Exception:
+                metrics.incr("download_events_flush_errors")
+                if self._stopping.is_set():
+                    metrics.incr("download_events_dropped", len(batch))
+                    return
+            try:
+                # drain() cuts the wait short for one last attempt
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.retry_max)
+        metrics.incr("download_events_recorded", len(batch))
+        metrics.observe("download_events_flush_seconds", time.perf_counter() - started)
+
+    async def drain(self) -> None:
+        """Flush everything queued, then stop the flusher task."""
+        if self._queue is None:
+            return
+        queue = self._ensure_started()
+        self._stopping.set()
+        await queue.put(None)
+        await self._task
+        self._queue = self._task = self._loop = None
+
+
+download_recorder = DownloadRecorder(
+    flush_interval=settings.DOWNLOAD_EVENTS_FLUSH_MS / 1000,
+    batch_size=settings.DOWNLOAD_EVENTS_BATCH_SIZE,
+    maxsize=settings.DOWNLOAD_EVENTS_QUEUE_SIZE,
+)
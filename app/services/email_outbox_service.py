@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import smtplib
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Any, Awaitable, Callable, Iterable
+
+from sqlalchemy import and_, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.email_outbox import EmailOutbox
+from app.services.email_service import EmailService, build_message
+
+# Dialects that can skip rows locked by another worker's claim
+_SKIP_LOCKED_DIALECTS = ("postgresql", "mysql")
+
+
+def enqueue_email(
+    db: AsyncSession,
+    subject: str,
+    to_emails: Iterable[str],
+    html: str,
+    text: str | None = None,
+    send_after: datetime | None = None,
+) -> list[EmailOutbox]:
+    """Queue one email per recipient in the caller's transaction (sent only if that commits)."""
+    now = datetime.now(timezone.utc)
+    rows = [
+        EmailOutbox(
+            to_email=address,
+            domain=address.rpartition("@")[2].lower(),
+            subject=subject,
+            html=html,
+            text=text,
+            next_attempt_at=send_after or now,
+            created_at=now,
+        )
+        for address in to_emails
+    ]
+    db.add_all(rows)
+    metrics.incr("email_outbox_enqueued", len(rows))
+    return rows
+
+
+async def enqueue_many(db: AsyncSession, emails: Iterable[tuple[str, str, str]]) -> int:
+    """Queue ``(to_email, subject, html)`` emails with one multi-row INSERT, for bulk producers."""
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "to_email": address,
+            "domain": address.rpartition("@")[2].lower(),
+            "subject": subject,
+            "html": html,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for address, subject, html in emails
+    ]
+    if rows:
+        await db.execute(insert(EmailOutbox), rows)
+        metrics.incr("email_outbox_enqueued", len(rows))
+    return len(rows)
+
+
+class DomainRateLimiter:
+    """Token bucket per recipient domain: ``burst`` sends at once, then ``per_minute`` sustained."""
+
+    def __init__(self, per_minute: int, burst: int, overrides: dict[str, int] | None = None) -> None:
+        self.per_minute = per_minute
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def acquire(self, domain: str, now: float | None = None) -> float:
+        """Take a token for ``domain``; returns 0, or the seconds to wait when none is left."""
+        now = time.monotonic() if now is None else now
+        per_minute = self.overrides.get(domain, self.per_minute)
+        rate, capacity = per_minute / 60, max(1, min(self.burst, per_minute))
+        tokens, updated = self._buckets.get(domain, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            self._buckets[domain] = (tokens - 1, now)
+            return 0.0
+        self._buckets[domain] = (tokens, now)
+        return (1 - tokens) * self.interval(domain)
+
+    def interval(self, domain: str) -> float:
+        """Seconds between sends to ``domain`` at the sustained rate."""
+        per_minute = self.overrides.get(domain, self.per_minute)
+        return 60 / per_minute if per_minute > 0 else float(settings.EMAIL_RETRY_MAX_SECONDS)
+
+
+def _is_permanent(error: BaseException) -> bool:
+    # 5xx for the recipient or the content will not change on retry; connection and auth problems may
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPDataError):
+        return error.smtp_code >= 500
+    return isinstance(error, ValueError)
+
+
+class OutboxWorker:
+    """Sends queued emails from ``email_outbox``.
+
+    Each round claims up to ``batch_size`` due rows (``FOR UPDATE SKIP LOCKED`` on PostgreSQL/MySQL, so
+    workers in several processes take disjoint batches; on SQLite, whose writers are serialized, the
+    conditional UPDATE of the claim is what keeps two workers from taking the same row). A claim moves
+    the row's due time out by ``lease_seconds``, so rows held by a crashed worker are picked up again.
+    Rows over their domain's rate are pushed back without counting an attempt; failed sends are retried
+    with exponential backoff and jitter until ``max_attempts``, or marked failed at once when the server
+    rejects them permanently.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        poll_interval: float,
+        lease_seconds: int,
+        max_attempts: int,
+        retry_base: float,
+        retry_max: float,
+        limiter: DomainRateLimiter,
+        session_factory: Callable[[], Any] | None = None,
+        send_many: Callable[[list[EmailMessage]], Awaitable[list[BaseException | None]]] | None = None,
+    ) -> None:
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.limiter = limiter
+        self.session_factory = session_factory
+        self.send_many = send_many or EmailService.send_many
+        self._task: asyncio.Task[None] | None = None
+        self._stopping: asyncio.Event | None = None
+
+    def _sessions(self) -> Callable[[], Any]:
+        if self.session_factory is not None:
+            return self.session_factory
+        from app.core.db import async_session_maker
+
+        assert async_session_maker is not None
+        return async_session_maker
+
+    async def _claim(self, session: AsyncSession, now: datetime) -> list[EmailOutbox]:
+        due = and_(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+        stmt = select(EmailOutbox.id).where(due).order_by(EmailOutbox.next_attempt_at).limit(self.batch_size)
+        if session.get_bind().dialect.name in _SKIP_LOCKED_DIALECTS:
+            stmt = stmt.with_for_update(skip_locked=True)
+        ids = list((await session.execute(stmt)).scalars())
+        if not ids:
+            await session.rollback()
+            return []
+        token = uuid.uuid4().hex
+        # Re-checking ``due`` drops rows another worker claimed since the SELECT (the SQLite case)
+        await session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), due)
+            .values(claim_token=token, next_attempt_at=now + timedelta(seconds=self.lease_seconds))
+        )
+        rows = list((await session.execute(select(EmailOutbox).where(EmailOutbox.claim_token == token))).scalars())
+        await session.commit()
+        return rows
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run_once(self) -> int:
+        """Claim and process one batch; returns the number of rows claimed."""
+        async with self._sessions()() as session:
+            now = datetime.now(timezone.utc)
+            rows = await self._claim(session, now)
+            if not rows:
+                return 0
+            sendable, deferred = [], Counter[str]()
+            for row in rows:
+                wait = self.limiter.acquire(row.domain)
+                if wait:
+                    # One send interval apart, so deferred rows come back as tokens do rather than all at once
+                    wait += deferred[row.domain] * self.limiter.interval(row.domain)
+                    row.next_attempt_at = now + timedelta(seconds=wait)
+                    row.claim_token = None
+                    deferred[row.domain] += 1
+                else:
+                    sendable.append(row)
+            started = time.perf_counter()
+            messages = [build_message(row.subject, [row.to_email], row.html, row.text) for row in sendable]
+            results = await self.send_many(messages) if messages else []
+            now = datetime.now(timezone.utc)
+            for row, error in zip(sendable, results):
+                row.attempts += 1
+                row.claim_token = None
+                if error is None:
+                    row.status, row.sent_at, row.last_error = "sent", now, None
+                    metrics.incr("email_outbox_sent")
+                    continue
+                row.last_error = f"{type(error).__name__}: {error}"[:1000]
+                if _is_permanent(error) or row.attempts >= self.max_attempts:
+                    row.status = "failed"
+                    metrics.incr("email_outbox_failed")
+                else:
+                    row.next_attempt_at = now + timedelta(seconds=self._backoff(row.attempts))
+                    metrics.incr("email_outbox_retried")
+            await session.commit()
+        metrics.incr("email_outbox_deferred", sum(deferred.values()))
+        metrics.observe("email_outbox_send_seconds", time.perf_counter() - started)
+        return len(rows)
+
+    async def _run(self, stopping: asyncio.Event) -> None:
+        while not stopping.is_set():
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                metrics.incr("email_outbox_errors")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Caught up: wait for the next poll (or stop)
+                try:
+                    await asyncio.wait_for(stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run(self._stopping))
+
+    async def stop(self) -> None:
+        """Finish the batch in progress and stop (on shutdown)."""
+        if self._task is None or self._stopping is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = self._stopping = None
+
+
+outbox_worker = OutboxWorker(
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    lease_seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base=settings.EMAIL_RETRY_BASE_SECONDS,
+    retry_max=settings.EMAIL_RETRY_MAX_SECONDS,
+    limiter=DomainRateLimiter(
+        settings.EMAIL_DOMAIN_RATE_PER_MINUTE, settings.EMAIL_DOMAIN_BURST, settings.EMAIL_DOMAIN_RATE_LIMITS
+    ),
+)
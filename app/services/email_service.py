@@ -1,31 +1,172 @@
 from __future__ import annotations
 
+import asyncio
 import smtplib
+import time
 from email.message import EmailMessage
-from typing import Iterable
+from typing import Awaitable, Callable, Iterable
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.async_smtp import AsyncSMTPConnection
+
+
+def build_message(subject: str, to_emails: Iterable[str], html: str, text: str | None = None) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = settings.MAIL_FROM
+    msg["To"] = ", ".join(to_emails)
+    if text:
+        msg.set_content(text)
+    msg.add_alternative(html, subtype="html")
+    return msg
+
+
+def smtp_connect() -> smtplib.SMTP:
+    if settings.SMTP_USE_SSL:
+        server: smtplib.SMTP = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT)
+    else:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
+        server.starttls()
+    if settings.SMTP_USERNAME:
+        server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+    return server
+
+
+async def smtp_connect_async() -> AsyncSMTPConnection:
+    conn = AsyncSMTPConnection(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        use_ssl=settings.SMTP_USE_SSL,
+        starttls=settings.SMTP_STARTTLS,
+        username=settings.SMTP_USERNAME,
+        password=settings.SMTP_PASSWORD,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+    )
+    await conn.connect()
+    return conn
 
 
 class EmailService:
     @staticmethod
     def send_email(subject: str, to_emails: Iterable[str], html: str, text: str | None = None) -> None:
-        msg = EmailMessage()
-        msg["Subject"] = subject
-        msg["From"] = settings.MAIL_FROM
-        msg["To"] = ", ".join(to_emails)
-        if text:
-            msg.set_content(text)
-        msg.add_alternative(html, subtype="html")
-
-        if settings.SMTP_USE_SSL:
-            with smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                if settings.SMTP_USERNAME:
-                    server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                server.starttls()
-                if settings.SMTP_USERNAME:
-                    server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-                server.send_message(msg)
+        """Blocking send on a connection of its own (scripts and threads without an event loop)."""
+        msg = build_message(subject, to_emails, html, text)
+        with smtp_connect() as server:
+            server.send_message(msg)
+
+    @staticmethod
+    async def send(subject: str, to_emails: Iterable[str], html: str, text: str | None = None) -> None:
+        await email_pool.send(build_message(subject, to_emails, html, text))
+
+    @staticmethod
+    async def send_many(messages: Iterable[EmailMessage]) -> list[BaseException | None]:
+        return await email_pool.send_many(messages)
+
+
+class SMTPPool:
+    """Pool of authenticated, kept-alive SMTP sessions for sending from the event loop.
+
+    At most ``size`` messages are in flight, each on its own connection; a message costs two round trips
+    on a PIPELINING server and no handshake when a warm connection is free. A connection idle for more
+    than ``idle_check_seconds`` is checked with NOOP before reuse and replaced if the server has dropped
+    it; one dropped mid-send is re-opened once. Connections are retired after
+    ``max_messages_per_connection`` messages (servers cap this). The pool binds to the running event
+    loop and starts over empty on a new one.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_messages_per_connection: int = 100,
+        idle_check_seconds: float = 30.0,
+        connect: Callable[[], Awaitable[AsyncSMTPConnection]] = smtp_connect_async,
+    ) -> None:
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_check_seconds = idle_check_seconds
+        self.connect = connect
+        self._slots: asyncio.Semaphore | None = None
+        self._idle: list[tuple[AsyncSMTPConnection, int, float]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def __aenter__(self) -> SMTPPool:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    def _ensure_started(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            # Connections of a previous loop cannot be used from this one
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.size)
+            self._idle = []
+        return self._slots
+
+    async def _open(self) -> AsyncSMTPConnection:
+        conn = await self.connect()
+        metrics.incr("smtp_connections_opened")
+        return conn
+
+    async def _checkout(self) -> tuple[AsyncSMTPConnection, int]:
+        while self._idle:
+            conn, sent, last_used = self._idle.pop()
+            if not conn.is_connected:
+                continue
+            if time.monotonic() - last_used < self.idle_check_seconds or await conn.noop():
+                return conn, sent
+            metrics.incr("smtp_stale_connections")
+            conn.close()
+        return await self._open(), 0
+
+    def _checkin(self, conn: AsyncSMTPConnection, sent: int) -> None:
+        self._idle.append((conn, sent, time.monotonic()))
+
+    async def send(self, msg: EmailMessage) -> None:
+        async with self._ensure_started():
+            conn, sent = await self._checkout()
+            try:
+                try:
+                    await conn.send_message(msg, settings.MAIL_FROM)
+                except smtplib.SMTPServerDisconnected:
+                    if not sent:
+                        raise
+                    # Dropped between the health check and the send: reconnect once
+                    conn.close()
+                    conn, sent = await self._open(), 0
+                    await conn.send_message(msg, settings.MAIL_FROM)
+            except smtplib.SMTPServerDisconnected:
+                conn.close()
+                raise
+            except smtplib.SMTPException:
+                # Rejected message (e.g. bad recipient): the connection itself is still usable
+                self._checkin(conn, sent)
+                raise
+            except BaseException:
+                # Network failure or cancellation mid-command: the session state is unknown
+                conn.close()
+                raise
+            sent += 1
+            if sent >= self.max_messages_per_connection:
+                await conn.quit()
+            else:
+                self._checkin(conn, sent)
+
+    async def send_many(self, messages: Iterable[EmailMessage]) -> list[BaseException | None]:
+        """Send ``messages`` over the pooled connections; returns the error of each message (or None)."""
+        results = await asyncio.gather(*(self.send(msg) for msg in messages), return_exceptions=True)
+        return [result if isinstance(result, BaseException) else None for result in results]
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn, _, _ in idle:
+            await conn.quit()
+
+
+email_pool = SMTPPool(
+    settings.SMTP_POOL_SIZE,
+    settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    settings.SMTP_IDLE_CHECK_SECONDS,
+)
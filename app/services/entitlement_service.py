@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import date
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.redis_kv import RedisKV
+
+
+@dataclass(frozen=True)
+class Entitlement:
+    """What a user may access, as of when the snapshot was taken."""
+
+    tier_id: int | None = None  # None: free user
+    active_until: date | None = None  # membership end_date (inclusive)
+    access_history_days: int | None = None
+    download_limit: int | None = None  # per month; None: unlimited
+    remaining_downloads: int | None = None  # None: unlimited
+
+    def is_member(self, today: date) -> bool:
+        # A snapshot taken before midnight must not outlive the membership it describes
+        return self.tier_id is not None and self.active_until is not None and self.active_until >= today
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data["active_until"] = self.active_until.isoformat() if self.active_until else None
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> Entitlement:
+        until = data.get("active_until")
+        return cls(**{**data, "active_until": date.fromisoformat(until) if until else None})
+
+
+FREE = Entitlement()
+
+
+class EntitlementCache:
+    """Per-user entitlement snapshots: a per-worker LRU, optionally backed by Redis shared by all workers.
+
+    Entries live ``ttl`` seconds. Membership changes and download records call ``invalidate(user_id)``;
+    bulk changes call ``invalidate_all``, which bumps a generation counter that is part of every Redis
+    key. Hit ratio = ``entitlement_cache_hits / (hits + entitlement_cache_misses)``.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, redis: RedisKV | None = None) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis = redis
+        self._entries: OrderedDict[int, tuple[float, Entitlement]] = OrderedDict()
+
+    async def _redis_key(self, user_id: int) -> str:
+        assert self.redis is not None
+        generation = await self.redis.get_json("entitlement:gen") or 0
+        return f"entitlement:{generation}:{user_id}"
+
+    async def get(self, user_id: int) -> Entitlement | None:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] >= time.monotonic():
+            self._entries.move_to_end(user_id)
+            metrics.incr("entitlement_cache_hits", tier="local")
+            return entry[1]
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get_json(await self._redis_key(user_id))
+            except Exception:
+                metrics.incr("entitlement_cache_errors")
+                raw = None
+            if raw is not None:
+                value = Entitlement.from_json(raw)
+                self._put_local(user_id, value)
+                metrics.incr("entitlement_cache_hits", tier="redis")
+                return value
+        metrics.incr("entitlement_cache_misses")
+        return None
+
+    def _put_local(self, user_id: int, value: Entitlement) -> None:
+        self._entries[user_id] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def put(self, user_id: int, value: Entitlement) -> None:
+        self._put_local(user_id, value)
+        if self.redis is not None:
+            try:
+                await self.redis.set_json(await self._redis_key(user_id), value.to_json(), ex=int(self.ttl) or 1)
+            except Exception:
+                metrics.incr("entitlement_cache_errors")
+
+    async def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(await self._redis_key(user_id))
+            except Exception:
+                metrics.incr("entitlement_cache_errors")
+
+    async def invalidate_all(self) -> None:
+        self._entries.clear()
+        if self.redis is not None:
+            try:
+                await self.redis.incr("entitlement:gen")
+            except Exception:
+                metrics.incr("entitlement_cache_errors")
+
+
+entitlements = EntitlementCache(
+    ttl=settings.ENTITLEMENT_CACHE_TTL_SECONDS,
+    max_entries=settings.ENTITLEMENT_CACHE_MAX_ENTRIES,
+    redis=RedisKV() if settings.ENTITLEMENT_CACHE_REDIS else None,
+)
@@ -1,16 +1,37 @@
 from __future__ import annotations
 
+import io
 import os
+import struct
 from dataclasses import dataclass
 from hashlib import sha256
-from typing import Tuple
+from typing import Iterator, Tuple
 
 from Crypto.Cipher import AES  # PyCryptodome implied via python-jose[cryptography], but better to add explicitly if needed
 from Crypto.Random import get_random_bytes
 
+try:
+    from PyPDF2 import PdfReader, PdfWriter  # type: ignore
+except Exception:  # pragma: no cover - optional at runtime
+    PdfReader = PdfWriter = None  # type: ignore
+
 
 BLOCK_SIZE = 16
 
+# Segmented format (version 2):
+#   header | segment 0 | segment 1 | ... | segment N-1
+# Every segment is AES-GCM encrypted on its own: ciphertext (segment_size bytes, the last one may be
+# shorter) followed by a 16-byte tag. Segment i therefore lives at a fixed offset computed from the header,
+# which acts as the index, and any plaintext range can be decrypted by reading only the segments covering it.
+# Nonce = prefix (7) || segment index (4, big endian) || last-segment flag (1); the header is bound in as AAD,
+# so reordering, truncation or header tampering fails authentication.
+SEGMENT_MAGIC = b"NMBSEG"
+SEGMENT_FORMAT_VERSION = 2
+SEGMENT_TAG_SIZE = 16
+DEFAULT_SEGMENT_SIZE = 1024 * 1024
+_HEADER_STRUCT = struct.Struct(">6sBxI7sx")
+SEGMENT_HEADER_SIZE = _HEADER_STRUCT.size
+
 
 def _pad_pkcs7(data: bytes) -> bytes:
     pad_len = BLOCK_SIZE - (len(data) % BLOCK_SIZE)
@@ -43,6 +64,251 @@ def decrypt_aes_cbc(iv: bytes, ciphertext: bytes, key: bytes) -> bytes:
     return _unpad_pkcs7(plaintext_padded)
 
 
+@dataclass(frozen=True)
+class SegmentedHeader:
+    segment_size: int
+    nonce_prefix: bytes
+
+    def to_bytes(self) -> bytes:
+        return _HEADER_STRUCT.pack(SEGMENT_MAGIC, SEGMENT_FORMAT_VERSION, self.segment_size, self.nonce_prefix)
+
+    @classmethod
+    def parse(cls, blob: bytes) -> SegmentedHeader | None:
+        """Return the header, or None when ``blob`` does not start with the segmented format (legacy CBC)."""
+        if len(blob) < SEGMENT_HEADER_SIZE or not blob.startswith(SEGMENT_MAGIC):
+            return None
+        _, version, segment_size, nonce_prefix = _HEADER_STRUCT.unpack_from(blob)
+        if version != SEGMENT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported encrypted file version: {version}")
+        if segment_size <= 0:
+            raise ValueError("Invalid segment size")
+        return cls(segment_size=segment_size, nonce_prefix=nonce_prefix)
+
+
+@dataclass(frozen=True)
+class SegmentLayout:
+    header: SegmentedHeader
+    ciphertext_size: int
+
+    @property
+    def _stride(self) -> int:
+        return self.header.segment_size + SEGMENT_TAG_SIZE
+
+    @property
+    def segment_count(self) -> int:
+        body = self.ciphertext_size - SEGMENT_HEADER_SIZE
+        count = -(-body // self._stride)
+        if count < 1 or body - (count - 1) * self._stride < SEGMENT_TAG_SIZE:
+            raise ValueError("Invalid encrypted payload")
+        return count
+
+    @property
+    def plaintext_size(self) -> int:
+        return self.ciphertext_size - SEGMENT_HEADER_SIZE - self.segment_count * SEGMENT_TAG_SIZE
+
+    def segment_offset(self, index: int) -> int:
+        return SEGMENT_HEADER_SIZE + index * self._stride
+
+    def segments_for_range(self, start: int, stop: int) -> tuple[int, int]:
+        """Inclusive segment indices covering plaintext bytes ``[start, stop)``."""
+        size = self.header.segment_size
+        count = self.segment_count
+        last = max(start, stop - 1)
+        return min(start // size, count - 1), min(last // size, count - 1)
+
+    def ciphertext_span(self, first: int, last: int) -> tuple[int, int]:
+        """(offset, length) of the stored bytes for segments ``first..last`` inclusive."""
+        offset = self.segment_offset(first)
+        end = min(self.segment_offset(last + 1), self.ciphertext_size)
+        return offset, end - offset
+
+
+def _segment_nonce(header: SegmentedHeader, index: int, last: bool) -> bytes:
+    return header.nonce_prefix + struct.pack(">IB", index, 1 if last else 0)
+
+
+class SegmentEncryptor:
+    """Incremental encryptor for the segmented format; holds at most one segment of plaintext."""
+
+    def __init__(
+        self, key: bytes, segment_size: int = DEFAULT_SEGMENT_SIZE, nonce_prefix: bytes | None = None
+    ) -> None:
+        # A caller-supplied prefix must never be reused for different plaintext under the same key
+        self.key = key
+        self.header = SegmentedHeader(segment_size=segment_size, nonce_prefix=nonce_prefix or get_random_bytes(7))
+        self._aad = self.header.to_bytes()
+        self._index = 0
+        self._pending = bytearray()
+
+    def _seal(self, data: bytes, last: bool) -> bytes:
+        cipher = AES.new(self.key, AES.MODE_GCM, nonce=_segment_nonce(self.header, self._index, last))
+        cipher.update(self._aad)
+        ciphertext, tag = cipher.encrypt_and_digest(data)
+        self._index += 1
+        return ciphertext + tag
+
+    def update(self, data: bytes) -> bytes:
+        self._pending += data
+        size = self.header.segment_size
+        out = []
+        # Keep the trailing segment buffered: only finalize() knows which one is last
+        while len(self._pending) > size:
+            out.append(self._seal(bytes(self._pending[:size]), last=False))
+            del self._pending[:size]
+        return b"".join(out)
+
+    def finalize(self) -> bytes:
+        tail = self._seal(bytes(self._pending), last=True)
+        self._pending = bytearray()
+        return tail
+
+
+def decrypt_segment(key: bytes, layout: SegmentLayout, index: int, data: bytes) -> bytes:
+    cipher = AES.new(
+        key,
+        AES.MODE_GCM,
+        nonce=_segment_nonce(layout.header, index, index == layout.segment_count - 1),
+    )
+    cipher.update(layout.header.to_bytes())
+    if len(data) < SEGMENT_TAG_SIZE:
+        raise ValueError("Invalid encrypted segment")
+    try:
+        return cipher.decrypt_and_verify(data[:-SEGMENT_TAG_SIZE], data[-SEGMENT_TAG_SIZE:])
+    except ValueError:
+        raise ValueError("Encrypted segment failed authentication")
+
+
+def decrypt_segments(key: bytes, layout: SegmentLayout, first: int, blob: bytes) -> Iterator[bytes]:
+    """Decrypt consecutive segments stored in ``blob``, the first of which is segment ``first``."""
+    stride = layout.header.segment_size + SEGMENT_TAG_SIZE
+    index = first
+    for offset in range(0, len(blob), stride):
+        yield decrypt_segment(key, layout, index, blob[offset : offset + stride])
+        index += 1
+
+
+def decrypt_range(key: bytes, layout: SegmentLayout, start: int, stop: int, blob: bytes) -> bytes:
+    """Plaintext ``[start, stop)`` from ``blob``, the ciphertext span returned by ``layout.ciphertext_span``."""
+    first, _ = layout.segments_for_range(start, stop)
+    plaintext = b"".join(decrypt_segments(key, layout, first, blob))
+    skip = start - first * layout.header.segment_size
+    return plaintext[skip : skip + (stop - start)]
+
+
+def cbc_plaintext_size(ciphertext_size: int, tail: bytes, key: bytes) -> int:
+    """Plaintext size of a legacy ``iv || CBC`` object from its last two blocks (``tail``)."""
+    if ciphertext_size < 2 * BLOCK_SIZE or (ciphertext_size % BLOCK_SIZE) or len(tail) != 2 * BLOCK_SIZE:
+        raise ValueError("Invalid encrypted payload")
+    last_block = AES.new(key, AES.MODE_CBC, tail[:BLOCK_SIZE]).decrypt(tail[BLOCK_SIZE:])
+    pad_len = last_block[-1]
+    if pad_len < 1 or pad_len > BLOCK_SIZE:
+        raise ValueError("Invalid padding")
+    return ciphertext_size - BLOCK_SIZE - pad_len
+
+
+def cbc_ciphertext_span(start: int, stop: int) -> tuple[int, int]:
+    """(offset, length) of the stored bytes needed to decrypt plaintext ``[start, stop)`` of a legacy object.
+
+    CBC decryption of a block only needs the previous ciphertext block (the IV for block 0), so legacy files
+    are seekable too; the span starts one block early to include it.
+    """
+    first = start // BLOCK_SIZE
+    last = max(start, stop - 1) // BLOCK_SIZE
+    return first * BLOCK_SIZE, (last - first + 2) * BLOCK_SIZE
+
+
+def decrypt_cbc_range(key: bytes, start: int, stop: int, blob: bytes) -> bytes:
+    """Plaintext ``[start, stop)`` from ``blob``, the span returned by ``cbc_ciphertext_span``."""
+    plaintext = AES.new(key, AES.MODE_CBC, blob[:BLOCK_SIZE]).decrypt(blob[BLOCK_SIZE:])
+    skip = start - (start // BLOCK_SIZE) * BLOCK_SIZE
+    return plaintext[skip : skip + (stop - start)]
+
+
+class SegmentStreamDecryptor:
+    """Incremental decryptor for a contiguous run of segments starting at segment ``first``."""
+
+    def __init__(self, key: bytes, layout: SegmentLayout, first: int) -> None:
+        self.key = key
+        self.layout = layout
+        self._index = first
+        self._stride = layout.header.segment_size + SEGMENT_TAG_SIZE
+        self._pending = bytearray()
+
+    def update(self, data: bytes) -> bytes:
+        self._pending += data
+        out = []
+        while len(self._pending) >= self._stride:
+            out.append(decrypt_segment(self.key, self.layout, self._index, bytes(self._pending[: self._stride])))
+            del self._pending[: self._stride]
+            self._index += 1
+        return b"".join(out)
+
+    def finalize(self) -> bytes:
+        if not self._pending:
+            return b""
+        tail = decrypt_segment(self.key, self.layout, self._index, bytes(self._pending))
+        self._pending = bytearray()
+        return tail
+
+
+class CBCStreamDecryptor:
+    """Incremental AES-CBC decryptor; the first block fed in is used as the IV (chaining value).
+
+    Padding is left in place, callers clamp to the plaintext size from ``cbc_plaintext_size``.
+    """
+
+    def __init__(self, key: bytes) -> None:
+        self.key = key
+        self._cipher = None
+        self._pending = b""
+
+    def update(self, data: bytes) -> bytes:
+        buf = self._pending + data
+        if self._cipher is None:
+            if len(buf) < BLOCK_SIZE:
+                self._pending = buf
+                return b""
+            self._cipher = AES.new(self.key, AES.MODE_CBC, buf[:BLOCK_SIZE])
+            buf = buf[BLOCK_SIZE:]
+        cut = len(buf) - (len(buf) % BLOCK_SIZE)
+        self._pending = buf[cut:]
+        return self._cipher.decrypt(buf[:cut]) if cut else b""
+
+    def finalize(self) -> bytes:
+        if self._pending:
+            raise ValueError("Invalid encrypted payload")
+        return b""
+
+
+def decrypt_payload(payload: bytes, key: bytes) -> bytes:
+    """Decrypt a whole stored object in either the segmented or the legacy ``iv || CBC`` format."""
+    header = SegmentedHeader.parse(payload)
+    if header is None:
+        if len(payload) < 16:
+            raise ValueError("Invalid encrypted payload")
+        return decrypt_aes_cbc(payload[:16], payload[16:], key)
+    layout = SegmentLayout(header=header, ciphertext_size=len(payload))
+    return b"".join(decrypt_segments(key, layout, 0, payload[SEGMENT_HEADER_SIZE:]))
+
+
 def compress_pdf(data: bytes) -> bytes:
-    # Placeholder: real compression can use qpdf/ghostscript/pikepdf; here we return as-is
-    return data
+    """Losslessly Flate-compress the page content streams of a PDF.
+
+    Pages are compressed on the reader side before the whole document (outlines, metadata, forms) is cloned,
+    so the uncompressed streams are no longer referenced and get dropped. Returns ``data`` unchanged when it
+    cannot be parsed or the result is not smaller. CPU-bound: call it from the ingest process pool.
+    """
+    if PdfReader is None:
+        return data
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        for page in reader.pages:
+            page.compress_content_streams()
+        writer = PdfWriter()
+        writer.clone_document_from_reader(reader)
+        out = io.BytesIO()
+        writer.write(out)
+    except Exception:
+        return data
+    compressed = out.getvalue()
+    return compressed if len(compressed) < len(data) else data
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import AsyncIterator, Callable
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.storage_service import DiskLRU, LocalStorageBackend, run_io
+
+
+class DecryptedFileStore:
+    """Whole decrypted copies of non-sensitive issues on local disk, so downloads can go out via FileResponse.
+
+    The first request for an issue streams as usual and materializes the copy in the background (once per
+    file_path, however many requests race); later requests are served from the file without passing the
+    bytes through Python. Sensitive issues must never be handed to this store.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.lru = DiskLRU(directory, max_bytes, "decrypted_files") if directory else None
+        self._inflight: dict[str, asyncio.Task[None]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.lru is not None
+
+    def lookup(self, file_path: str) -> str | None:
+        if self.lru is None:
+            return None
+        name = DiskLRU.name_for(file_path)
+        if not self.lru.touch(name):
+            metrics.incr("decrypted_files_misses")
+            return None
+        local = self.lru.path(name)
+        if not os.path.exists(local):
+            self.lru.forget(name)
+            return None
+        metrics.incr("decrypted_files_hits")
+        return local
+
+    def materialize(self, file_path: str, chunks: Callable[[], AsyncIterator[bytes]]) -> None:
+        """Start writing ``chunks()`` to the store unless the copy exists or is already being written."""
+        if self.lru is None:
+            return
+        name = DiskLRU.name_for(file_path)
+        if name in self._inflight or self.lru.touch(name):
+            return
+        task = asyncio.ensure_future(self._write(name, chunks))
+        self._inflight[name] = task
+        task.add_done_callback(lambda _: self._inflight.pop(name, None))
+
+    async def _write(self, name: str, chunks: Callable[[], AsyncIterator[bytes]]) -> None:
+        assert self.lru is not None
+        target, tmp = self.lru.path(name), self.lru.temp_path(name)
+        size = 0
+        try:
+            f = await run_io("decrypted", "open", open, tmp, "wb")
+            try:
+                async for chunk in chunks():
+                    await run_io("decrypted", "write", f.write, chunk)
+                    size += len(chunk)
+            finally:
+                await run_io("decrypted", "close", f.close)
+            await run_io("decrypted", "commit", os.replace, tmp, target)
+        except Exception:
+            # Best effort: the request that triggered it is streamed regardless
+            metrics.incr("decrypted_files_errors")
+            await run_io("decrypted", "abort", LocalStorageBackend._discard, tmp)
+            return
+        self.lru.add(name, size)
+
+
+decrypted_files = DecryptedFileStore(settings.FILE_DECRYPTED_DIR, settings.FILE_DECRYPTED_MAX_BYTES)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.file_crypto_service import compress_pdf
+
+try:
+    from PyPDF2 import PdfReader  # type: ignore
+except Exception:  # pragma: no cover - optional at runtime
+    PdfReader = None  # type: ignore
+
+T = TypeVar("T")
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    # spawn rather than fork: the parent has event-loop and storage I/O threads that must not be cloned
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.INGEST_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any) -> T:
+    """Run a CPU-bound function (it and its arguments must be picklable) on the ingest process pool."""
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_process_pool(), fn, *args)
+    finally:
+        metrics.observe("ingest_cpu_seconds", time.perf_counter() - started, fn=fn.__name__)
+
+
+def staging_dir() -> str:
+    path = settings.INGEST_STAGING_DIR or os.path.join(tempfile.gettempdir(), "nmb-ingest")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def count_pdf_pages(data: bytes) -> int | None:
+    if PdfReader is None:
+        return None
+    try:
+        return len(PdfReader(io.BytesIO(data)).pages)
+    except Exception:
+        return None
+
+
+# Per-page cap so a page always fits a MySQL TEXT column (64 KiB) even when every character is 3-byte UTF-8
+MAX_PAGE_TEXT_CHARS = 16_000
+
+
+def extract_page_texts(data: bytes) -> list[str]:
+    """Whitespace-normalized text of every page (empty for pages without a text layer)."""
+    if PdfReader is None:
+        return []
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        pages = list(reader.pages)
+    except Exception:
+        return []
+    texts = []
+    for page in pages:
+        try:
+            text = " ".join((page.extract_text() or "").split())
+        except Exception:
+            text = ""
+        texts.append(text[:MAX_PAGE_TEXT_CHARS])
+    return texts
+
+
+def extract_pdf_file_texts(path: str) -> list[str]:
+    with open(path, "rb") as f:
+        return extract_page_texts(f.read())
+
+
+@dataclass
+class PdfIngestResult:
+    page_count: int | None
+    path: str  # file to encrypt and store: the compressed copy, or the source when compression did not pay off
+    original_size: int
+    stored_size: int
+    page_texts: list[str] | None = None
+
+
+def process_pdf(source_path: str, compressed_path: str, extract_text: bool = False) -> PdfIngestResult:
+    """CPU-bound part of an upload, run in a pool process: parse, count pages, extract text and recompress."""
+    with open(source_path, "rb") as f:
+        data = f.read()
+    page_count = count_pdf_pages(data)
+    page_texts = extract_page_texts(data) if extract_text else None
+    compressed = compress_pdf(data)
+    if len(compressed) >= len(data):
+        return PdfIngestResult(page_count, source_path, len(data), len(data), page_texts)
+    with open(compressed_path, "wb") as f:
+        f.write(compressed)
+    return PdfIngestResult(page_count, compressed_path, len(data), len(compressed), page_texts)
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+class IngestQueue:
+    """Bounded queue of ingest jobs drained by a fixed number of worker tasks.
+
+    Callers check ``full()`` before accepting new work (and answer 503 otherwise), so at most ``maxsize``
+    staged uploads wait for the process pool. Workers are started lazily on the running loop.
+    """
+
+    def __init__(self, handler: Callable[[int], Awaitable[None]], workers: int, maxsize: int) -> None:
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: asyncio.Queue[int] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_started(self) -> asyncio.Queue[int]:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._tasks = [asyncio.ensure_future(self._worker(self._queue)) for _ in range(self.workers)]
+        return self._queue
+
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    async def put(self, job: int) -> None:
+        queue = self._ensure_started()
+        # Only waits if more jobs were admitted than the queue holds; the admission check keeps that short
+        await queue.put(job)
+        metrics.set_gauge("ingest_queue_depth", queue.qsize())
+
+    async def join(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _worker(self, queue: asyncio.Queue[int]) -> None:
+        while True:
+            job = await queue.get()
+            metrics.set_gauge("ingest_queue_depth", queue.qsize())
+            started = time.perf_counter()
+            try:
+                await self.handler(job)
+            except Exception:
+                # Handlers record failures on the job itself; keep the worker alive
+                metrics.incr("ingest_errors")
+            finally:
+                metrics.observe("ingest_job_seconds", time.perf_counter() - started)
+                queue.task_done()
@@ -1,39 +1,54 @@
 from __future__ import annotations
 
-from typing import Sequence, Tuple
-
-import io
+from typing import Any, AsyncIterator, BinaryIO, Callable, Sequence, Tuple
+
+import asyncio
+import hashlib
+import hmac
+import os
+import shutil
+import socket
 import uuid
-from datetime import date
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import asc, desc, func, or_, select
+from sqlalchemy import Select, and_, asc, delete, desc, func, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.magazine import Magazine
+from app.models.magazine import Magazine, MagazineCategoryLink, MagazineCounter, MagazinePageText
 from app.schemas.magazine import MagazineCreate, MagazineUpdate
 from app.core.config import settings
+from app.core.metrics import metrics
 from app.services.file_crypto_service import (
-    compress_pdf,
+    BLOCK_SIZE,
+    SEGMENT_HEADER_SIZE,
+    SegmentedHeader,
+    SegmentEncryptor,
+    SegmentLayout,
+    SegmentStreamDecryptor,
+    CBCStreamDecryptor,
+    cbc_ciphertext_span,
+    cbc_plaintext_size,
+    decrypt_payload,
     derive_key,
-    encrypt_aes_cbc,
 )
+from app.services.count_service import magazine_counts
+from app.services.ingest_service import (
+    IngestQueue,
+    IngestQueueFull,
+    extract_pdf_file_texts,
+    process_pdf,
+    run_cpu,
+    staging_dir,
+)
+from app.services.response_cache_service import magazine_responses
+from app.services.search_service import index_magazine
+from app.services.segment_cache_service import segment_cache
 from app.services.storage_service import StorageBackend, get_storage_backend
-
-try:
-    from PyPDF2 import PdfReader  # type: ignore
-except Exception:  # pragma: no cover - optional at runtime
-    PdfReader = None  # type: ignore
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 
-async def query_magazines(
-    db: AsyncSession,
-    q: str | None,
-    is_published: bool | None,
-    page: int,
-    size: int,
-    sort_by: str,
-    order: str,
-) -> tuple[int, list[Magazine]]:
+def _filtered_magazines(q: str | None, is_published: bool | None) -> Select:
     stmt = select(Magazine)
     if q:
         like_expr = f"%{q}%"
@@ -46,12 +61,31 @@ async def query_magazines(
         )
     if is_published is not None:
         stmt = stmt.where(Magazine.is_published == is_published)
+    return stmt
+
 
-    order_by_col = Magazine.publish_date if sort_by == "publish_date" else Magazine.created_at
-    stmt = stmt.order_by(desc(order_by_col) if order == "desc" else asc(order_by_col))
+def _sort_column(sort_by: str):
+    return Magazine.publish_date if sort_by == "publish_date" else Magazine.created_at
 
-    total_stmt = select(func.count()).select_from(stmt.subquery())
-    total = (await db.execute(total_stmt)).scalar_one()
+
+async def query_magazines(
+    db: AsyncSession,
+    q: str | None,
+    is_published: bool | None,
+    page: int,
+    size: int,
+    sort_by: str,
+    order: str,
+    count: str = "exact",
+) -> tuple[int | None, list[Magazine]]:
+    stmt = _filtered_magazines(q, is_published)
+
+    order_by_col = _sort_column(sort_by)
+    # id breaks ties so rows sharing a publish date keep a stable position across pages
+    direction = desc if order == "desc" else asc
+    stmt = stmt.order_by(direction(order_by_col), direction(Magazine.id))
+
+    total = await count_magazines(db, q, is_published, count)
 
     stmt = stmt.offset((page - 1) * size).limit(size)
     result = await db.execute(stmt)
@@ -59,6 +93,108 @@ async def query_magazines(
     return total, items
 
 
+_COUNTER_PUBLISHED = "published"
+_COUNTER_UNPUBLISHED = "unpublished"
+
+
+def _counter_name(is_published: bool) -> str:
+    return _COUNTER_PUBLISHED if is_published else _COUNTER_UNPUBLISHED
+
+
+async def _bump_counter(db: AsyncSession, is_published: bool, delta: int) -> None:
+    # Atomic in-place update, so concurrent writers never lose increments
+    await db.execute(
+        update(MagazineCounter)
+        .where(MagazineCounter.name == _counter_name(is_published))
+        .values(value=MagazineCounter.value + delta)
+    )
+
+
+async def _read_counters(db: AsyncSession) -> dict[str, int]:
+    rows = (await db.execute(select(MagazineCounter.name, MagazineCounter.value))).all()
+    counters = {name: value for name, value in rows}
+    for name in (_COUNTER_PUBLISHED, _COUNTER_UNPUBLISHED):
+        if name not in counters:
+            # Not seeded (see init_db / the migration): fall back to an exact count
+            exact_stmt = select(func.count()).select_from(Magazine).where(
+                Magazine.is_published == (name == _COUNTER_PUBLISHED)
+            )
+            counters[name] = (await db.execute(exact_stmt)).scalar_one()
+    return counters
+
+
+async def count_magazines(db: AsyncSession, q: str | None, is_published: bool | None, mode: str) -> int | None:
+    """Total for a listing filter according to ``mode``.
+
+    exact: COUNT(*) over the filter. cached: exact, memoized per normalized filter for
+    MAGAZINE_COUNT_CACHE_TTL_SECONDS and dropped on magazine writes. estimated: the maintained counter rows
+    when only is_published is filtered, else the cached count. none: not computed.
+    """
+    if mode == "none":
+        return None
+    q = (q or "").strip() or None
+    if mode == "estimated" and q is None:
+        counters = await _read_counters(db)
+        if is_published is None:
+            return counters[_COUNTER_PUBLISHED] + counters[_COUNTER_UNPUBLISHED]
+        return counters[_counter_name(is_published)]
+    # ilike is case-insensitive, so the lowered text is an equivalent cache key
+    key = (q.lower() if q else None, is_published)
+    if mode != "exact":
+        cached = magazine_counts.get(key)
+        if cached is not None:
+            return cached
+    stmt = _filtered_magazines(q, is_published)
+    total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
+    magazine_counts.put(key, total)
+    return total
+
+
+async def query_magazines_after(
+    db: AsyncSession,
+    q: str | None,
+    is_published: bool | None,
+    size: int,
+    sort_by: str,
+    order: str,
+    cursor: str | None,
+) -> tuple[list[Magazine], str | None]:
+    """Keyset pagination on ``(sort column, id)``: one index range scan per page regardless of depth.
+
+    ``cursor`` is the ``next_cursor`` of the previous page (None/empty for the first page); the returned
+    cursor is None on the last page. A cursor is only valid for the sort it was issued with.
+    """
+    stmt = _filtered_magazines(q, is_published)
+    column = _sort_column(sort_by)
+    descending = order == "desc"
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort_by or payload.get("o") != order:
+            raise InvalidCursor("Cursor does not match the requested sort")
+        try:
+            parse = date.fromisoformat if sort_by == "publish_date" else datetime.fromisoformat
+            last_value, last_id = parse(payload["v"]), int(payload["id"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor")
+        # Expanded form of (column, id) < (v, id): MySQL turns it into an index range, unlike row comparison
+        if descending:
+            stmt = stmt.where(or_(column < last_value, and_(column == last_value, Magazine.id < last_id)))
+        else:
+            stmt = stmt.where(or_(column > last_value, and_(column == last_value, Magazine.id > last_id)))
+
+    direction = desc if descending else asc
+    stmt = stmt.order_by(direction(column), direction(Magazine.id)).limit(size + 1)
+    items = list((await db.execute(stmt)).scalars().all())
+    if len(items) <= size:
+        return items, None
+    items = items[:size]
+    last = items[-1]
+    value = last.publish_date if sort_by == "publish_date" else last.created_at
+    next_cursor = encode_cursor({"s": sort_by, "o": order, "v": value.isoformat(), "id": last.id})
+    return items, next_cursor
+
+
 async def get_magazine_by_id(db: AsyncSession, magazine_id: int) -> Magazine | None:
     result = await db.execute(select(Magazine).where(Magazine.id == magazine_id))
     return result.scalar_one_or_none()
@@ -94,6 +230,9 @@ async def create_magazine(db: AsyncSession, payload: MagazineCreate) -> Magazine
     )
     db.add(magazine)
     await db.flush()
+    await set_magazine_categories(db, magazine.id, payload.category_ids)
+    await _bump_counter(db, magazine.is_published, 1)
+    await index_magazine(magazine)
     return magazine
 
 
@@ -101,6 +240,7 @@ async def update_magazine(db: AsyncSession, magazine_id: int, payload: MagazineU
     magazine = await get_magazine_by_id(db, magazine_id)
     if magazine is None:
         return None
+    was_published = magazine.is_published
     for field in (
         "title",
         "issue_number",
@@ -114,74 +254,561 @@ async def update_magazine(db: AsyncSession, magazine_id: int, payload: MagazineU
         if value is not None:
             setattr(magazine, field, value)
     await db.flush()
+    if payload.category_ids is not None:
+        await set_magazine_categories(db, magazine.id, payload.category_ids)
+    if magazine.is_published != was_published:
+        await _bump_counter(db, was_published, -1)
+        await _bump_counter(db, magazine.is_published, 1)
+    await index_magazine(magazine)
     return magazine
 
 
-def _generate_storage_path(magazine_id: int) -> str:
-    today = date.today()
-    return f"magazines/original/{today.year:04d}/{today.month:02d}/{uuid.uuid4().hex}.pdf.enc"
+async def invalidate_magazine_caches() -> None:
+    """Call after a magazine write has committed, so cached totals and responses are dropped.
 
+    Not before: a request rendered between the invalidation and the commit would cache the old rows.
+    """
+    magazine_counts.invalidate()
+    await magazine_responses.invalidate()
 
-async def upload_magazine_file(
-    db: AsyncSession,
-    magazine_id: int,
-    filename: str,
-    content_type: str | None,
-    data: bytes,
-    storage: StorageBackend | None = None,
-) -> Magazine:
+
+async def set_magazine_categories(db: AsyncSession, magazine_id: int, category_ids: list[int]) -> None:
+    await db.execute(delete(MagazineCategoryLink).where(MagazineCategoryLink.magazine_id == magazine_id))
+    if category_ids:
+        await db.execute(
+            insert(MagazineCategoryLink),
+            [{"magazine_id": magazine_id, "category_id": cid} for cid in sorted(set(category_ids))],
+        )
+
+
+def _content_digest(key: bytes, source: bytes | BinaryIO, segment_size: int) -> bytes:
+    """Keyed digest of a file to store; its nonce prefix and storage path are derived from it."""
+    mac = hmac.new(key, b"magazine-file:%d:" % segment_size, hashlib.sha256)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        mac.update(source)
+        return mac.digest()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(settings.STORAGE_CHUNK_SIZE), b""):
+        mac.update(chunk)
+    source.seek(0)
+    return mac.digest()
+
+
+async def _iter_source_chunks(source: bytes | BinaryIO, chunk_size: int) -> AsyncIterator[bytes]:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), chunk_size):
+            yield bytes(view[offset : offset + chunk_size])
+        return
+    while True:
+        chunk = await asyncio.to_thread(source.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _validate_pdf_upload(filename: str, content_type: str | None) -> None:
     if not filename.lower().endswith(".pdf"):
         raise ValueError("Only PDF files are supported")
     if content_type and content_type not in ("application/pdf", "application/octet-stream"):
         raise ValueError("Invalid content type for PDF upload")
 
-    magazine = await get_magazine_by_id(db, magazine_id)
-    if magazine is None:
-        raise ValueError("Magazine not found")
 
-    compressed = compress_pdf(data)
+def _staging_paths(magazine_id: int) -> tuple[str, str]:
+    # One staged upload per magazine at a time (enforced by processing_status), so the names are fixed
+    # and a restarted worker can find them again
+    base = os.path.join(staging_dir(), f"magazine-{magazine_id}")
+    return f"{base}.pdf", f"{base}.compressed.pdf"
+
+
+def _write_staged(path: str, data: bytes | BinaryIO) -> None:
+    with open(path + ".part", "wb") as f:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            f.write(data)
+        else:
+            data.seek(0)
+            shutil.copyfileobj(data, f, settings.STORAGE_CHUNK_SIZE)
+    os.replace(path + ".part", path)
 
-    key = derive_key(magazine_id, settings.FILE_CRYPT_MASTER_KEY)
-    iv, ciphertext = encrypt_aes_cbc(compressed, key)
-    payload = iv + ciphertext
+
+def _discard_staged(magazine_id: int) -> None:
+    for path in _staging_paths(magazine_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def store_magazine_file(
+    db: AsyncSession,
+    magazine: Magazine,
+    source: bytes | BinaryIO,
+    page_count: int | None,
+    storage: StorageBackend | None = None,
+) -> Magazine:
+    """Encrypt ``source`` into a storage object and point the magazine at it.
+
+    ``source`` is read, encrypted and written to storage in ``STORAGE_CHUNK_SIZE`` chunks so memory stays
+    bounded; PDF parsing/compression has already happened in the ingest stage. A file object must be
+    seekable: it is read once up front to derive the nonce prefix and storage path from its content. The
+    same file thus always encrypts to the same object, so an upload cut off by a worker restart resumes
+    from its multipart checkpoint when recovery stores it again, while different files never share a nonce.
+    """
+    key = derive_key(magazine.id, settings.FILE_CRYPT_MASTER_KEY)
+    digest = await asyncio.to_thread(_content_digest, key, source, settings.FILE_CRYPT_SEGMENT_SIZE)
+    encryptor = SegmentEncryptor(key, settings.FILE_CRYPT_SEGMENT_SIZE, nonce_prefix=digest[:7])
+    written = 0
+
+    async def encrypted_chunks() -> AsyncIterator[bytes]:
+        nonlocal written
+        header = encryptor.header.to_bytes()
+        written += len(header)
+        yield header
+        async for chunk in _iter_source_chunks(source, settings.STORAGE_CHUNK_SIZE):
+            out = encryptor.update(chunk)
+            if out:
+                written += len(out)
+                yield out
+        tail = encryptor.finalize()
+        written += len(tail)
+        yield tail
 
     if storage is None:
         storage = get_storage_backend()
 
-    storage_path = _generate_storage_path(magazine_id)
-    await storage.upload(storage_path, payload)
-
-    page_count: int | None = None
-    if PdfReader is not None:
-        try:
-            reader = PdfReader(io.BytesIO(data))
-            page_count = len(reader.pages)
-        except Exception:
-            page_count = None
+    storage_path = f"magazines/original/{magazine.id}/{digest[7:23].hex()}.pdf.enc"
+    await storage.upload_stream(storage_path, encrypted_chunks(), resume_key=storage_path)
 
+    segment_cache.invalidate(magazine.id)
     magazine.file_path = storage_path
-    magazine.encrypted_key = iv.hex()
-    magazine.file_size = len(payload)
+    magazine.encrypted_key = encryptor.header.nonce_prefix.hex()
+    magazine.file_size = written
     magazine.page_count = page_count
 
     await db.flush()
     return magazine
 
 
-async def get_decrypted_pdf_bytes(db: AsyncSession, magazine_id: int, storage: StorageBackend | None = None) -> bytes:
+async def _ingest_staged(db: AsyncSession, magazine: Magazine, storage: StorageBackend | None = None) -> Magazine:
+    source_path, compressed_path = _staging_paths(magazine.id)
+    result = await run_cpu(process_pdf, source_path, compressed_path, True)
+    metrics.incr("ingest_bytes_saved", result.original_size - result.stored_size)
+    with open(result.path, "rb") as f:
+        await store_magazine_file(db, magazine, f, result.page_count, storage)
+    await save_page_texts(db, magazine, result.page_texts or [])
+    return magazine
+
+
+async def save_page_texts(db: AsyncSession, magazine: Magazine, texts: list[str]) -> None:
+    """Replace the stored page texts with those of the magazine's current file and re-index it."""
+    await db.execute(delete(MagazinePageText).where(MagazinePageText.magazine_id == magazine.id))
+    db.add_all(
+        MagazinePageText(magazine_id=magazine.id, page_number=number, text=text)
+        for number, text in enumerate(texts, start=1)
+        if text
+    )
+    magazine.page_text_path = magazine.file_path
+    await db.flush()
+    await index_magazine(magazine, texts)
+
+
+async def extract_missing_page_texts(db: AsyncSession, storage: StorageBackend | None = None) -> int:
+    """Backfill page texts for magazines whose current file has not been extracted yet.
+
+    Picks up files uploaded before text extraction existed, and is safe to re-run: each magazine is
+    committed on its own and ``page_text_path`` records which file the stored texts came from.
+    """
+    if storage is None:
+        storage = get_storage_backend()
+    stmt = (
+        select(Magazine.id)
+        .where(
+            Magazine.file_path != "",
+            # Files still being ingested get their texts from the ingest itself
+            or_(Magazine.processing_status.is_(None), Magazine.processing_status == "ready"),
+            or_(Magazine.page_text_path.is_(None), Magazine.page_text_path != Magazine.file_path),
+        )
+        .order_by(Magazine.id)
+    )
+    done = 0
+    for magazine_id in (await db.execute(stmt)).scalars().all():
+        magazine = await get_magazine_by_id(db, magazine_id)
+        if magazine is None or not magazine.file_path:
+            continue
+        path = os.path.join(staging_dir(), f"magazine-{magazine_id}.text.pdf")
+        file = await open_magazine_file(magazine, storage)
+        try:
+            with open(path, "wb") as f:
+                async for chunk in iter_magazine_file(magazine, file, storage, 0, file.plaintext_size):
+                    await asyncio.to_thread(f.write, chunk)
+            texts = await run_cpu(extract_pdf_file_texts, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        await save_page_texts(db, magazine, texts)
+        await db.commit()
+        metrics.incr("page_text_extracted_pages", len(texts))
+        done += 1
+    return done
+
+
+async def upload_magazine_file(
+    db: AsyncSession,
+    magazine_id: int,
+    filename: str,
+    content_type: str | None,
+    data: bytes | BinaryIO,
+    storage: StorageBackend | None = None,
+) -> Magazine:
+    """Stage, process (page count, compression) and store a magazine PDF, waiting for the result.
+
+    The caller commits, then calls ``invalidate_magazine_caches``.
+
+    ``data`` may be the raw bytes or a seekable binary file (e.g. ``UploadFile.file``). The PDF work runs in
+    the ingest process pool; the API uses ``submit_magazine_upload`` instead so requests do not wait for it.
+    """
+    _validate_pdf_upload(filename, content_type)
+    magazine = await get_magazine_by_id(db, magazine_id)
+    if magazine is None:
+        raise ValueError("Magazine not found")
+    await asyncio.to_thread(_write_staged, _staging_paths(magazine_id)[0], data)
+    try:
+        return await _ingest_staged(db, magazine, storage)
+    finally:
+        await asyncio.to_thread(_discard_staged, magazine_id)
+
+
+async def submit_magazine_upload(
+    db: AsyncSession,
+    magazine_id: int,
+    filename: str,
+    content_type: str | None,
+    data: bytes | BinaryIO,
+) -> Magazine:
+    """Stage an upload for the background ingest pipeline and mark the magazine ``pending``.
+
+    Raises IngestQueueFull when the pipeline is saturated. The caller commits and then calls
+    ``ingest_queue.put(magazine.id)``; progress is reported through ``processing_status``.
+    """
+    _validate_pdf_upload(filename, content_type)
+    magazine = await get_magazine_by_id(db, magazine_id)
+    if magazine is None:
+        raise ValueError("Magazine not found")
+    if magazine.processing_status in ("pending", "processing"):
+        raise ValueError("A previous upload is still being processed")
+    if ingest_queue.full():
+        raise IngestQueueFull()
+    await asyncio.to_thread(_write_staged, _staging_paths(magazine_id)[0], data)
+    magazine.processing_status = "pending"
+    magazine.processing_error = None
+    magazine.processing_owner = INGEST_OWNER
+    magazine.processing_heartbeat_at = datetime.now(timezone.utc)
+    await db.flush()
+    return magazine
+
+
+async def _process_submitted_upload(magazine_id: int) -> None:
+    from app.core.db import async_session_maker
+
+    assert async_session_maker is not None
+    async with async_session_maker() as session:  # type: ignore
+        claimed = await session.execute(
+            update(Magazine)
+            .where(
+                Magazine.id == magazine_id,
+                Magazine.processing_status == "pending",
+                Magazine.processing_owner == INGEST_OWNER,
+            )
+            .values(
+                processing_status="processing",
+                processing_heartbeat_at=datetime.now(timezone.utc),
+                updated_at=datetime.now(timezone.utc),
+            )
+        )
+        await session.commit()
+        magazine = await get_magazine_by_id(session, magazine_id)
+        if claimed.rowcount != 1 or magazine is None:
+            # Deleted, or taken over by another worker's recovery after this one stopped heartbeating
+            return
+        # The staged files are kept if the worker is stopped mid-way, for recovery to resume from
+        try:
+            await _ingest_staged(session, magazine)
+            magazine.processing_status = "ready"
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            magazine.processing_status = "failed"
+            magazine.processing_error = str(e)[:500] or type(e).__name__
+            await session.commit()
+            await asyncio.to_thread(_discard_staged, magazine_id)
+            await invalidate_magazine_caches()
+            raise
+        await asyncio.to_thread(_discard_staged, magazine_id)
+        await invalidate_magazine_caches()
+
+
+# Identifies this worker process on the uploads it stages (staging files are local to its host)
+INGEST_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_IN_FLIGHT = ("pending", "processing")
+
+ingest_queue = IngestQueue(
+    _process_submitted_upload, workers=settings.INGEST_PROCESSES, maxsize=settings.INGEST_QUEUE_SIZE
+)
+
+
+async def heartbeat_submitted_uploads(db: AsyncSession, now: datetime | None = None) -> None:
+    """Mark the uploads this process has staged and not finished as still alive."""
+    await db.execute(
+        update(Magazine)
+        .where(Magazine.processing_owner == INGEST_OWNER, Magazine.processing_status.in_(_IN_FLIGHT))
+        # updated_at is kept as is: a heartbeat is not an edit of the magazine
+        .values(processing_heartbeat_at=now or datetime.now(timezone.utc), updated_at=Magazine.updated_at)
+    )
+    await db.commit()
+
+
+async def recover_submitted_uploads(db: AsyncSession, now: datetime | None = None) -> int:
+    """Take over uploads whose worker stopped heartbeating (it crashed or shut down mid-upload).
+
+    Uploads of live workers are left alone. A stale upload is re-queued here when its staged file is on
+    this host, and marked failed otherwise: the worker that had it is gone. Returns the number re-queued.
+    """
+    now = now or datetime.now(timezone.utc)
+    stale = and_(
+        Magazine.processing_status.in_(_IN_FLIGHT),
+        or_(
+            Magazine.processing_heartbeat_at.is_(None),
+            Magazine.processing_heartbeat_at < now - timedelta(seconds=settings.INGEST_LEASE_SECONDS),
+        ),
+    )
+    requeue = []
+    for magazine_id in (await db.execute(select(Magazine.id).where(stale))).scalars().all():
+        if os.path.exists(_staging_paths(magazine_id)[0]):
+            values = {
+                "processing_status": "pending",
+                "processing_owner": INGEST_OWNER,
+                "processing_heartbeat_at": now,
+            }
+        else:
+            values = {
+                "processing_status": "failed",
+                "processing_error": "Upload was lost before processing; upload it again",
+            }
+        # Re-checking ``stale`` leaves an upload to the worker that took it over first
+        result = await db.execute(
+            update(Magazine).where(Magazine.id == magazine_id, stale).values(updated_at=now, **values)
+        )
+        if result.rowcount == 1 and values["processing_status"] == "pending":
+            requeue.append(magazine_id)
+    await db.commit()
+    for magazine_id in requeue:
+        await ingest_queue.put(magazine_id)
+    metrics.incr("ingest_uploads_recovered", len(requeue))
+    return len(requeue)
+
+
+class UploadRecovery:
+    """Heartbeats this worker's in-flight uploads and takes over those of workers that stopped.
+
+    Runs in every worker, every ``interval`` seconds; an upload is only taken over once its owner has
+    missed heartbeats for ``INGEST_LEASE_SECONDS``, so workers started later leave live uploads alone.
+    """
+
+    def __init__(self, interval: float, session_factory: Callable[[], Any] | None = None) -> None:
+        self.interval = interval
+        self.session_factory = session_factory
+        self._task: asyncio.Task[None] | None = None
+        self._stopping: asyncio.Event | None = None
+
+    def _sessions(self) -> Callable[[], Any]:
+        if self.session_factory is not None:
+            return self.session_factory
+        from app.core.db import async_session_maker
+
+        assert async_session_maker is not None
+        return async_session_maker
+
+    async def run_once(self) -> int:
+        async with self._sessions()() as session:
+            await heartbeat_submitted_uploads(session)
+            return await recover_submitted_uploads(session)
+
+    async def _run(self, stopping: asyncio.Event) -> None:
+        while not stopping.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                metrics.incr("ingest_recovery_errors")
+            try:
+                await asyncio.wait_for(stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run(self._stopping))
+
+    async def stop(self) -> None:
+        if self._task is None or self._stopping is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = self._stopping = None
+
+
+upload_recovery = UploadRecovery(interval=settings.INGEST_LEASE_SECONDS / 4)
+
+
+async def _get_uploaded_magazine(db: AsyncSession, magazine_id: int) -> Magazine:
     magazine = await get_magazine_by_id(db, magazine_id)
     if magazine is None:
         raise ValueError("Magazine not found")
     if not magazine.file_path:
         raise ValueError("File not uploaded")
+    return magazine
+
+
+async def get_decrypted_pdf_bytes(db: AsyncSession, magazine_id: int, storage: StorageBackend | None = None) -> bytes:
+    magazine = await _get_uploaded_magazine(db, magazine_id)
     if storage is None:
         storage = get_storage_backend()
     encrypted = await storage.download(magazine.file_path)
-    if len(encrypted) < 16:
-        raise ValueError("Invalid encrypted payload")
-    iv = encrypted[:16]
-    ciphertext = encrypted[16:]
     key = derive_key(magazine_id, settings.FILE_CRYPT_MASTER_KEY)
-    from app.services.file_crypto_service import decrypt_aes_cbc
+    return decrypt_payload(encrypted, key)
+
+
+@dataclass
+class EncryptedFile:
+    """Resolved view of a stored magazine object: where it lives, its key and its plaintext geometry."""
+
+    path: str
+    key: bytes
+    plaintext_size: int
+    layout: SegmentLayout | None  # None for legacy single-blob CBC objects
 
-    return decrypt_aes_cbc(iv, ciphertext, key)
+
+async def open_encrypted_file(magazine: Magazine, storage: StorageBackend) -> EncryptedFile:
+    """Read just enough of the object (header, or the last two CBC blocks) to serve arbitrary ranges."""
+    if not magazine.file_path:
+        raise ValueError("File not uploaded")
+    key = derive_key(magazine.id, settings.FILE_CRYPT_MASTER_KEY)
+    ciphertext_size = int(magazine.file_size or 0)
+    header = SegmentedHeader.parse(await storage.download_range(magazine.file_path, 0, SEGMENT_HEADER_SIZE))
+    if header is not None:
+        layout = SegmentLayout(header=header, ciphertext_size=ciphertext_size)
+        return EncryptedFile(path=magazine.file_path, key=key, plaintext_size=layout.plaintext_size, layout=layout)
+    tail = await storage.download_range(magazine.file_path, ciphertext_size - 2 * BLOCK_SIZE, 2 * BLOCK_SIZE)
+    size = cbc_plaintext_size(ciphertext_size, tail, key)
+    return EncryptedFile(path=magazine.file_path, key=key, plaintext_size=size, layout=None)
+
+
+def _clip(plaintext: bytes, position: int, start: int, stop: int) -> bytes:
+    # plaintext begins at file offset ``position``; keep the part inside [start, stop)
+    lo, hi = max(position, start), min(position + len(plaintext), stop)
+    return plaintext[lo - position : hi - position] if lo < hi else b""
+
+
+async def iter_plaintext_range(
+    file: EncryptedFile,
+    storage: StorageBackend,
+    start: int,
+    stop: int,
+    chunk_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    """Stream plaintext ``[start, stop)``: storage read stream -> incremental decrypt -> trimmed chunks.
+
+    Only the blocks/segments covering the range are fetched, and at most one chunk plus one segment of
+    data is held at a time, so memory and time-to-first-byte do not depend on the file size.
+    """
+    stop = min(stop, file.plaintext_size)
+    if start >= stop:
+        return
+    decryptor: SegmentStreamDecryptor | CBCStreamDecryptor
+    if file.layout is None:
+        offset, length = cbc_ciphertext_span(start, stop)
+        position = (start // BLOCK_SIZE) * BLOCK_SIZE
+        decryptor = CBCStreamDecryptor(file.key)
+    else:
+        first, last = file.layout.segments_for_range(start, stop)
+        offset, length = file.layout.ciphertext_span(first, last)
+        position = first * file.layout.header.segment_size
+        decryptor = SegmentStreamDecryptor(file.key, file.layout, first)
+
+    async for chunk in storage.download_stream(file.path, offset, length, chunk_size):
+        plaintext = decryptor.update(chunk)
+        if piece := _clip(plaintext, position, start, stop):
+            yield piece
+        position += len(plaintext)
+    if piece := _clip(decryptor.finalize(), position, start, stop):
+        yield piece
+
+
+async def read_plaintext_range(file: EncryptedFile, storage: StorageBackend, start: int, stop: int) -> bytes:
+    """Plaintext bytes ``[start, stop)``, fetching and decrypting only the blocks/segments covering them."""
+    return b"".join([chunk async for chunk in iter_plaintext_range(file, storage, start, stop)])
+
+
+async def open_magazine_file(magazine: Magazine, storage: StorageBackend) -> EncryptedFile:
+    """open_encrypted_file backed by the decrypted segment cache's metadata entries."""
+    file = segment_cache.get_file(magazine.id, magazine.file_path)
+    if file is None:
+        file = await open_encrypted_file(magazine, storage)
+        segment_cache.put_file(magazine.id, magazine.file_path, file)
+    return file
+
+
+async def iter_magazine_file(
+    magazine: Magazine, file: EncryptedFile, storage: StorageBackend, start: int, stop: int
+) -> AsyncIterator[bytes]:
+    """iter_plaintext_range served through the decrypted segment cache.
+
+    The range is walked in cache blocks; hits come straight from the cache, and each run of consecutive
+    misses is fetched with a single storage stream whose output is cut into blocks and cached on the way.
+    """
+    if not segment_cache.enabled:
+        async for chunk in iter_plaintext_range(file, storage, start, stop):
+            yield chunk
+        return
+    stop = min(stop, file.plaintext_size)
+    if start >= stop:
+        return
+    magazine_id = magazine.id
+    spill = not magazine.is_sensitive
+    block_size = segment_cache.block_size
+    index, last = start // block_size, (stop - 1) // block_size
+    while index <= last:
+        data = segment_cache.get(magazine_id, file.path, index)
+        if data is not None:
+            if piece := _clip(data, index * block_size, start, stop):
+                yield piece
+            index += 1
+            continue
+        run_end = index
+        while run_end < last and not segment_cache.contains(magazine_id, file.path, run_end + 1):
+            run_end += 1
+        segment_cache.record_miss(run_end - index)
+        run_stop = min((run_end + 1) * block_size, file.plaintext_size)
+        buffer = bytearray()
+        async for chunk in iter_plaintext_range(file, storage, index * block_size, run_stop):
+            buffer += chunk
+            while len(buffer) >= block_size or (buffer and index * block_size + len(buffer) >= run_stop):
+                data = bytes(buffer[:block_size])
+                del buffer[:block_size]
+                segment_cache.put(magazine_id, file.path, index, data, spill=spill)
+                if piece := _clip(data, index * block_size, start, stop):
+                    yield piece
+                index += 1
+        index = run_end + 1
+
+
+async def get_decrypted_pdf_range(
+    db: AsyncSession,
+    magazine_id: int,
+    start: int,
+    stop: int,
+    storage: StorageBackend | None = None,
+) -> bytes:
+    magazine = await _get_uploaded_magazine(db, magazine_id)
+    if storage is None:
+        storage = get_storage_backend()
+    file = await open_encrypted_file(magazine, storage)
+    return await read_plaintext_range(file, storage, start, stop)
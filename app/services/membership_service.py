@@ -1,20 +1,23 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta, timezone
+import time
+from datetime import date, timedelta
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.models.member_tier import MemberTier
 from app.models.user_membership import UserMembership
-from app.models.download import Download
 from app.models.payment import Payment
 from app.models.magazine import Magazine
-from app.services.payment_service import PaymentService
 from sqlalchemy import update
-from app.services.email_service import EmailService
+from app.services.email_outbox_service import enqueue_email
+from app.services.entitlement_service import FREE, Entitlement, entitlements
+from app.services.quota_service import downloads_used
 from app.models.user import User
 
 
@@ -42,6 +45,13 @@ class MembershipService:
         result = await db.execute(stmt)
         return result.scalars().first()
 
+    @staticmethod
+    def effective_status(membership: UserMembership, today: date | None = None) -> str:
+        """Status as of today: memberships past their end date read as expired before the job marks them."""
+        if membership.status == "active" and membership.end_date < (today or date.today()):
+            return "expired"
+        return membership.status
+
     @staticmethod
     async def get_membership_history(db: AsyncSession, user_id: int) -> list[UserMembership]:
         stmt = (
@@ -55,20 +65,7 @@ class MembershipService:
 
     @staticmethod
     async def get_current_month_downloads(db: AsyncSession, user_id: int) -> int:
-        now = datetime.now(timezone.utc)
-        first_day = datetime(year=now.year, month=now.month, day=1, tzinfo=timezone.utc)
-        if now.month == 12:
-            next_month_first = datetime(year=now.year + 1, month=1, day=1, tzinfo=timezone.utc)
-        else:
-            next_month_first = datetime(year=now.year, month=now.month + 1, day=1, tzinfo=timezone.utc)
-        stmt = select(Download).where(
-            Download.user_id == user_id,
-            Download.status == "success",
-            Download.download_time >= first_day,
-            Download.download_time < next_month_first,
-        )
-        result = await db.execute(stmt)
-        return len(result.scalars().all())
+        return await downloads_used(db, user_id)
 
     @staticmethod
     async def create_membership_upgrade(
@@ -111,6 +108,7 @@ class MembershipService:
         billing_cycle: str,
         start: Optional[date] = None,
     ) -> UserMembership:
+        """Flushes the new membership; the caller commits, then invalidates the user's cached entitlement."""
         if start is None:
             start = date.today()
         if billing_cycle == "monthly":
@@ -141,58 +139,92 @@ class MembershipService:
         return membership
 
     @staticmethod
-    async def expire_due_memberships(db: AsyncSession) -> int:
-        """Mark memberships as expired when end_date < today and status == active."""
+    async def expire_due_memberships(db: AsyncSession, batch_size: int | None = None) -> int:
+        """Mark memberships as expired when end_date < today and status == active.
+
+        Works in primary-key batches of ``batch_size``, each its own short transaction, so no single
+        statement locks a large part of the table. Readers do not depend on it having run: they treat
+        an active membership past its end_date as expired.
+        """
+        batch_size = batch_size or settings.MEMBERSHIP_EXPIRE_BATCH_SIZE
         today = date.today()
-        # Bulk update for efficiency
-        stmt = (
-            update(UserMembership)
-            .where(UserMembership.status == "active", UserMembership.end_date < today)
-            .values(status="expired")
+        due = (UserMembership.status == "active", UserMembership.end_date < today)
+        oldest = (await db.execute(select(func.min(UserMembership.end_date)).where(*due))).scalar_one_or_none()
+        # Lag: how long the oldest due membership has been waiting to be expired
+        metrics.set_gauge("membership_expire_lag_days", (today - oldest).days if oldest else 0)
+        started = time.perf_counter()
+        total = 0
+        while True:
+            ids = (
+                (await db.execute(select(UserMembership.id).where(*due).order_by(UserMembership.id).limit(batch_size)))
+                .scalars()
+                .all()
+            )
+            if not ids:
+                break
+            # Expired rows drop out of the selection, so the next batch (in id order) picks up where this one ended
+            result = await db.execute(
+                update(UserMembership).where(UserMembership.id.in_(ids), *due).values(status="expired")
+            )
+            await db.commit()
+            total += result.rowcount if result.rowcount is not None else 0
+            metrics.incr("memberships_expired", result.rowcount or 0)
+        elapsed = time.perf_counter() - started
+        metrics.observe("membership_expire_seconds", elapsed)
+        metrics.set_gauge("membership_expire_rows_per_second", total / elapsed if elapsed > 0 else 0)
+        if total:
+            await entitlements.invalidate_all()
+        return total
+
+    @staticmethod
+    def _renewal_reminder_html(user: User, membership: UserMembership) -> str:
+        return (
+            f"<p>尊敬的 {user.username}，</p>"
+            f"<p>您的会员（{membership.tier.name}）将于 {membership.end_date} 到期。</p>"
+            f"<p>如需继续享受会员权益，请及时续订。</p>"
+            f"<p>感谢您的使用！</p>"
         )
-        result = await db.execute(stmt)
-        await db.commit()
-        rowcount = result.rowcount if result.rowcount is not None else 0
-        return rowcount
 
     @staticmethod
     async def notify_renewal_reminders(db: AsyncSession, days_before: int = 3) -> int:
-        """Send renewal reminder emails for memberships expiring in N days with auto_renew=True.
+        """Queue renewal reminder emails for memberships expiring in N days with auto_renew=True.
 
-        Only sends emails; no payment links.
-        Returns number of notifications attempted.
+        Only sends emails; no payment links. Memberships are read in id-keyset chunks joined with their
+        user and tier; each chunk's emails go to the outbox in one commit and the outbox worker sends
+        them. Returns the number of emails queued.
         """
         target_date = date.today() + timedelta(days=days_before)
-        stmt = (
-            select(UserMembership)
-            .options(joinedload(UserMembership.tier))
-            .where(
-                UserMembership.status == "active",
-                UserMembership.end_date == target_date,
-                UserMembership.auto_renew == True,
-            )
-        )
-        result = await db.execute(stmt)
-        memberships = list(result.scalars().all())
-        notified = 0
-        for m in memberships:
-            user = await db.get(User, m.user_id)
-            if not user or not user.email:
-                continue
-            subject = "会员即将到期提醒"
-            html = (
-                f"<p>尊敬的 {user.username}，</p>"
-                f"<p>您的会员（{m.tier.name}）将于 {m.end_date} 到期。</p>"
-                f"<p>如需继续享受会员权益，请及时续订。</p>"
-                f"<p>感谢您的使用！</p>"
+        chunk_size = settings.RENEWAL_REMINDER_BATCH_SIZE
+        subject = "会员即将到期提醒"
+        started = time.perf_counter()
+        queued = 0
+        last_id = 0
+        while True:
+            stmt = (
+                select(UserMembership, User)
+                .join(User, User.id == UserMembership.user_id)
+                .options(joinedload(UserMembership.tier))
+                .where(
+                    UserMembership.status == "active",
+                    UserMembership.end_date == target_date,
+                    UserMembership.auto_renew == True,
+                    UserMembership.id > last_id,
+                )
+                .order_by(UserMembership.id)
+                .limit(chunk_size)
             )
-            try:
-                EmailService.send_email(subject=subject, to_emails=[user.email], html=html)
-                notified += 1
-            except Exception:
-                # swallow send errors for now; production should log
-                pass
-        return notified
+            rows = (await db.execute(stmt)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0].id
+            for m, user in rows:
+                if user.email:
+                    enqueue_email(db, subject, [user.email], MembershipService._renewal_reminder_html(user, m))
+                    queued += 1
+            await db.commit()
+        metrics.incr("renewal_reminders_queued", queued)
+        metrics.observe("renewal_reminders_seconds", time.perf_counter() - started)
+        return queued
 
     @staticmethod
     async def compute_remaining_downloads(db: AsyncSession, user_id: int, tier: MemberTier) -> Optional[int]:
@@ -208,29 +240,51 @@ class MembershipService:
         # ISO week
         return (d.isocalendar().week == today.isocalendar().week) and (d.isocalendar().year == today.isocalendar().year)
 
+    @staticmethod
+    async def get_entitlement(db: AsyncSession, user_id: int) -> Entitlement:
+        """The user's tier, access window and remaining quota, served from the entitlement cache."""
+        if not user_id:
+            return FREE
+        cached = await entitlements.get(user_id)
+        if cached is not None:
+            return cached
+        current = await MembershipService.get_current_membership(db, user_id)
+        if current is None:
+            entitlement = FREE
+        else:
+            tier = current.tier
+            entitlement = Entitlement(
+                tier_id=tier.id,
+                active_until=current.end_date,
+                access_history_days=tier.access_history_days,
+                download_limit=tier.max_downloads_per_month,
+                remaining_downloads=await MembershipService.compute_remaining_downloads(db, user_id, tier),
+            )
+        await entitlements.put(user_id, entitlement)
+        return entitlement
+
     @staticmethod
     async def check_access_permission(
         db: AsyncSession, user_id: int, magazine: Magazine
     ) -> dict[str, bool]:
+        entitlement = await MembershipService.get_entitlement(db, user_id)
+        today = date.today()
         # Free user default
-        current = await MembershipService.get_current_membership(db, user_id)
-        if current is None:
+        if not entitlement.is_member(today):
             if MembershipService.is_current_week(magazine.publish_date):
                 return {"can_view": True, "can_download": False}
             return {"can_view": False, "can_download": False}
 
-        tier = current.tier
         # Access history window
-        if tier.access_history_days is not None:
-            days_diff = (date.today() - magazine.publish_date).days
-            if days_diff > int(tier.access_history_days):
+        if entitlement.access_history_days is not None:
+            days_diff = (today - magazine.publish_date).days
+            if days_diff > int(entitlement.access_history_days):
                 return {"can_view": False, "can_download": False}
 
         # Download quota
-        if tier.max_downloads_per_month is None:
+        if entitlement.remaining_downloads is None:
             can_download = True
         else:
-            remaining = await MembershipService.compute_remaining_downloads(db, user_id, tier)
-            can_download = bool(remaining and remaining > 0)
+            can_download = entitlement.remaining_downloads > 0
 
         return {"can_view": True, "can_download": can_download}
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.payment import Payment
 from app.models.member_tier import MemberTier
+from app.services.entitlement_service import entitlements
 from app.services.membership_service import MembershipService
 from app.core.config import settings
 from Crypto.Signature import PKCS1_v1_5
@@ -121,6 +122,8 @@ class PaymentService:
             start=None,
         )
         await db.commit()
+        # Only after the commit, or a concurrent read could cache the old tier again
+        await entitlements.invalidate(payment.user_id)
         return {"ok": True, "activated": True, "membership_id": membership.id}
 
     @staticmethod
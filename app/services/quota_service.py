@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import metrics
+from app.models.download import Download, DownloadQuotaUsage
+
+
+def current_month(now: datetime | None = None) -> tuple[str, datetime, datetime]:
+    """Quota period of ``now`` (UTC calendar month): its key and [start, end) bounds."""
+    now = now or datetime.now(timezone.utc)
+    start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+    end = datetime(now.year + 1, 1, 1, tzinfo=timezone.utc) if now.month == 12 else datetime(
+        now.year, now.month + 1, 1, tzinfo=timezone.utc
+    )
+    return f"{now.year:04d}-{now.month:02d}", start, end
+
+
+async def _count_downloads(db: AsyncSession, user_id: int, start: datetime, end: datetime) -> int:
+    stmt = select(func.count()).select_from(Download).where(
+        Download.user_id == user_id,
+        Download.status == "success",
+        Download.download_time >= start,
+        Download.download_time < end,
+    )
+    return int((await db.execute(stmt)).scalar_one())
+
+
+async def _get_usage(db: AsyncSession, user_id: int, month: str) -> int | None:
+    stmt = select(DownloadQuotaUsage.used).where(
+        DownloadQuotaUsage.user_id == user_id, DownloadQuotaUsage.month == month
+    )
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def downloads_used(db: AsyncSession, user_id: int) -> int:
+    """Successful downloads this month: the counter row, or a COUNT while the month has no row yet."""
+    month, start, end = current_month()
+    used = await _get_usage(db, user_id, month)
+    if used is None:
+        used = await _count_downloads(db, user_id, start, end)
+    return used
+
+
+async def _ensure_usage_row(db: AsyncSession, user_id: int) -> str:
+    month, start, end = current_month()
+    if await _get_usage(db, user_id, month) is None:
+        # First download of the month (or first since the counter existed): seed from the downloads table
+        used = await _count_downloads(db, user_id, start, end)
+        try:
+            async with db.begin_nested():
+                db.add(DownloadQuotaUsage(user_id=user_id, month=month, used=used))
+        except IntegrityError:
+            pass  # seeded concurrently by another request
+    return month
+
+
+async def consume_download(db: AsyncSession, user_id: int, limit: int | None) -> bool:
+    """Atomically count one download against the user's monthly quota.
+
+    Returns False, changing nothing, when ``limit`` is already used up. The conditional UPDATE makes the
+    check and the increment one statement, so concurrent downloads cannot overshoot the limit. The counter
+    is authoritative: ``Download`` rows are written behind by the download recorder and may lag it.
+    """
+    month = await _ensure_usage_row(db, user_id)
+    stmt = update(DownloadQuotaUsage).where(
+        DownloadQuotaUsage.user_id == user_id, DownloadQuotaUsage.month == month
+    )
+    if limit is not None:
+        stmt = stmt.where(DownloadQuotaUsage.used < limit)
+    result = await db.execute(stmt.values(used=DownloadQuotaUsage.used + 1))
+    if result.rowcount != 1:
+        metrics.incr("download_quota_rejections")
+        return False
+    return True
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.redis_kv import RedisKV
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+
+def render_json(content: Any) -> CachedResponse:
+    body = json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return CachedResponse(body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+
+
+class ResponseCache:
+    """Rendered JSON bodies (with their ETag) of one group of endpoints, keyed by request parameters.
+
+    The first tier is a per-worker LRU with a short TTL; the optional Redis tier is shared by workers and
+    versioned by a generation counter, so ``invalidate`` drops every Redis entry of the namespace at once.
+    Invalidation clears this worker's LRU immediately; other workers converge within ``ttl`` seconds.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int, redis: RedisKV | None = None) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis = redis
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[CachedResponse]] = {}
+        self._generation = 0
+
+    def _get_local(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put_local(self, key: str, value: CachedResponse) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _shared_key(self, key: str) -> str | None:
+        if self.redis is None:
+            return None
+        try:
+            generation = await self.redis.get_json(f"response-cache:{self.namespace}:gen") or 0
+        except Exception:
+            metrics.incr("response_cache_errors", cache=self.namespace)
+            return None
+        return f"response-cache:{self.namespace}:{generation}:{key}"
+
+    async def _get_shared(self, shared_key: str) -> CachedResponse | None:
+        assert self.redis is not None
+        try:
+            raw = await self.redis.get_json(shared_key)
+        except Exception:
+            metrics.incr("response_cache_errors", cache=self.namespace)
+            return None
+        return CachedResponse(raw["body"].encode("utf-8"), raw["etag"]) if raw else None
+
+    async def _put_shared(self, shared_key: str, value: CachedResponse) -> None:
+        assert self.redis is not None
+        try:
+            await self.redis.set_json(
+                shared_key,
+                {"body": value.body.decode("utf-8"), "etag": value.etag},
+                ex=settings.RESPONSE_CACHE_REDIS_TTL_SECONDS,
+            )
+        except Exception:
+            metrics.incr("response_cache_errors", cache=self.namespace)
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        """Cached response for ``key``; on a miss ``render`` runs once however many requests are waiting."""
+        cached = self._get_local(key)
+        if cached is not None:
+            metrics.incr("response_cache_hits", cache=self.namespace)
+            return cached
+        future = self._inflight.get(key)
+        if future is None:
+            metrics.incr("response_cache_misses", cache=self.namespace)
+            future = asyncio.ensure_future(self._fill(key, render))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._inflight.pop(key) if self._inflight.get(key) is f else None)
+        return await asyncio.shield(future)
+
+    async def _fill(self, key: str, render: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        generation = self._generation
+        # Resolved before rendering, so a render that races an invalidation lands under the old generation
+        shared_key = await self._shared_key(key)
+        value = await self._get_shared(shared_key) if shared_key else None
+        if value is None:
+            value = render_json(await render())
+            if shared_key:
+                await self._put_shared(shared_key, value)
+        # Skip the store if an invalidation ran while rendering: the value may predate the write
+        if generation == self._generation:
+            self._put_local(key, value)
+        return value
+
+    async def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._inflight.clear()  # requests from now on must not join a render that started before the write
+        if self.redis is not None:
+            try:
+                await self.redis.incr(f"response-cache:{self.namespace}:gen")
+            except Exception:
+                metrics.incr("response_cache_errors", cache=self.namespace)
+
+
+def _make_cache(namespace: str) -> ResponseCache:
+    return ResponseCache(
+        namespace,
+        ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        redis=RedisKV() if settings.RESPONSE_CACHE_REDIS else None,
+    )
+
+
+magazine_responses = _make_cache("magazines")
+category_responses = _make_cache("categories")
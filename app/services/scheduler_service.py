@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Awaitable, Callable, Protocol
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.scheduler import JobRun, SchedulerLease
+from app.utils.redis_kv import RedisKV
+
+# minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_field(text: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in text.split(","):
+        spec, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = int(spec)
+            end = high if step_text else start
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"Invalid cron field: {text!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+def configured_timezone() -> tzinfo:
+    """Zone of SCHEDULER_TIMEZONE, which cron schedules and other wall-clock settings are read in."""
+    name = settings.SCHEDULER_TIMEZONE
+    return timezone.utc if name == "UTC" else ZoneInfo(name)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything stored here is UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class CronSchedule:
+    """Five-field cron expression (``*``, lists, ranges and steps), evaluated in ``tz``.
+
+    As in cron, a day matches when day-of-month or day-of-week matches if both are restricted.
+    """
+
+    def __init__(self, expression: str, tz: tzinfo = timezone.utc) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.tz = tz
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(text, low, high) for text, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, t: datetime) -> bool:
+        in_days = t.day in self.days
+        in_weekdays = (t.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First scheduled time strictly after ``moment`` (aware, in UTC)."""
+        t = _utc(moment).astimezone(self.tz).replace(tzinfo=None, second=0, microsecond=0)
+        t += timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t.replace(tzinfo=self.tz).astimezone(timezone.utc)
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+class Lease(Protocol):
+    async def acquire(self, name: str, owner: str, ttl_seconds: int) -> bool: ...
+
+    async def release(self, name: str, owner: str) -> None: ...
+
+
+class DatabaseLease:
+    """Lease rows in ``scheduler_leases``: taken when free or expired, extended by the current owner."""
+
+    def __init__(self, session_factory: Callable[[], Any] | None = None) -> None:
+        self.session_factory = session_factory
+
+    def _sessions(self) -> Callable[[], Any]:
+        if self.session_factory is not None:
+            return self.session_factory
+        from app.core.db import async_session_maker
+
+        assert async_session_maker is not None
+        return async_session_maker
+
+    async def acquire(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        async with self._sessions()() as session:
+            result = await session.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == name,
+                    or_(SchedulerLease.owner == owner, SchedulerLease.expires_at < now),
+                )
+                .values(owner=owner, expires_at=expires_at)
+            )
+            if result.rowcount:
+                await session.commit()
+                return True
+            session.add(SchedulerLease(name=name, owner=owner, expires_at=expires_at))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Held by someone else (or taken by a concurrent first insert)
+                await session.rollback()
+                return False
+            return True
+
+    async def release(self, name: str, owner: str) -> None:
+        async with self._sessions()() as session:
+            await session.execute(
+                delete(SchedulerLease).where(SchedulerLease.name == name, SchedulerLease.owner == owner)
+            )
+            await session.commit()
+
+
+class RedisLease:
+    def __init__(self, kv: RedisKV) -> None:
+        self.kv = kv
+
+    async def acquire(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        return await self.kv.acquire_lease(f"lease:{name}", owner, ttl_seconds * 1000)
+
+    async def release(self, name: str, owner: str) -> None:
+        await self.kv.release_lease(f"lease:{name}", owner)
+
+
+@dataclass
+class Job:
+    name: str
+    schedule: CronSchedule
+    func: Callable[[], Awaitable[Any]]
+    jitter: float = 0.0
+
+    def delay(self, slot: datetime) -> float:
+        # Same delay for a slot on every worker, so a new leader picks the same start time
+        return random.Random(f"{self.name}:{slot.isoformat()}").uniform(0, self.jitter)
+
+
+class Scheduler:
+    """Runs registered jobs on cron schedules, once per scheduled time across all workers.
+
+    Every worker ticks every ``tick_seconds`` and tries to take (or extend) the leader lease; only the
+    leader starts jobs. Each run first inserts its ``job_runs`` row, whose (job, scheduled time) key is
+    unique, so a slot is not run twice even if leadership changes hands mid-run. A new leader resumes
+    each job after its last recorded run, running a slot missed while nobody led once (not every missed
+    slot). Runs start a random ``jitter`` (stable per slot) after their scheduled time.
+    """
+
+    LEADER_LEASE = "scheduler:leader"
+
+    def __init__(
+        self,
+        lease: Lease,
+        tick_seconds: float,
+        lease_seconds: int,
+        jitter_seconds: float = 0.0,
+        tz: tzinfo = timezone.utc,
+        session_factory: Callable[[], Any] | None = None,
+    ) -> None:
+        self.lease = lease
+        self.tick_seconds = tick_seconds
+        self.lease_seconds = lease_seconds
+        self.jitter_seconds = jitter_seconds
+        self.tz = tz
+        self.session_factory = session_factory
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: dict[str, Job] = {}
+        self.is_leader = False
+        self._next: dict[str, datetime] = {}
+        self._running: dict[str, asyncio.Task[None]] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._stopping: asyncio.Event | None = None
+
+    def _sessions(self) -> Callable[[], Any]:
+        if self.session_factory is not None:
+            return self.session_factory
+        from app.core.db import async_session_maker
+
+        assert async_session_maker is not None
+        return async_session_maker
+
+    def register(
+        self, name: str, cron: str, func: Callable[[], Awaitable[Any]], jitter: float | None = None
+    ) -> Job:
+        job = Job(name, CronSchedule(cron, self.tz), func, self.jitter_seconds if jitter is None else jitter)
+        self.jobs[name] = job
+        self._next.pop(name, None)
+        return job
+
+    async def _last_slot(self, name: str) -> datetime | None:
+        async with self._sessions()() as session:
+            last = (
+                await session.execute(select(func.max(JobRun.scheduled_for)).where(JobRun.job_name == name))
+            ).scalar_one_or_none()
+        return _utc(last) if last is not None else None
+
+    async def tick(self, now: datetime | None = None) -> list[str]:
+        """Renew leadership and start the jobs that are due; returns the names started."""
+        now = now or datetime.now(timezone.utc)
+        try:
+            self.is_leader = await self.lease.acquire(self.LEADER_LEASE, self.owner, self.lease_seconds)
+        except Exception:
+            metrics.incr("scheduler_lease_errors")
+            self.is_leader = False
+        metrics.set_gauge("scheduler_is_leader", int(self.is_leader))
+        if not self.is_leader:
+            # Another worker may run jobs meanwhile: re-read the history on becoming leader again
+            self._next.clear()
+            return []
+        started = []
+        for job in self.jobs.values():
+            if job.name in self._running:
+                continue
+            slot = self._next.get(job.name)
+            if slot is None:
+                last = await self._last_slot(job.name)
+                slot = self._next[job.name] = job.schedule.next_after(last or now)
+            if now < slot + timedelta(seconds=job.delay(slot)):
+                continue
+            self._next[job.name] = job.schedule.next_after(max(slot, now))
+            task = asyncio.ensure_future(self._execute(job, slot))
+            self._running[job.name] = task
+            task.add_done_callback(lambda _, name=job.name: self._running.pop(name, None))
+            started.append(job.name)
+        return started
+
+    async def _execute(self, job: Job, slot: datetime) -> None:
+        async with self._sessions()() as session:
+            run = JobRun(
+                job_name=job.name,
+                scheduled_for=slot,
+                started_at=datetime.now(timezone.utc),
+                status="running",
+                owner=self.owner,
+            )
+            session.add(run)
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another worker already ran (or is running) this slot
+                metrics.incr("scheduler_job_skipped", job=job.name)
+                return
+        started = time.perf_counter()
+        status, error = "success", None
+        try:
+            await job.func()
+        except BaseException as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"[:1000]
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            duration = time.perf_counter() - started
+            async with self._sessions()() as session:
+                await session.execute(
+                    update(JobRun)
+                    .where(JobRun.id == run.id)
+                    .values(
+                        status=status,
+                        error=error,
+                        finished_at=datetime.now(timezone.utc),
+                        duration_ms=int(duration * 1000),
+                    )
+                )
+                await session.commit()
+            metrics.incr("scheduler_job_runs", job=job.name, status=status)
+            metrics.observe("scheduler_job_seconds", duration, job=job.name)
+            if status == "success":
+                metrics.set_gauge("scheduler_job_last_success", time.time(), job=job.name)
+
+    async def status(self) -> list[dict[str, Any]]:
+        """Schedule, next run, last run and last success of each registered job."""
+        now = datetime.now(timezone.utc)
+        result = []
+        async with self._sessions()() as session:
+            for job in self.jobs.values():
+                runs = (
+                    select(JobRun)
+                    .where(JobRun.job_name == job.name)
+                    .order_by(JobRun.started_at.desc())
+                    .limit(1)
+                )
+                last = (await session.execute(runs)).scalar_one_or_none()
+                success = (
+                    await session.execute(runs.where(JobRun.status == "success"))
+                ).scalar_one_or_none()
+                result.append(
+                    {
+                        "name": job.name,
+                        "cron": job.schedule.expression,
+                        "next_run": self._next.get(job.name) or job.schedule.next_after(now),
+                        "running": job.name in self._running,
+                        "last_run": _run_summary(last),
+                        "last_success": _run_summary(success),
+                    }
+                )
+        return result
+
+    async def _run(self, stopping: asyncio.Event) -> None:
+        while not stopping.is_set():
+            try:
+                await self.tick()
+            except Exception:
+                metrics.incr("scheduler_tick_errors")
+            try:
+                await asyncio.wait_for(stopping.wait(), self.tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run(self._stopping))
+
+    async def stop(self) -> None:
+        """Stop ticking, cancel running jobs (recorded as failed) and hand the lease back."""
+        if self._task is None or self._stopping is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = self._stopping = None
+        running = list(self._running.values())
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        if self.is_leader:
+            try:
+                await self.lease.release(self.LEADER_LEASE, self.owner)
+            except Exception:
+                metrics.incr("scheduler_lease_errors")
+            self.is_leader = False
+
+
+def _run_summary(run: JobRun | None) -> dict[str, Any] | None:
+    if run is None:
+        return None
+    return {
+        "scheduled_for": _utc(run.scheduled_for),
+        "started_at": _utc(run.started_at),
+        "finished_at": _utc(run.finished_at) if run.finished_at else None,
+        "status": run.status,
+        "duration_ms": run.duration_ms,
+        "error": run.error,
+    }
+
+
+scheduler = Scheduler(
+    lease=RedisLease(RedisKV()) if settings.SCHEDULER_LEASE_BACKEND == "redis" else DatabaseLease(),
+    tick_seconds=settings.SCHEDULER_TICK_SECONDS,
+    lease_seconds=settings.SCHEDULER_LEASE_SECONDS,
+    jitter_seconds=settings.SCHEDULER_JITTER_SECONDS,
+    tz=configured_timezone(),
+)
@@ -0,0 +1,450 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Hashable, Iterable, Protocol
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.magazine import Magazine, MagazinePageText
+
+# Runs of CJK ideographs (plus kana/hangul) vs. runs of latin letters/digits
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[0-9a-z]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Lower-cased latin/digit words plus overlapping character bigrams of CJK runs.
+
+    A lone CJK character is kept as a unigram. This matches Elasticsearch's ``cjk`` analyzer, so both
+    backends agree on what a query matches.
+    """
+    if not text:
+        return []
+    tokens: list[str] = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if not _CJK_RE.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+# Field boosts: a term in the title/issue number counts as this many occurrences in the body
+FIELD_WEIGHTS = {"title": 3, "issue_number": 3, "description": 1}
+
+
+@dataclass
+class SearchDocument:
+    id: int
+    fields: dict[str, str | None]
+    published: bool = True
+    pages: list[str] | None = None  # body text per page; None leaves already indexed pages untouched
+
+
+def document_for_magazine(magazine: Magazine, pages: list[str] | None = None) -> SearchDocument:
+    return SearchDocument(
+        id=magazine.id,
+        fields={
+            "title": magazine.title,
+            "issue_number": magazine.issue_number,
+            "description": magazine.description,
+        },
+        published=bool(magazine.is_published),
+        pages=pages,
+    )
+
+
+# Matching page numbers reported per hit, best first
+MAX_PAGES_PER_HIT = 5
+
+
+@dataclass
+class SearchHits:
+    total: int
+    ids: list[int] = field(default_factory=list)
+    scores: list[float] = field(default_factory=list)
+    pages: dict[int, list[int]] = field(default_factory=dict)  # 1-based page numbers matching the query
+
+
+class InvertedIndex:
+    """In-memory inverted index with BM25 scoring over weighted term frequencies.
+
+    Postings are ``term -> {doc id: weighted tf}``, so scoring a query touches only the postings of its
+    terms. Document ids may be any hashable key.
+    """
+
+    COMMON_TERM_RATIO = 0.05
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[Hashable, int]] = {}
+        self._doc_terms: dict[Hashable, dict[str, int]] = {}
+        self._doc_len: dict[Hashable, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: Hashable, weighted_tokens: Iterable[tuple[str, int]]) -> None:
+        self.remove(doc_id)
+        terms: dict[str, int] = {}
+        for token, weight in weighted_tokens:
+            terms[token] = terms.get(token, 0) + weight
+        length = sum(terms.values())
+        if not length:
+            return
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._doc_terms[doc_id] = terms
+        self._doc_len[doc_id] = length
+        self._total_len += length
+
+    def remove(self, doc_id: Hashable) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_len.clear()
+        self._total_len = 0
+
+    def scores(
+        self,
+        terms: Iterable[str],
+        wanted: int | None = None,
+        include: Callable[[Hashable], bool] | None = None,
+    ) -> dict[Hashable, float]:
+        """BM25 score of the documents containing ``terms`` (only those passing ``include``, if given).
+
+        Terms are scored rarest first. With ``wanted`` set, a very common term (in more than
+        ``COMMON_TERM_RATIO`` of documents) that would be reached once at least ``wanted`` candidates exist
+        only adds to those candidates instead of pulling in its whole posting list: documents matching
+        nothing but a near-stopword could not outrank them anyway, and skipping them keeps query time
+        proportional to the rare terms. The result then holds the top ``wanted`` documents but not every
+        match; ``matching`` gives those.
+        """
+        n = len(self._doc_len)
+        if not n:
+            return {}
+        postings = sorted(
+            (posting for posting in map(self._postings.get, set(terms)) if posting), key=len
+        )
+        k1, b = self.k1, self.b
+        avg_len = self._total_len / n
+        doc_len = self._doc_len
+        scores: dict[Hashable, float] = {}
+        for posting in postings:
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            if wanted is not None and len(scores) >= wanted and len(posting) > n * self.COMMON_TERM_RATIO:
+                items = [(doc_id, posting[doc_id]) for doc_id in scores if doc_id in posting]
+            elif include is not None:
+                items = [(doc_id, tf) for doc_id, tf in posting.items() if include(doc_id)]
+            else:
+                items = posting.items()  # type: ignore[assignment]
+            for doc_id, tf in items:
+                norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+    def matching(self, terms: Iterable[str]) -> set[Hashable]:
+        """Every document containing any of ``terms``."""
+        return set().union(*(posting.keys() for posting in map(self._postings.get, set(terms)) if posting))
+
+
+class SearchBackend(Protocol):
+    index_pages: bool
+
+    async def index(self, docs: Iterable[SearchDocument]) -> None:
+        ...
+
+    async def remove(self, doc_id: int) -> None:
+        ...
+
+    async def search(self, q: str, offset: int, limit: int, published_only: bool = True) -> SearchHits:
+        ...
+
+    async def rebuild(self, batches: AsyncIterator[list[SearchDocument]]) -> int:
+        ...
+
+
+class MemorySearchBackend:
+    """Per-process index; fine for a single worker or development. Multi-worker deployments should use
+    Elasticsearch, since create/update events only reach the worker that handled the write.
+
+    Page text is only indexed with ``index_pages``: every worker would otherwise hold the text of the whole
+    library in memory.
+    """
+
+    name = "memory"
+
+    def __init__(self, index_pages: bool = False) -> None:
+        self.index_pages = index_pages
+        self.index_ = InvertedIndex()
+        self.pages = InvertedIndex()  # keyed by (magazine id, page number)
+        self._page_counts: dict[int, int] = {}
+        self._published: set[int] = set()
+
+    def _set_pages(self, doc_id: int, pages: list[str]) -> None:
+        for number in range(1, self._page_counts.pop(doc_id, 0) + 1):
+            self.pages.remove((doc_id, number))
+        for number, text in enumerate(pages, start=1):
+            self.pages.add((doc_id, number), ((token, 1) for token in tokenize(text)))
+        if pages:
+            self._page_counts[doc_id] = len(pages)
+
+    def _add(self, doc: SearchDocument) -> None:
+        weighted = (
+            (token, FIELD_WEIGHTS.get(name, 1)) for name, text in doc.fields.items() for token in tokenize(text)
+        )
+        self.index_.add(doc.id, weighted)
+        if self.index_pages and doc.pages is not None:
+            self._set_pages(doc.id, doc.pages)
+        if doc.published:
+            self._published.add(doc.id)
+        else:
+            self._published.discard(doc.id)
+
+    async def index(self, docs: Iterable[SearchDocument]) -> None:
+        for doc in docs:
+            self._add(doc)
+
+    async def remove(self, doc_id: int) -> None:
+        self.index_.remove(doc_id)
+        self._set_pages(doc_id, [])
+        self._published.discard(doc_id)
+
+    async def search(self, q: str, offset: int, limit: int, published_only: bool = True) -> SearchHits:
+        terms = tokenize(q)
+        wanted = offset + limit
+        # Unpublished magazines are skipped while scoring, so pruning never fills a page with them
+        published = self._published
+        include = published.__contains__ if published_only else None
+        include_page = (lambda key: key[0] in published) if published_only else None
+        scores = self.index_.scores(terms, wanted=wanted, include=include)
+        # A magazine scores its metadata match plus its best matching page
+        page_hits: dict[int, list[tuple[float, int]]] = {}
+        page_scores = self.pages.scores(terms, wanted=wanted * MAX_PAGES_PER_HIT, include=include_page)
+        for (doc_id, number), score in page_scores.items():
+            page_hits.setdefault(doc_id, []).append((score, number))
+        for doc_id, hits in page_hits.items():
+            scores[doc_id] = scores.get(doc_id, 0.0) + max(hits)[0]
+        # Counted apart from the (pruned) scores, so the total is exact and the same on every page
+        matched = self.index_.matching(terms) | {doc_id for doc_id, _ in self.pages.matching(terms)}
+        if published_only:
+            matched &= published
+        # Ties broken by newest id so paging is stable
+        top = heapq.nlargest(wanted, scores.items(), key=lambda item: (item[1], item[0]))[offset:]
+        pages = {
+            doc_id: [number for _, number in heapq.nlargest(MAX_PAGES_PER_HIT, page_hits[doc_id])]
+            for doc_id, _ in top
+            if doc_id in page_hits
+        }
+        return SearchHits(
+            total=len(matched), ids=[doc_id for doc_id, _ in top], scores=[s for _, s in top], pages=pages
+        )
+
+    async def rebuild(self, batches: AsyncIterator[list[SearchDocument]]) -> int:
+        fresh = MemorySearchBackend(index_pages=self.index_pages)
+        count = 0
+        async for batch in batches:
+            await fresh.index(batch)
+            count += len(batch)
+        # Swap at the end so queries keep hitting the old index while the new one is built
+        self.index_, self.pages = fresh.index_, fresh.pages
+        self._page_counts, self._published = fresh._page_counts, fresh._published
+        return count
+
+
+class ElasticsearchSearchBackend:
+    """Index in Elasticsearch at ELASTICSEARCH_URL using the built-in ``cjk`` (bigram) analyzer and BM25."""
+
+    name = "elasticsearch"
+    index_pages = True
+
+    MAPPINGS = {
+        "properties": {
+            "title": {"type": "text", "analyzer": "cjk"},
+            "issue_number": {"type": "text", "analyzer": "cjk"},
+            "description": {"type": "text", "analyzer": "cjk"},
+            "published": {"type": "boolean"},
+            "pages": {
+                "type": "nested",
+                "properties": {"number": {"type": "integer"}, "text": {"type": "text", "analyzer": "cjk"}},
+            },
+        }
+    }
+
+    def __init__(self, client: Any = None, index_name: str | None = None) -> None:
+        if client is None:
+            from elasticsearch import AsyncElasticsearch  # type: ignore
+
+            client = AsyncElasticsearch(settings.ELASTICSEARCH_URL)
+        self.client = client
+        self.index_name = index_name or settings.SEARCH_INDEX_NAME
+        self._index_checked = False
+
+    async def _ensure_index(self) -> None:
+        # Without this the first incremental write would auto-create the index with dynamic mappings
+        if not self._index_checked:
+            if not await self.client.indices.exists(index=self.index_name):
+                await self.client.indices.create(index=self.index_name, mappings=self.MAPPINGS)
+            self._index_checked = True
+
+    async def index(self, docs: Iterable[SearchDocument]) -> None:
+        await self._ensure_index()
+        operations: list[dict[str, Any]] = []
+        for doc in docs:
+            source: dict[str, Any] = {**doc.fields, "published": doc.published}
+            if doc.pages is None:
+                # Metadata-only change: partial update keeps the indexed pages
+                operations.append({"update": {"_index": self.index_name, "_id": str(doc.id)}})
+                operations.append({"doc": source, "doc_as_upsert": True})
+            else:
+                source["pages"] = [{"number": n, "text": text} for n, text in enumerate(doc.pages, start=1) if text]
+                operations.append({"index": {"_index": self.index_name, "_id": str(doc.id)}})
+                operations.append(source)
+        if operations:
+            await self.client.bulk(operations=operations)
+
+    async def remove(self, doc_id: int) -> None:
+        await self.client.options(ignore_status=404).delete(index=self.index_name, id=str(doc_id))
+
+    async def search(self, q: str, offset: int, limit: int, published_only: bool = True) -> SearchHits:
+        query: dict[str, Any] = {
+            "bool": {
+                "should": [
+                    {
+                        "multi_match": {
+                            "query": q,
+                            "fields": [f"{name}^{weight}" for name, weight in FIELD_WEIGHTS.items()],
+                        }
+                    },
+                    {
+                        "nested": {
+                            "path": "pages",
+                            "query": {"match": {"pages.text": q}},
+                            "score_mode": "max",
+                            "inner_hits": {"size": MAX_PAGES_PER_HIT, "_source": ["pages.number"]},
+                        }
+                    },
+                ],
+                "minimum_should_match": 1,
+                "filter": [{"term": {"published": True}}] if published_only else [],
+            }
+        }
+        result = await self.client.search(
+            index=self.index_name, query=query, from_=offset, size=limit, source=False, track_total_hits=True
+        )
+        hits = result["hits"]
+        pages = {}
+        for h in hits["hits"]:
+            inner = h.get("inner_hits", {}).get("pages", {}).get("hits", {}).get("hits", [])
+            if inner:
+                pages[int(h["_id"])] = [p["_source"]["number"] for p in inner]
+        return SearchHits(
+            total=hits["total"]["value"],
+            ids=[int(h["_id"]) for h in hits["hits"]],
+            scores=[float(h["_score"]) for h in hits["hits"]],
+            pages=pages,
+        )
+
+    async def rebuild(self, batches: AsyncIterator[list[SearchDocument]]) -> int:
+        # Build a fresh physical index, then move the alias so searches never see a half-built index
+        alias = self.index_name
+        physical = f"{alias}-{int(time.time())}"
+        await self.client.indices.create(index=physical, mappings=self.MAPPINGS)
+        writer = ElasticsearchSearchBackend(client=self.client, index_name=physical)
+        count = 0
+        async for batch in batches:
+            await writer.index(batch)
+            count += len(batch)
+        await self.client.indices.refresh(index=physical)
+        actions: list[dict[str, Any]] = [{"add": {"index": physical, "alias": alias}}]
+        old: list[str] = []
+        if await self.client.indices.exists_alias(name=alias):
+            old = list(await self.client.indices.get_alias(name=alias))
+            actions = [{"remove": {"index": name, "alias": alias}} for name in old] + actions
+        elif await self.client.indices.exists(index=alias):
+            # A concrete index from before aliases were used; it has to go for the alias to take its name
+            await self.client.indices.delete(index=alias)
+        await self.client.indices.update_aliases(actions=actions)
+        for name in old:
+            await self.client.options(ignore_status=404).indices.delete(index=name)
+        return count
+
+
+_search_backend: SearchBackend | None = None
+
+
+def get_search_backend() -> SearchBackend:
+    global _search_backend
+    if _search_backend is None:
+        if settings.SEARCH_BACKEND == "elasticsearch":
+            _search_backend = ElasticsearchSearchBackend()
+        else:
+            _search_backend = MemorySearchBackend(index_pages=settings.SEARCH_MEMORY_PAGES)
+    return _search_backend
+
+
+async def index_magazine(magazine: Magazine, pages: list[str] | None = None) -> None:
+    """Incremental update from a magazine write; indexing failures never fail the write.
+
+    ``pages`` replaces the indexed page text; ``None`` leaves it as it is.
+    """
+    try:
+        await get_search_backend().index([document_for_magazine(magazine, pages)])
+    except Exception:
+        metrics.incr("search_index_errors")
+
+
+async def iter_magazine_documents(
+    db: AsyncSession, batch_size: int = 1000, with_pages: bool = True
+) -> AsyncIterator[list[SearchDocument]]:
+    """All magazines as search documents, read in id-keyset batches (page texts only ``with_pages``)."""
+    last_id = 0
+    while True:
+        stmt = select(Magazine).where(Magazine.id > last_id).order_by(Magazine.id).limit(batch_size)
+        magazines = (await db.execute(stmt)).scalars().all()
+        if not magazines:
+            return
+        last_id = magazines[-1].id
+        if not with_pages:
+            yield [document_for_magazine(m) for m in magazines]
+            db.expunge_all()
+            continue
+        pages: dict[int, list[str]] = {m.id: [] for m in magazines}
+        rows = await db.execute(
+            select(MagazinePageText.magazine_id, MagazinePageText.page_number, MagazinePageText.text)
+            .where(MagazinePageText.magazine_id.in_(pages))
+            .order_by(MagazinePageText.magazine_id, MagazinePageText.page_number)
+        )
+        for magazine_id, number, text in rows:
+            texts = pages[magazine_id]
+            texts.extend([""] * (number - 1 - len(texts)))
+            texts.append(text or "")
+        yield [document_for_magazine(m, pages[m.id]) for m in magazines]
+        db.expunge_all()
+
+
+async def rebuild_search_index(db: AsyncSession) -> int:
+    backend = get_search_backend()
+    return await backend.rebuild(iter_magazine_documents(db, with_pages=backend.index_pages))
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+BlockKey = tuple[int, str, int]  # (magazine_id, file_path, block index)
+
+
+class DecryptedSegmentCache:
+    """Bounded LRU cache of decrypted plaintext blocks, keyed by magazine id, file_path version and block index.
+
+    Blocks evicted from memory spill to ``spill_dir`` (meant to be a tmpfs path) when configured, which has its
+    own LRU size cap. File metadata (plaintext size, segment layout) is cached alongside so a fully cached
+    issue is served without touching storage or AES. Because file_path changes on every upload, stale
+    entries are never served; ``invalidate`` just frees their space early.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        block_size: int,
+        spill_dir: str = "",
+        spill_max_bytes: int = 0,
+        max_files: int = 1024,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes if spill_dir else 0
+        self.max_files = max_files
+        self._blocks: OrderedDict[BlockKey, bytes] = OrderedDict()
+        self._spilled: OrderedDict[BlockKey, int] = OrderedDict()
+        # Blocks put with spill=False (sensitive issues): kept in memory only, even once evicted
+        self._no_spill: set[BlockKey] = set()
+        self._files: OrderedDict[tuple[int, str], Any] = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if self.spill_max_bytes:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    # file metadata -------------------------------------------------------
+
+    def get_file(self, magazine_id: int, file_path: str) -> Any | None:
+        key = (magazine_id, file_path)
+        meta = self._files.get(key)
+        if meta is not None:
+            self._files.move_to_end(key)
+        return meta
+
+    def put_file(self, magazine_id: int, file_path: str, meta: Any) -> None:
+        self._files[(magazine_id, file_path)] = meta
+        self._files.move_to_end((magazine_id, file_path))
+        while len(self._files) > self.max_files:
+            self._files.popitem(last=False)
+
+    # blocks --------------------------------------------------------------
+
+    def _spill_path(self, key: BlockKey) -> str:
+        magazine_id, file_path, index = key
+        version = sha256(file_path.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.spill_dir, f"{magazine_id}-{version}-{index}.blk")
+
+    def get(self, magazine_id: int, file_path: str, index: int) -> bytes | None:
+        key = (magazine_id, file_path, index)
+        data = self._blocks.get(key)
+        if data is not None:
+            self._blocks.move_to_end(key)
+            self._record_hit(len(data), "memory")
+            return data
+        if key in self._spilled:
+            try:
+                with open(self._spill_path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                self._drop_spilled(key)
+            else:
+                self._spilled.move_to_end(key)
+                self._record_hit(len(data), "disk")
+                return data
+        self.record_miss()
+        return None
+
+    def contains(self, magazine_id: int, file_path: str, index: int) -> bool:
+        key = (magazine_id, file_path, index)
+        return key in self._blocks or key in self._spilled
+
+    def record_miss(self, count: int = 1) -> None:
+        self.misses += count
+        metrics.incr("segment_cache_misses", count)
+
+    def put(self, magazine_id: int, file_path: str, index: int, data: bytes, spill: bool = True) -> None:
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        key = (magazine_id, file_path, index)
+        if key in self._blocks:
+            return
+        self._blocks[key] = data
+        if not spill:
+            self._no_spill.add(key)
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_bytes:
+            old_key, old = self._blocks.popitem(last=False)
+            self.memory_bytes -= len(old)
+            metrics.incr("segment_cache_evictions", tier="memory")
+            if old_key in self._no_spill:
+                self._no_spill.discard(old_key)
+            elif self.spill_max_bytes and old_key not in self._spilled:
+                self._spill(old_key, old)
+        self._publish()
+
+    def _spill(self, key: BlockKey, data: bytes) -> None:
+        if len(data) > self.spill_max_bytes:
+            return
+        path = self._spill_path(key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._spilled[key] = len(data)
+        self.disk_bytes += len(data)
+        while self.disk_bytes > self.spill_max_bytes:
+            old_key = next(iter(self._spilled))
+            self._drop_spilled(old_key)
+            metrics.incr("segment_cache_evictions", tier="disk")
+
+    def _drop_spilled(self, key: BlockKey) -> None:
+        size = self._spilled.pop(key, None)
+        if size is None:
+            return
+        self.disk_bytes -= size
+        try:
+            os.remove(self._spill_path(key))
+        except OSError:
+            pass
+
+    def invalidate(self, magazine_id: int) -> None:
+        """Drop every cached block and metadata entry of a magazine, whatever its file version."""
+        for key in [k for k in self._blocks if k[0] == magazine_id]:
+            self.memory_bytes -= len(self._blocks.pop(key))
+            self._no_spill.discard(key)
+        for key in [k for k in self._spilled if k[0] == magazine_id]:
+            self._drop_spilled(key)
+        for key in [k for k in self._files if k[0] == magazine_id]:
+            del self._files[key]
+        self._publish()
+
+    def clear(self) -> None:
+        for key in list(self._spilled):
+            self._drop_spilled(key)
+        self._blocks.clear()
+        self._no_spill.clear()
+        self._files.clear()
+        self.memory_bytes = 0
+        self._publish()
+
+    def _record_hit(self, size: int, tier: str) -> None:
+        self.hits += 1
+        metrics.incr("segment_cache_hits", tier=tier)
+        metrics.incr("segment_cache_hit_bytes", size, tier=tier)
+
+    def _publish(self) -> None:
+        metrics.set_gauge("segment_cache_bytes", self.memory_bytes, tier="memory")
+        metrics.set_gauge("segment_cache_bytes", self.disk_bytes, tier="disk")
+        metrics.set_gauge("segment_cache_blocks", len(self._blocks), tier="memory")
+        metrics.set_gauge("segment_cache_blocks", len(self._spilled), tier="disk")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "memory_blocks": len(self._blocks),
+            "disk_blocks": len(self._spilled),
+        }
+
+
+segment_cache = DecryptedSegmentCache(
+    max_bytes=settings.FILE_CACHE_MAX_BYTES,
+    block_size=settings.FILE_CACHE_BLOCK_SIZE,
+    spill_dir=settings.FILE_CACHE_SPILL_DIR,
+    spill_max_bytes=settings.FILE_CACHE_SPILL_MAX_BYTES,
+)
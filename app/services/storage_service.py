@@ -1,13 +1,65 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Protocol
+from typing import Any, AsyncIterator, BinaryIO, Callable, Protocol, TypeVar
 
 import oss2  # type: ignore
+from oss2.models import PartInfo  # type: ignore
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ingest_service import staging_dir
+from app.utils.security import create_signed_url
+
+T = TypeVar("T")
+
+_io_executor: ThreadPoolExecutor | None = None
+_io_pending = 0
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    # Created lazily so forked workers each get their own threads
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=settings.STORAGE_IO_THREADS, thread_name_prefix="storage-io")
+    return _io_executor
+
+
+async def run_io(backend: str, op: str, fn: Callable[..., T], *args: Any) -> T:
+    """Run a blocking storage call on the bounded storage I/O pool instead of the event loop.
+
+    Records queue depth, time spent waiting for a free thread and call latency per backend operation.
+    """
+    global _io_pending
+    queued_at = time.perf_counter()
+
+    def call() -> T:
+        started = time.perf_counter()
+        metrics.observe("storage_io_wait_seconds", started - queued_at, backend=backend, op=op)
+        try:
+            return fn(*args)
+        finally:
+            metrics.observe("storage_io_seconds", time.perf_counter() - started, backend=backend, op=op)
+
+    _io_pending += 1
+    metrics.set_gauge("storage_io_queue_depth", _io_pending)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_io_executor(), call)
+    except Exception:
+        metrics.incr("storage_io_errors", backend=backend, op=op)
+        raise
+    finally:
+        _io_pending -= 1
+        metrics.set_gauge("storage_io_queue_depth", _io_pending)
 
 
 @dataclass
@@ -20,39 +72,123 @@ class StorageBackend(Protocol):
     async def upload(self, path: str, data: bytes) -> str:  # returns storage path or url
         ...
 
+    async def upload_stream(
+        self, path: str, chunks: AsyncIterator[bytes], resume_key: str | None = None
+    ) -> str:  # resume_key: see OSSStorageBackend.upload_stream
+        ...
+
     async def download(self, path: str) -> bytes:
         ...
 
+    async def download_range(self, path: str, offset: int, length: int) -> bytes:
+        ...
+
+    def download_stream(
+        self, path: str, offset: int = 0, length: int | None = None, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        ...
+
     async def generate_temp_link(self, path: str, expires_seconds: int | None = None) -> TempLink:
         ...
 
 
 class LocalStorageBackend:
+    name = "local"
+
     def __init__(self, base_dir: str) -> None:
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
 
-    async def upload(self, path: str, data: bytes) -> str:
-        full_path = os.path.join(self.base_dir, path)
+    def _write_file(self, full_path: str, data: bytes) -> None:
         os.makedirs(os.path.dirname(full_path), exist_ok=True)
         with open(full_path, "wb") as f:
             f.write(data)
+
+    def _open_part(self, part_path: str) -> BinaryIO:
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        return open(part_path, "wb")
+
+    @staticmethod
+    def _discard(part_path: str) -> None:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    def _read_file(self, full_path: str, offset: int = 0, length: int = -1) -> bytes:
+        with open(full_path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    async def upload(self, path: str, data: bytes) -> str:
+        await run_io(self.name, "upload", self._write_file, os.path.join(self.base_dir, path), data)
+        return path
+
+    async def upload_stream(self, path: str, chunks: AsyncIterator[bytes], resume_key: str | None = None) -> str:
+        full_path = os.path.join(self.base_dir, path)
+        # Append into a sibling temp file and rename at the end so readers never see a partial object
+        part_path = full_path + ".part"
+        try:
+            f = await run_io(self.name, "upload_stream.open", self._open_part, part_path)
+            try:
+                async for chunk in chunks:
+                    await run_io(self.name, "upload_stream.write", f.write, chunk)
+            finally:
+                await run_io(self.name, "upload_stream.close", f.close)
+            await run_io(self.name, "upload_stream.commit", os.replace, part_path, full_path)
+        except BaseException:
+            await run_io(self.name, "upload_stream.abort", self._discard, part_path)
+            raise
         return path
 
     async def download(self, path: str) -> bytes:
+        return await run_io(self.name, "download", self._read_file, os.path.join(self.base_dir, path))
+
+    async def download_range(self, path: str, offset: int, length: int) -> bytes:
         full_path = os.path.join(self.base_dir, path)
-        with open(full_path, "rb") as f:
-            return f.read()
+        return await run_io(self.name, "download_range", self._read_file, full_path, offset, length)
+
+    async def download_stream(
+        self, path: str, offset: int = 0, length: int | None = None, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        chunk_size = chunk_size or settings.STORAGE_CHUNK_SIZE
+        full_path = os.path.join(self.base_dir, path)
+        f = await run_io(self.name, "download_stream.open", open, full_path, "rb")
+        try:
+            await run_io(self.name, "download_stream.seek", f.seek, offset)
+            remaining = length
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await run_io(self.name, "download_stream.read", f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_io(self.name, "download_stream.close", f.close)
+
+    def local_path(self, path: str) -> str:
+        return os.path.join(self.base_dir, path)
 
     async def generate_temp_link(self, path: str, expires_seconds: int | None = None) -> TempLink:
-        # For local, we just return a file path reference; serving should be handled by an API endpoint.
-        if expires_seconds is None:
-            expires_seconds = settings.TEMP_URL_EXPIRES_SECONDS
-        return TempLink(url=f"local://{path}", expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_seconds))
+        # Served by the signed /files/objects endpoint, the local counterpart of an OSS signed URL
+        url, expires_at = create_signed_url(f"/files/objects/{path}", expires_seconds)
+        return TempLink(url=url, expires_at=expires_at)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, oss2.exceptions.RequestError):
+        return True
+    return isinstance(exc, oss2.exceptions.ServerError) and (exc.status >= 500 or exc.status == 429)
 
 
 class OSSStorageBackend:
-    def __init__(self) -> None:
+    name = "oss"
+
+    def __init__(self, bucket: Any | None = None) -> None:
+        if bucket is not None:
+            # Injected bucket (e.g. app.testing.fake_oss.FakeBucket)
+            self.bucket = bucket
+            return
         if not all(
             [
                 settings.OSS_ENDPOINT,
@@ -65,16 +201,214 @@ class OSSStorageBackend:
         auth = oss2.Auth(settings.OSS_ACCESS_KEY_ID, settings.OSS_ACCESS_KEY_SECRET)
         self.bucket = oss2.Bucket(auth, settings.OSS_ENDPOINT, settings.OSS_BUCKET)
 
+    def _get_bytes(self, path: str, byte_range: tuple[int, int] | None = None) -> bytes:
+        result = self.bucket.get_object(path, byte_range=byte_range)
+        try:
+            return result.read()
+        finally:
+            result.close()
+
     async def upload(self, path: str, data: bytes) -> str:
-        self.bucket.put_object(path, data)
+        await self._with_retries("upload", self.bucket.put_object, path, data)
+        return path
+
+    async def _with_retries(self, op: str, fn: Callable[..., T], *args: Any) -> T:
+        attempt = 0
+        while True:
+            try:
+                return await run_io(self.name, op, fn, *args)
+            except Exception as e:
+                if attempt >= settings.OSS_RETRIES or not _is_retryable(e):
+                    raise
+                metrics.incr("oss_retries", op=op)
+                await asyncio.sleep(settings.OSS_RETRY_BACKOFF_SECONDS * (2**attempt))
+                attempt += 1
+
+    # Multipart checkpoints ------------------------------------------------
+    # A checkpoint records the upload id and the md5/etag of every finished part of an in-progress multipart
+    # upload, so re-running upload_stream with the same resume_key, path and bytes resumes where it failed.
+
+    def _checkpoint_path(self, resume_key: str) -> str:
+        name = hashlib.sha256(resume_key.encode("utf-8")).hexdigest()
+        # Default next to the staged uploads they resume: both only help a worker on the same host
+        directory = settings.OSS_CHECKPOINT_DIR or os.path.join(staging_dir(), "oss-checkpoints")
+        return os.path.join(directory, f"{name}.json")
+
+    def _load_checkpoint(self, resume_key: str) -> dict[str, Any] | None:
+        try:
+            with open(self._checkpoint_path(resume_key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_checkpoint(self, resume_key: str, payload: str) -> None:
+        target = self._checkpoint_path(resume_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target + ".tmp", "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(target + ".tmp", target)
+
+    def _remove_checkpoint(self, resume_key: str) -> None:
+        try:
+            os.remove(self._checkpoint_path(resume_key))
+        except OSError:
+            pass
+
+    async def _abort_upload(self, path: str, upload_id: str) -> None:
+        try:
+            await run_io(self.name, "abort_multipart_upload", self.bucket.abort_multipart_upload, path, upload_id)
+        except Exception:
+            # Best effort: a bucket lifecycle rule for incomplete multipart uploads is the backstop
+            metrics.incr("oss_abort_errors")
+
+    async def _resume_checkpoint(self, resume_key: str, path: str, part_size: int) -> dict[str, Any] | None:
+        checkpoint = await run_io(self.name, "checkpoint.load", self._load_checkpoint, resume_key)
+        if checkpoint is None:
+            return None
+        if checkpoint.get("path") == path and checkpoint.get("part_size") == part_size:
+            try:
+                await run_io(self.name, "list_parts", self.bucket.list_parts, path, checkpoint["upload_id"], "", 1)
+                return checkpoint
+            except oss2.exceptions.NoSuchUpload:
+                # Expired or aborted on the server: start over
+                metrics.incr("oss_checkpoints_expired")
+        else:
+            await self._abort_upload(checkpoint["path"], checkpoint["upload_id"])
+        await run_io(self.name, "checkpoint.remove", self._remove_checkpoint, resume_key)
+        return None
+
+    async def upload_stream(self, path: str, chunks: AsyncIterator[bytes], resume_key: str | None = None) -> str:
+        """Multipart upload with up to OSS_UPLOAD_CONCURRENCY parts in flight.
+
+        Memory is bounded by (concurrency + 1) * OSS_MULTIPART_PART_SIZE. Failed parts are retried with
+        backoff. A failed upload is aborted, unless the caller passes a ``resume_key`` it will retry with:
+        then it is left open and the next call with that key, path and bytes resumes it, skipping parts
+        that already made it.
+        """
+        part_size = settings.OSS_MULTIPART_PART_SIZE
+        resumable = bool(resume_key)
+        checkpoint = None
+        if resume_key and resumable:
+            checkpoint = await self._resume_checkpoint(resume_key, path, part_size)
+        if checkpoint is None:
+            upload = await self._with_retries("init_multipart_upload", self.bucket.init_multipart_upload, path)
+            checkpoint = {"path": path, "part_size": part_size, "upload_id": upload.upload_id, "parts": {}}
+        upload_id = checkpoint["upload_id"]
+        slots = asyncio.Semaphore(settings.OSS_UPLOAD_CONCURRENCY)
+        checkpoint_lock = asyncio.Lock()
+        tasks: list[asyncio.Task[PartInfo]] = []
+
+        async def send(part_number: int, data: bytes) -> PartInfo:
+            try:
+                if not resumable:
+                    return await self._upload_part(path, upload_id, part_number, data)
+                return await self._upload_part(
+                    path, upload_id, part_number, data, checkpoint, checkpoint_lock, resume_key
+                )
+            finally:
+                slots.release()
+
+        async def submit(data: bytes) -> None:
+            await slots.acquire()
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    slots.release()
+                    raise task.exception()  # type: ignore[misc]
+            tasks.append(asyncio.create_task(send(len(tasks) + 1, data)))
+
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    await submit(bytes(buffer[:part_size]))
+                    del buffer[:part_size]
+            if buffer or not tasks:
+                await submit(bytes(buffer))
+            parts = list(await asyncio.gather(*tasks))
+            await self._with_retries(
+                "complete_multipart_upload", self.bucket.complete_multipart_upload, path, upload_id, parts
+            )
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if not resumable or isinstance(e, oss2.exceptions.NoSuchUpload):
+                # Nothing to resume: drop the upload and its checkpoint rather than leave them behind
+                await self._abort_upload(path, upload_id)
+                if resumable:
+                    await run_io(self.name, "checkpoint.remove", self._remove_checkpoint, resume_key)
+            raise
+        if resumable:
+            await run_io(self.name, "checkpoint.remove", self._remove_checkpoint, resume_key)
         return path
 
+    async def _upload_part(
+        self,
+        path: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+        checkpoint: dict[str, Any] | None = None,
+        checkpoint_lock: asyncio.Lock | None = None,
+        resume_key: str | None = None,
+    ) -> PartInfo:
+        digest = hashlib.md5(data).hexdigest()
+        if checkpoint is not None:
+            done = checkpoint["parts"].get(str(part_number))
+            if done and done["md5"] == digest:
+                metrics.incr("oss_parts_resumed")
+                return PartInfo(part_number, done["etag"], size=len(data))
+        result = await self._with_retries("upload_part", self.bucket.upload_part, path, upload_id, part_number, data)
+        metrics.incr("oss_bytes_uploaded", len(data))
+        if checkpoint is not None and checkpoint_lock is not None and resume_key is not None:
+            checkpoint["parts"][str(part_number)] = {"md5": digest, "etag": result.etag}
+            # One writer at a time, and serialise on the loop since other parts keep mutating the dict
+            async with checkpoint_lock:
+                await run_io(
+                    self.name, "checkpoint.save", self._save_checkpoint, resume_key, json.dumps(checkpoint)
+                )
+        return PartInfo(part_number, result.etag, size=len(data))
+
     async def download(self, path: str) -> bytes:
-        result = self.bucket.get_object(path)
+        return b"".join([chunk async for chunk in self.download_stream(path)])
+
+    async def download_range(self, path: str, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        return await self._with_retries("download_range", self._get_bytes, path, (offset, offset + length - 1))
+
+    async def download_stream(
+        self, path: str, offset: int = 0, length: int | None = None, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Parallel ranged GETs: up to OSS_DOWNLOAD_CONCURRENCY parts are fetched ahead and yielded in order."""
+        chunk_size = chunk_size or settings.STORAGE_CHUNK_SIZE
+        if length is None:
+            head = await self._with_retries("head_object", self.bucket.head_object, path)
+            length = max(0, int(head.content_length) - offset)
+        if length <= 0:
+            return
+        part_size = settings.OSS_DOWNLOAD_PART_SIZE
+        spans = [(start, min(start + part_size, offset + length)) for start in range(offset, offset + length, part_size)]
+        window = max(1, settings.OSS_DOWNLOAD_CONCURRENCY)
+        pending: list[asyncio.Task[bytes]] = []
         try:
-            return result.read()
+            for start, stop in spans[:window]:
+                pending.append(asyncio.create_task(self.download_range(path, start, stop - start)))
+            next_span = len(pending)
+            while pending:
+                data = await pending.pop(0)
+                if next_span < len(spans):
+                    start, stop = spans[next_span]
+                    pending.append(asyncio.create_task(self.download_range(path, start, stop - start)))
+                    next_span += 1
+                metrics.incr("oss_bytes_downloaded", len(data))
+                for i in range(0, len(data), chunk_size):
+                    yield data[i : i + chunk_size]
         finally:
-            result.close()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
     async def generate_temp_link(self, path: str, expires_seconds: int | None = None) -> TempLink:
         if expires_seconds is None:
@@ -83,7 +417,245 @@ class OSSStorageBackend:
         return TempLink(url=signed_url, expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_seconds))
 
 
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+class DiskLRU:
+    """Size-capped LRU index over the files of one directory, each named by the sha256 of its key.
+
+    The index is rebuilt from the directory (oldest mtime first) on start-up and is per process; a file
+    removed by a sibling worker just shows up as a miss to the caller. Since every worker enforces
+    ``max_bytes`` on its own index, the directory can grow to about workers x ``max_bytes``.
+    """
+
+    # A fill writes to its temp file continuously; one untouched this long belongs to no live fill
+    TEMP_FILE_MAX_AGE_SECONDS = 600
+
+    def __init__(self, directory: str, max_bytes: int, metric_prefix: str) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.metric_prefix = metric_prefix
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and len(entry.name) == 64:
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+            elif entry.is_file() and ".tmp-" in entry.name and self._abandoned(entry):
+                try:
+                    os.remove(entry.path)  # leftover of an interrupted fill
+                except OSError:
+                    pass  # a sibling starting at the same time got there first
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._evict()
+
+    @classmethod
+    def _abandoned(cls, entry: os.DirEntry[str]) -> bool:
+        """Temp file of a fill that is no longer running: its worker is gone, or it stopped being written.
+
+        Workers share the directory and restart while siblings are filling, so live fills must be kept.
+        """
+        try:
+            pid = int(entry.name.rsplit(".tmp-", 1)[1].split("-", 1)[0])
+            age = time.time() - entry.stat().st_mtime
+        except (ValueError, IndexError, OSError):
+            return False
+        return not _pid_alive(pid) or age > cls.TEMP_FILE_MAX_AGE_SECONDS
+
+    @staticmethod
+    def name_for(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def temp_path(self, name: str) -> str:
+        return f"{self.path(name)}.tmp-{os.getpid()}-{id(self)}"
+
+    def touch(self, name: str) -> bool:
+        if name not in self._entries:
+            return False
+        self._entries.move_to_end(name)
+        return True
+
+    def add(self, name: str, size: int) -> None:
+        self.total_bytes += size - self._entries.pop(name, 0)
+        self._entries[name] = size
+        self._evict()
+
+    def forget(self, name: str) -> None:
+        self.total_bytes -= self._entries.pop(name, 0)
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                # Readers holding the file open keep working after the unlink
+                os.remove(self.path(name))
+            except OSError:
+                pass
+            metrics.incr(f"{self.metric_prefix}_evictions")
+        metrics.set_gauge(f"{self.metric_prefix}_bytes", self.total_bytes)
+
+
+class CachingStorageBackend:
+    """Read-through local disk tier in front of another backend (OSS in production).
+
+    Objects are stored under ``sha256(path)``; upload paths are unique and never overwritten, so the name
+    identifies the content. Files are filled atomically (temp file + rename), the tier is capped at
+    ``max_bytes`` with LRU eviction, and concurrent misses for the same path share a single fetch from the
+    inner backend. Objects larger than the whole tier are not kept and are read from the inner backend.
+    """
+
+    name = "cache"
+    OVERSIZED_MAX_ENTRIES = 4096  # paths remembered as too large to cache
+
+    def __init__(self, inner: StorageBackend, cache_dir: str, max_bytes: int) -> None:
+        self.inner = inner
+        self.lru = DiskLRU(cache_dir, max_bytes, "storage_cache")
+        self._local = LocalStorageBackend(cache_dir)
+        self._inflight: dict[str, asyncio.Future[str | None]] = {}
+        self._oversized: OrderedDict[str, None] = OrderedDict()
+
+    @property
+    def total_bytes(self) -> int:
+        return self.lru.total_bytes
+
+    async def _ensure_local(self, path: str) -> str | None:
+        """Cache file name for ``path``, or None when the read should go to the inner backend instead.
+
+        That is the case for objects too large for the tier and for fills whose temp file disappeared.
+        """
+        name = DiskLRU.name_for(path)
+        if name in self._oversized:
+            self._oversized.move_to_end(name)
+            metrics.incr("storage_cache_bypassed")
+            return None
+        if self.lru.touch(name):
+            metrics.incr("storage_cache_hits")
+            return name
+        fill = self._inflight.get(name)
+        if fill is None:
+            metrics.incr("storage_cache_misses")
+            fill = asyncio.ensure_future(self._fill(path, name))
+            self._inflight[name] = fill
+            fill.add_done_callback(lambda _: self._inflight.pop(name, None))
+        else:
+            metrics.incr("storage_cache_coalesced")
+        try:
+            # shield: a cancelled reader must not abort the fill other readers are waiting on
+            return await asyncio.shield(fill)
+        except FileNotFoundError:
+            metrics.incr("storage_cache_fill_errors")
+            return None
+
+    async def _fill(self, path: str, name: str) -> str | None:
+        target, tmp = self.lru.path(name), self.lru.temp_path(name)
+        size = 0
+        f = await run_io(self.name, "fill.open", open, tmp, "wb")
+        try:
+            try:
+                async with aclosing(self.inner.download_stream(path)) as chunks:
+                    async for chunk in chunks:
+                        size += len(chunk)
+                        if size > self.lru.max_bytes:
+                            break
+                        await run_io(self.name, "fill.write", f.write, chunk)
+            finally:
+                await run_io(self.name, "fill.close", f.close)
+            if size > self.lru.max_bytes:
+                # Keeping it would evict every other file and then itself
+                await run_io(self.name, "fill.abort", LocalStorageBackend._discard, tmp)
+                self._oversized[name] = None
+                while len(self._oversized) > self.OVERSIZED_MAX_ENTRIES:
+                    self._oversized.popitem(last=False)
+                metrics.incr("storage_cache_bypassed")
+                return None
+            await run_io(self.name, "fill.commit", os.replace, tmp, target)
+        except BaseException:
+            await run_io(self.name, "fill.abort", LocalStorageBackend._discard, tmp)
+            raise
+        metrics.incr("storage_cache_filled_bytes", size)
+        self.lru.add(name, size)
+        return name
+
+    async def _read(self, path: str, reader: Callable[[str], Any], origin: Callable[[], Any]) -> Any:
+        for _ in range(2):
+            name = await self._ensure_local(path)
+            if name is None:
+                break
+            try:
+                return await reader(name)
+            except FileNotFoundError:
+                # Evicted underneath us (e.g. by another worker): forget it and fetch again once
+                self.lru.forget(name)
+        return await origin()
+
+    async def upload(self, path: str, data: bytes) -> str:
+        return await self.inner.upload(path, data)
+
+    async def upload_stream(self, path: str, chunks: AsyncIterator[bytes], resume_key: str | None = None) -> str:
+        return await self.inner.upload_stream(path, chunks, resume_key)
+
+    async def download(self, path: str) -> bytes:
+        return await self._read(path, self._local.download, lambda: self.inner.download(path))
+
+    async def download_range(self, path: str, offset: int, length: int) -> bytes:
+        return await self._read(
+            path,
+            lambda name: self._local.download_range(name, offset, length),
+            lambda: self.inner.download_range(path, offset, length),
+        )
+
+    async def download_stream(
+        self, path: str, offset: int = 0, length: int | None = None, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        name = await self._ensure_local(path)
+        if name is not None:
+            async with aclosing(self._local.download_stream(name, offset, length, chunk_size)) as chunks:
+                try:
+                    first = await anext(chunks)  # opens the file
+                except StopAsyncIteration:
+                    return
+                except FileNotFoundError:
+                    # Evicted underneath us (e.g. by another worker): stream this read from the origin
+                    self.lru.forget(name)
+                else:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+                    return
+        async for chunk in self.inner.download_stream(path, offset, length, chunk_size):
+            yield chunk
+
+    async def generate_temp_link(self, path: str, expires_seconds: int | None = None) -> TempLink:
+        return await self.inner.generate_temp_link(path, expires_seconds)
+
+
+_storage_backend: StorageBackend | None = None
+
+
 def get_storage_backend() -> StorageBackend:
-    if settings.STORAGE_BACKEND == "oss":
-        return OSSStorageBackend()
-    return LocalStorageBackend(settings.LOCAL_STORAGE_DIR)
+    # Process-wide instance so the OSS client and the local cache tier (index, in-flight fills) are shared
+    global _storage_backend
+    if _storage_backend is None:
+        if settings.STORAGE_BACKEND == "oss":
+            backend: StorageBackend = OSSStorageBackend()
+            if settings.STORAGE_CACHE_DIR:
+                backend = CachingStorageBackend(backend, settings.STORAGE_CACHE_DIR, settings.STORAGE_CACHE_MAX_BYTES)
+            _storage_backend = backend
+        else:
+            _storage_backend = LocalStorageBackend(settings.LOCAL_STORAGE_DIR)
+    return _storage_backend
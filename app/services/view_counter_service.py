@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Callable
+
+from sqlalchemy import case, update
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.magazine import Magazine
+from app.services.scheduler_service import configured_timezone
+from app.utils.redis_kv import RedisKV
+
+
+class HyperLogLog:
+    """Approximate distinct counter in ``2 ** precision`` bytes (4 KiB and ~1.6% error at the default 12).
+
+    Uses the same estimator as Redis' PFCOUNT for the ranges that matter here (raw HLL with linear
+    counting for small cardinalities).
+    """
+
+    def __init__(self, precision: int = 12) -> None:
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item: str) -> None:
+        h = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: HyperLogLog) -> None:
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class ViewCounter:
+    """Buffered magazine view counts plus approximate unique viewers per issue per day.
+
+    ``record`` only touches memory (or Redis with ``redis`` set: HINCRBY into a pending hash shared by all
+    workers, PFADD into a per-issue-per-day HyperLogLog). A flusher task moves the pending increments to
+    ``magazines.view_count`` every ``flush_interval`` seconds with one UPDATE for the whole batch, so a
+    hot issue costs one row write per interval rather than one per view. Increments of a failed flush are
+    put back and retried on the next one.
+
+    Without Redis the unique-viewer sketch lives in this process, so it is only the full count when a
+    single worker serves the API. With Redis, viewers whose PFADD failed are kept (up to
+    ``UNSYNCED_VIEWERS_MAX``) and added to the shared HyperLogLog on the next flush; days are in ``tz``.
+    """
+
+    PENDING_KEY = "views:pending"
+    UNSYNCED_VIEWERS_MAX = 100_000
+
+    def __init__(
+        self,
+        flush_interval: float,
+        retention_days: int = 7,
+        redis: RedisKV | None = None,
+        session_factory: Callable[[], Any] | None = None,
+        tz: tzinfo = timezone.utc,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.redis = redis
+        self.session_factory = session_factory
+        self.tz = tz
+        self._pending: Counter[int] = Counter()
+        self._viewers: dict[tuple[date, int], HyperLogLog] = {}
+        self._unsynced: dict[tuple[date, int], set[str]] = {}
+        self._unsynced_count = 0
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._loop is not loop:
+            self._loop = loop
+            self._task = asyncio.ensure_future(self._run())
+
+    def today(self) -> date:
+        return datetime.now(self.tz).date()
+
+    @staticmethod
+    def _viewers_key(magazine_id: int, day: date) -> str:
+        return f"views:unique:{day.isoformat()}:{magazine_id}"
+
+    async def record(self, magazine_id: int, viewer: str) -> None:
+        """Count one view of ``magazine_id``; ``viewer`` identifies the reader for the unique count."""
+        self._ensure_started()
+        day = self.today()
+        if self.redis is None:
+            self._pending[magazine_id] += 1
+            hll = self._viewers.get((day, magazine_id))
+            if hll is None:
+                hll = self._viewers[(day, magazine_id)] = HyperLogLog()
+            hll.add(viewer)
+            return
+        # Each step falls back on its own, so a view that reached Redis is never buffered here as well
+        try:
+            await self.redis.hincrby(self.PENDING_KEY, str(magazine_id))
+        except Exception:
+            metrics.incr("view_counter_errors")
+            self._pending[magazine_id] += 1
+        try:
+            await self.redis.pfadd(self._viewers_key(magazine_id, day), viewer, ex=self._viewers_ttl())
+        except Exception:
+            metrics.incr("view_counter_errors")
+            self._keep_unsynced(day, magazine_id, viewer)
+
+    async def unique_viewers(self, magazine_id: int, day: date | None = None) -> int | None:
+        """Approximate distinct viewers of ``magazine_id`` on ``day``; None while Redis is unreachable."""
+        day = day or self.today()
+        if self.redis is None:
+            hll = self._viewers.get((day, magazine_id))
+            return hll.count() if hll is not None else 0
+        try:
+            return await self.redis.pfcount(self._viewers_key(magazine_id, day))
+        except Exception:
+            metrics.incr("view_counter_errors")
+            return None
+
+    def _viewers_ttl(self) -> int:
+        return (self.retention_days + 1) * 86400
+
+    def _keep_unsynced(self, day: date, magazine_id: int, viewer: str) -> None:
+        viewers = self._unsynced.setdefault((day, magazine_id), set())
+        if viewer in viewers:
+            return
+        if self._unsynced_count >= self.UNSYNCED_VIEWERS_MAX:
+            metrics.incr("view_counter_viewers_dropped")
+            return
+        viewers.add(viewer)
+        self._unsynced_count += 1
+
+    async def _sync_viewers(self) -> None:
+        if self.redis is None:
+            return
+        for (day, magazine_id), viewers in list(self._unsynced.items()):
+            try:
+                await self.redis.pfadd(self._viewers_key(magazine_id, day), *viewers, ex=self._viewers_ttl())
+            except Exception:
+                metrics.incr("view_counter_errors")
+                return
+            del self._unsynced[(day, magazine_id)]
+            self._unsynced_count -= len(viewers)
+
+    def pending(self, magazine_id: int) -> int:
+        """Views of this worker not yet written to the database (approximation for display)."""
+        return self._pending.get(magazine_id, 0)
+
+    async def _take_pending(self) -> Counter[int]:
+        counts, self._pending = self._pending, Counter()
+        if self.redis is not None:
+            try:
+                for magazine_id, n in (await self.redis.take_hash(self.PENDING_KEY)).items():
+                    counts[int(magazine_id)] += int(n)
+            except Exception:
+                metrics.incr("view_counter_errors")
+        return counts
+
+    async def flush(self) -> int:
+        """Write pending increments to ``magazines.view_count``; returns the number of views written."""
+        self._prune()
+        await self._sync_viewers()
+        counts = await self._take_pending()
+        if not counts:
+            return 0
+        session_factory = self.session_factory
+        if session_factory is None:
+            from app.core.db import async_session_maker
+
+            session_factory = async_session_maker
+        assert session_factory is not None
+        started = time.perf_counter()
+        increment = case(counts, value=Magazine.id, else_=0)
+        try:
+            async with session_factory() as session:
+                await session.execute(
+                    update(Magazine)
+                    .where(Magazine.id.in_(sorted(counts)))
+                    .values(view_count=Magazine.view_count + increment, updated_at=Magazine.updated_at)
+                )
+                await session.commit()
+        except BaseException as e:
+            # Also on cancellation (shutdown mid-flush): put the increments back for drain() to write
+            self._pending.update(counts)
+            if not isinstance(e, Exception):
+                raise
+            metrics.incr("view_counter_flush_errors")
+            return 0
+        total = sum(counts.values())
+        metrics.incr("view_counter_flushed", total)
+        metrics.observe("view_counter_flush_seconds", time.perf_counter() - started)
+        return total
+
+    def _prune(self) -> None:
+        oldest = self.today() - timedelta(days=self.retention_days)
+        for key in [key for key in self._viewers if key[0] < oldest]:
+            del self._viewers[key]
+        for key in [key for key in self._unsynced if key[0] < oldest]:
+            self._unsynced_count -= len(self._unsynced.pop(key))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            metrics.set_gauge("view_counter_pending_magazines", len(self._pending))
+            await self.flush()
+
+    async def drain(self) -> None:
+        """Stop the flusher and write out whatever is pending (on shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = self._loop = None
+        await self.flush()
+
+
+view_counter = ViewCounter(
+    flush_interval=settings.VIEW_COUNTER_FLUSH_SECONDS,
+    retention_days=settings.VIEW_UNIQUE_RETENTION_DAYS,
+    redis=RedisKV() if settings.VIEW_COUNTER_REDIS else None,
+    tz=configured_timezone(),
+)
@@ -0,0 +1 @@
+"""In-process stand-ins for external services, used by tests and benchmarks to run offline."""
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterable
+
+import oss2  # type: ignore
+
+
+def _not_found(code: str, message: str) -> oss2.exceptions.OssError:
+    details = {"Code": code, "Message": message}
+    klass = oss2.exceptions.NoSuchKey if code == "NoSuchKey" else oss2.exceptions.NoSuchUpload
+    return klass(404, {}, message, details)
+
+
+@dataclass
+class _Result:
+    etag: str = ""
+    upload_id: str = ""
+    content_length: int = 0
+
+
+class _ObjectStream:
+    def __init__(self, data: bytes, bucket: FakeBucket) -> None:
+        self._data = data
+        self._pos = 0
+        self._bucket = bucket
+        self.content_length = len(data)
+
+    def read(self, amt: int | None = None) -> bytes:
+        end = len(self._data) if amt is None else min(len(self._data), self._pos + amt)
+        chunk = self._data[self._pos : end]
+        self._pos = end
+        self._bucket._transfer(len(chunk))
+        return chunk
+
+    def close(self) -> None:
+        pass
+
+
+class FakeBucket:
+    """Thread-safe, in-memory stand-in for the subset of ``oss2.Bucket`` used by OSSStorageBackend.
+
+    ``latency`` (seconds per request) and ``bandwidth`` (bytes/second per connection) simulate a remote
+    endpoint with blocking sleeps, so concurrency gains show up as they would against real OSS. ``fail_next``
+    makes the next N requests of an operation raise a retryable RequestError.
+    """
+
+    def __init__(self, latency: float = 0.0, bandwidth: float | None = None) -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.objects: dict[str, bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.requests: dict[str, int] = {}
+        self.fail_next: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _request(self, op: str) -> None:
+        with self._lock:
+            self.requests[op] = self.requests.get(op, 0) + 1
+            failures = self.fail_next.get(op, 0)
+            if failures:
+                self.fail_next[op] = failures - 1
+        if failures:
+            raise oss2.exceptions.RequestError(ConnectionError(f"injected failure in {op}"))
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _transfer(self, size: int) -> None:
+        if self.bandwidth and size:
+            time.sleep(size / self.bandwidth)
+
+    def put_object(self, key: str, data: bytes) -> _Result:
+        self._request("put_object")
+        self._transfer(len(data))
+        with self._lock:
+            self.objects[key] = bytes(data)
+        return _Result(etag=hashlib.md5(data).hexdigest().upper())
+
+    def get_object(self, key: str, byte_range: tuple[int | None, int | None] | None = None) -> _ObjectStream:
+        self._request("get_object")
+        with self._lock:
+            if key not in self.objects:
+                raise _not_found("NoSuchKey", f"{key} does not exist")
+            data = self.objects[key]
+        if byte_range is not None:
+            start, end = byte_range
+            if start is None:
+                start, end = max(0, len(data) - (end or 0)), len(data) - 1
+            data = data[start : (len(data) if end is None else end + 1)]
+        return _ObjectStream(data, self)
+
+    def head_object(self, key: str) -> _Result:
+        self._request("head_object")
+        with self._lock:
+            if key not in self.objects:
+                raise _not_found("NoSuchKey", f"{key} does not exist")
+            return _Result(content_length=len(self.objects[key]))
+
+    def init_multipart_upload(self, key: str) -> _Result:
+        self._request("init_multipart_upload")
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[upload_id] = {}
+        return _Result(upload_id=upload_id)
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> _Result:
+        self._request("upload_part")
+        self._transfer(len(data))
+        with self._lock:
+            if upload_id not in self.uploads:
+                raise _not_found("NoSuchUpload", upload_id)
+            self.uploads[upload_id][part_number] = bytes(data)
+        return _Result(etag=hashlib.md5(data).hexdigest().upper())
+
+    def list_parts(self, key: str, upload_id: str, marker: str = "", max_parts: int = 1000) -> _Result:
+        self._request("list_parts")
+        # Only the existence check is used (to validate a resumed upload id)
+        with self._lock:
+            if upload_id not in self.uploads:
+                raise _not_found("NoSuchUpload", upload_id)
+        return _Result()
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: Iterable[oss2.models.PartInfo]) -> _Result:
+        self._request("complete_multipart_upload")
+        with self._lock:
+            stored = self.uploads.pop(upload_id, None)
+            if stored is None:
+                raise _not_found("NoSuchUpload", upload_id)
+            self.objects[key] = b"".join(stored[p.part_number] for p in sorted(parts, key=lambda p: p.part_number))
+        return _Result()
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> _Result:
+        self._request("abort_multipart_upload")
+        with self._lock:
+            self.uploads.pop(upload_id, None)
+        return _Result()
+
+    def sign_url(self, method: str, key: str, expires: int) -> str:
+        return f"https://fake-oss.local/{key}?Expires={int(time.time()) + expires}"
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+from redis.exceptions import ResponseError
+
+from app.utils.redis_kv import ACQUIRE_LEASE_SCRIPT, RELEASE_LEASE_SCRIPT
+
+
+class _Pipeline:
+    """Queues commands and runs them in order on ``execute``, like a non-transactional redis pipeline."""
+
+    def __init__(self, client: FakeRedis) -> None:
+        self._client = client
+        self._calls: list[tuple[Callable[..., Any], tuple[Any, ...], dict[str, Any]]] = []
+
+    async def __aenter__(self) -> _Pipeline:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._calls.clear()
+
+    def __getattr__(self, name: str) -> Callable[..., _Pipeline]:
+        method = getattr(self._client, name)
+
+        def queue(*args: Any, **kwargs: Any) -> _Pipeline:
+            self._calls.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list[Any]:
+        calls, self._calls = self._calls, []
+        return [await method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis client calls RedisKV makes, for tests.
+
+    Keys expire by ``clock`` (seconds; ``time.monotonic`` by default), which tests can replace to move
+    time forward. ``eval`` runs Python equivalents of RedisKV's Lua scripts and rejects any other script.
+    HyperLogLogs are plain sets, so PFCOUNT is exact. Share one instance between several
+    ``RedisKV(client=...)`` to model several workers on one server.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.data: dict[str, Any] = {}
+        self.expires: dict[str, float] = {}
+        self._scripts = {ACQUIRE_LEASE_SCRIPT: self._acquire_lease, RELEASE_LEASE_SCRIPT: self._release_lease}
+
+    def _live(self, key: str) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= self.clock():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _expire_in(self, key: str, seconds: float | None) -> None:
+        if seconds is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = self.clock() + seconds
+
+    async def get(self, key: str) -> Any | None:
+        return self.data[key] if self._live(key) else None
+
+    async def set(
+        self, key: str, value: Any, ex: int | None = None, px: int | None = None, nx: bool = False
+    ) -> bool | None:
+        if nx and self._live(key):
+            return None
+        self.data[key] = str(value)
+        self._expire_in(key, ex if ex is not None else (px / 1000 if px is not None else None))
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        removed = sum(1 for key in keys if self._live(key))
+        for key in keys:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    async def incr(self, key: str) -> int:
+        value = int(self.data[key]) + 1 if self._live(key) else 1
+        self.data[key] = str(value)
+        return value
+
+    async def expire(self, key: str, seconds: int) -> int:
+        if not self._live(key):
+            return 0
+        self._expire_in(key, seconds)
+        return 1
+
+    async def pexpire(self, key: str, ms: int) -> int:
+        if not self._live(key):
+            return 0
+        self._expire_in(key, ms / 1000)
+        return 1
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        if not self._live(key):
+            self.data[key] = {}
+        bucket = self.data[key]
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        return int(bucket[field])
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        return dict(self.data[key]) if self._live(key) else {}
+
+    async def pfadd(self, key: str, *values: str) -> int:
+        if not self._live(key):
+            self.data[key] = set()
+        sketch = self.data[key]
+        added = set(map(str, values)) - sketch
+        sketch.update(added)
+        return 1 if added else 0
+
+    async def pfcount(self, *keys: str) -> int:
+        return len(set().union(*(self.data[key] for key in keys if self._live(key))))
+
+    def pipeline(self, transaction: bool = True) -> _Pipeline:
+        return _Pipeline(self)
+
+    async def rename(self, key: str, new_key: str) -> None:
+        if not self._live(key):
+            raise ResponseError("no such key")
+        self.data[new_key] = self.data.pop(key)
+        self._expire_in(new_key, None)
+        if key in self.expires:
+            self.expires[new_key] = self.expires.pop(key)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        handler = self._scripts.get(script)
+        if handler is None:
+            raise NotImplementedError("FakeRedis only runs RedisKV's scripts")
+        return await handler(list(keys_and_args[:numkeys]), [str(arg) for arg in keys_and_args[numkeys:]])
+
+    async def _acquire_lease(self, keys: list[str], args: list[str]) -> int:
+        if await self.get(keys[0]) == args[0]:
+            return await self.pexpire(keys[0], int(args[1]))
+        return 1 if await self.set(keys[0], args[0], px=int(args[1]), nx=True) else 0
+
+    async def _release_lease(self, keys: list[str], args: list[str]) -> int:
+        if await self.get(keys[0]) == args[0]:
+            return await self.delete(keys[0])
+        return 0
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ReceivedMessage:
+    mail_from: str
+    rcpt_to: list[str]
+    data: bytes
+
+
+@dataclass(eq=False)
+class _Session:
+    writer: asyncio.StreamWriter
+    lines: asyncio.Queue[tuple[float, bytes]] = field(default_factory=asyncio.Queue)
+    authenticated: bool = False
+    mail_from: str | None = None
+    rcpt_to: list[str] = field(default_factory=list)
+
+
+class FakeSMTPServer:
+    """In-process SMTP server on asyncio, for tests and benchmarks of the mail transports.
+
+    Speaks enough ESMTP for smtplib and AsyncSMTPConnection: EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT,
+    DATA, RSET, NOOP, QUIT, and advertises PIPELINING. Every reply is sent ``latency`` seconds after its
+    command arrived, which models the network round trip (pipelined commands share one); new
+    connections wait ``connect_latency`` before the greeting, which models TCP and TLS setup.
+    Use as ``async with FakeSMTPServer() as server`` and point clients at ``server.host``/``server.port``.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        username: str = "",
+        password: str = "",
+        pipelining: bool = True,
+    ) -> None:
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.username = username
+        self.password = password
+        self.pipelining = pipelining
+        self.host = "127.0.0.1"
+        self.port = 0
+        self.messages: list[ReceivedMessage] = []
+        self.commands: Counter[str] = Counter()
+        self.connections_opened = 0
+        self.reject_recipients: set[str] = set()
+        self._server: asyncio.AbstractServer | None = None
+        self._sessions: set[_Session] = set()
+
+    async def __aenter__(self) -> FakeSMTPServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def drop_connections(self) -> None:
+        """Close every open client connection, as a server does with idle sessions."""
+        for session in list(self._sessions):
+            session.writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections_opened += 1
+        session = _Session(writer)
+        self._sessions.add(session)
+        receiver = asyncio.ensure_future(self._receive(reader, session))
+        try:
+            await asyncio.sleep(self.connect_latency)
+            writer.write(b"220 fake-smtp ready\r\n")
+            while await self._serve_one(session):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            receiver.cancel()
+            self._sessions.discard(session)
+            writer.close()
+
+    async def _receive(self, reader: asyncio.StreamReader, session: _Session) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await reader.readline()
+            await session.lines.put((loop.time(), line))
+            if not line:
+                return
+
+    async def _next(self, session: _Session) -> tuple[float, bytes]:
+        arrived, line = await session.lines.get()
+        if not line:
+            raise asyncio.IncompleteReadError(b"", None)
+        return arrived, line
+
+    async def _reply(self, session: _Session, arrived: float, reply: str) -> None:
+        delay = arrived + self.latency - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        session.writer.write(reply.encode() + b"\r\n")
+        await session.writer.drain()
+
+    async def _serve_one(self, session: _Session) -> bool:
+        arrived, line = await self._next(session)
+        command, _, arg = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+        verb = command.upper()
+        self.commands[verb] += 1
+        if verb in ("EHLO", "HELO"):
+            extensions = ["8BITMIME", "AUTH PLAIN LOGIN"] + (["PIPELINING"] if self.pipelining else [])
+            lines = ["fake-smtp", *extensions] if verb == "EHLO" else ["fake-smtp"]
+            reply = "\r\n".join(
+                f"250{'-' if i < len(lines) - 1 else ' '}{text}" for i, text in enumerate(lines)
+            )
+        elif verb == "AUTH":
+            reply = await self._auth(session, arrived, arg)
+        elif verb == "NOOP":
+            reply = "250 OK"
+        elif verb == "RSET":
+            session.mail_from, session.rcpt_to = None, []
+            reply = "250 OK"
+        elif verb == "QUIT":
+            await self._reply(session, arrived, "221 Bye")
+            return False
+        elif self.username and not session.authenticated:
+            reply = "530 Authentication required"
+        elif verb == "MAIL":
+            session.mail_from, session.rcpt_to = _address(arg), []
+            reply = "250 OK"
+        elif verb == "RCPT":
+            address = _address(arg)
+            if session.mail_from is None:
+                reply = "503 Need MAIL first"
+            elif address in self.reject_recipients:
+                reply = "550 No such user"
+            else:
+                session.rcpt_to.append(address)
+                reply = "250 OK"
+        elif verb == "DATA":
+            if not session.rcpt_to:
+                reply = "554 No valid recipients"
+            else:
+                await self._reply(session, arrived, "354 End data with <CR><LF>.<CR><LF>")
+                arrived, data = await self._read_data(session)
+                self.messages.append(ReceivedMessage(session.mail_from or "", session.rcpt_to, data))
+                session.mail_from, session.rcpt_to = None, []
+                reply = "250 OK queued"
+        else:
+            reply = "502 Command not implemented"
+        await self._reply(session, arrived, reply)
+        return True
+
+    async def _auth(self, session: _Session, arrived: float, arg: str) -> str:
+        mechanism, _, initial = arg.partition(" ")
+        if mechanism.upper() == "PLAIN":
+            if not initial:
+                await self._reply(session, arrived, "334 ")
+                arrived, line = await self._next(session)
+                initial = line.decode().strip()
+            _, username, password = base64.b64decode(initial).decode().split("\0")
+        elif mechanism.upper() == "LOGIN":
+            await self._reply(session, arrived, "334 VXNlcm5hbWU6")
+            arrived, line = await self._next(session)
+            username = base64.b64decode(line.strip()).decode()
+            await self._reply(session, arrived, "334 UGFzc3dvcmQ6")
+            arrived, line = await self._next(session)
+            password = base64.b64decode(line.strip()).decode()
+        else:
+            return "504 Unrecognized authentication type"
+        if self.username and (username, password) != (self.username, self.password):
+            return "535 Authentication credentials invalid"
+        session.authenticated = True
+        return "235 Authentication successful"
+
+    async def _read_data(self, session: _Session) -> tuple[float, bytes]:
+        chunks = []
+        while True:
+            arrived, line = await self._next(session)
+            if line == b".\r\n":
+                return arrived, b"".join(chunks)
+            chunks.append(line[1:] if line.startswith(b"..") else line)
+
+
+def _address(arg: str) -> str:
+    _, _, value = arg.partition(":")
+    return value.strip().split(" ")[0].strip("<>")
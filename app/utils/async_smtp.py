@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import copy
+import smtplib
+import socket
+import ssl
+from email.message import EmailMessage
+from email.utils import getaddresses, parseaddr
+
+# Errors are smtplib's own exception types, so callers handle both transports alike.
+
+
+def envelope(msg: EmailMessage, default_from: str = "") -> tuple[str, list[str], bytes]:
+    """Sender, recipients (To/Cc/Bcc) and CRLF wire bytes of ``msg`` (without the Bcc header)."""
+    sender = parseaddr(msg.get("Sender") or msg.get("From") or default_from)[1]
+    fields = msg.get_all("To", []) + msg.get_all("Cc", []) + msg.get_all("Bcc", [])
+    recipients = [addr for _, addr in getaddresses(fields) if addr]
+    if "Bcc" in msg:
+        msg = copy.deepcopy(msg)
+        del msg["Bcc"]
+    data = msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+    return sender, recipients, data
+
+
+def _dot_stuff(data: bytes) -> bytes:
+    if data.startswith(b"."):
+        data = b"." + data
+    data = data.replace(b"\r\n.", b"\r\n..")
+    if not data.endswith(b"\r\n"):
+        data += b"\r\n"
+    return data
+
+
+class AsyncSMTPConnection:
+    """One SMTP session on asyncio streams.
+
+    Implicit TLS (``use_ssl``) or STARTTLS, AUTH PLAIN/LOGIN, and PIPELINING: with a
+    server that supports it MAIL, RCPT and DATA of a message go out in a single write, so a message
+    costs two round trips instead of three plus one per recipient. Without ``use_ssl`` the server must
+    offer STARTTLS (so credentials never go out in clear text) unless ``starttls`` is turned off.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        use_ssl: bool = False,
+        starttls: bool = True,
+        username: str = "",
+        password: str = "",
+        timeout: float = 30.0,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.extensions: dict[str, str] = {}
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def _context(self) -> ssl.SSLContext:
+        if self.ssl_context is None:
+            self.ssl_context = ssl.create_default_context()
+        return self.ssl_context
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host, self.port, ssl=self._context() if self.use_ssl else None
+            ),
+            self.timeout,
+        )
+        code, text = await self._read_reply()
+        if code != 220:
+            self.close()
+            raise smtplib.SMTPConnectError(code, text)
+        await self._ehlo()
+        if not self.use_ssl and self.starttls:
+            if "starttls" not in self.extensions:
+                self.close()
+                raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+            code, text = await self._command("STARTTLS")
+            if code != 220:
+                raise smtplib.SMTPResponseException(code, text)
+            await self._writer.start_tls(self._context(), server_hostname=self.host)
+            await self._ehlo()
+        if self.username:
+            await self._login()
+
+    async def _ehlo(self) -> None:
+        code, text = await self._command(f"EHLO {socket.getfqdn()}")
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, text)
+        self.extensions = {}
+        for line in text.splitlines()[1:]:
+            keyword, _, params = line.partition(" ")
+            self.extensions[keyword.lower()] = params
+
+    async def _login(self) -> None:
+        mechanisms = self.extensions.get("auth", "").upper().split()
+        if "PLAIN" in mechanisms or not mechanisms:
+            token = base64.b64encode(f"\0{self.username}\0{self.password}".encode()).decode()
+            code, text = await self._command(f"AUTH PLAIN {token}")
+        else:
+            code, text = await self._command("AUTH LOGIN")
+            if code == 334:
+                code, text = await self._command(base64.b64encode(self.username.encode()).decode())
+            if code == 334:
+                code, text = await self._command(base64.b64encode(self.password.encode()).decode())
+        if code != 235:
+            raise smtplib.SMTPAuthenticationError(code, text)
+
+    async def _read_reply(self) -> tuple[int, str]:
+        assert self._reader is not None
+        lines = []
+        while True:
+            try:
+                line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                self.close()
+                raise smtplib.SMTPServerDisconnected(f"Connection lost: {e!r}")
+            if not line:
+                self.close()
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            lines.append(line[4:].decode("utf-8", "replace").rstrip("\r\n"))
+            if line[3:4] != b"-":
+                try:
+                    return int(line[:3]), "\n".join(lines)
+                except ValueError:
+                    self.close()
+                    raise smtplib.SMTPServerDisconnected(f"Malformed reply: {line!r}")
+
+    async def _write(self, data: bytes) -> None:
+        if not self.is_connected:
+            raise smtplib.SMTPServerDisconnected("Not connected")
+        assert self._writer is not None
+        try:
+            self._writer.write(data)
+            await asyncio.wait_for(self._writer.drain(), self.timeout)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            self.close()
+            raise smtplib.SMTPServerDisconnected(f"Connection lost: {e!r}")
+
+    async def _command(self, line: str) -> tuple[int, str]:
+        await self._write(line.encode("utf-8") + b"\r\n")
+        return await self._read_reply()
+
+    async def send_message(
+        self, msg: EmailMessage, default_from: str = ""
+    ) -> dict[str, tuple[int, str]]:
+        """Send one message; returns refused recipients (raises if every recipient was refused)."""
+        sender, recipients, data = envelope(msg, default_from)
+        if not recipients:
+            raise ValueError("Message has no recipients")
+        commands = [f"MAIL FROM:<{sender}>", *(f"RCPT TO:<{rcpt}>" for rcpt in recipients), "DATA"]
+        if "pipelining" in self.extensions:
+            await self._write("".join(f"{command}\r\n" for command in commands).encode())
+            replies = [await self._read_reply() for _ in commands]
+        else:
+            replies = []
+            for command in commands:
+                reply = await self._command(command)
+                replies.append(reply)
+                if reply[0] >= 400 and command.startswith("MAIL"):
+                    break
+        mail_reply = replies[0]
+        data_reply = replies[-1] if len(replies) == len(commands) else (503, "")
+        rcpt_replies = zip(recipients, replies[1 : 1 + len(recipients)])
+        refused = {rcpt: reply for rcpt, reply in rcpt_replies if reply[0] not in (250, 251)}
+        if mail_reply[0] != 250:
+            await self._abort(data_reply)
+            raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], sender)
+        if len(refused) == len(recipients):
+            await self._abort(data_reply)
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if data_reply[0] != 354:
+            await self._abort(data_reply)
+            raise smtplib.SMTPDataError(*data_reply)
+        await self._write(_dot_stuff(data) + b".\r\n")
+        code, text = await self._read_reply()
+        if code != 250:
+            await self._command("RSET")
+            raise smtplib.SMTPDataError(code, text)
+        return refused
+
+    async def _abort(self, data_reply: tuple[int, str]) -> None:
+        if data_reply[0] == 354:
+            # Server opened DATA anyway: end it empty before resetting
+            await self._write(b".\r\n")
+            await self._read_reply()
+        await self._command("RSET")
+
+    async def noop(self) -> bool:
+        try:
+            return (await self._command("NOOP"))[0] == 250
+        except smtplib.SMTPServerDisconnected:
+            return False
+
+    async def quit(self) -> None:
+        if self.is_connected:
+            try:
+                await self._command("QUIT")
+            except smtplib.SMTPException:
+                pass
+        self.close()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+# Cap on ranges per request; more than this is treated as a plain GET to avoid multipart amplification
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range_header(header: str | None, size: int) -> list[tuple[int, int]] | None:
+    """Parse an RFC 9110 ``Range`` header into half-open ``(start, stop)`` byte ranges.
+
+    Returns None when the header is absent, malformed or not a ``bytes`` range, in which case the whole
+    representation should be served. Raises RangeNotSatisfiable when no range overlaps the content.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    specs = [part.strip() for part in spec.split(",") if part.strip()]
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+    ranges: list[tuple[int, int]] = []
+    for part in specs:
+        first, sep, last = part.partition("-")
+        if not sep:
+            return None
+        first, last = first.strip(), last.strip()
+        try:
+            if not first:
+                # suffix range: the final N bytes
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                if suffix == 0:
+                    continue
+                ranges.append((max(0, size - suffix), size))
+                continue
+            start = int(first)
+            end = int(last) if last else None
+        except ValueError:
+            return None
+        if start < 0 or (end is not None and end < start):
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, size if end is None else min(end + 1, size)))
+    ranges = [(start, stop) for start, stop in ranges if start < stop]
+    if not ranges:
+        raise RangeNotSatisfiable(f"bytes */{size}")
+    return ranges
+
+
+def content_range(start: int, stop: int, size: int) -> str:
+    return f"bytes {start}-{stop - 1}/{size}"
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """Opaque URL-safe cursor for keyset pagination (not signed: it only carries the last seen sort key)."""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Invalid cursor")
+    return payload
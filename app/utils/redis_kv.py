@@ -1,16 +1,35 @@
 from __future__ import annotations
 
 import json
+import uuid
 from typing import Any
 
 import redis.asyncio as redis
 
 from app.core.config import settings
 
+# Take the lease if it is free, or extend it if ``owner`` already holds it
+ACQUIRE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
 
 class RedisKV:
-    def __init__(self) -> None:
-        self.client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    def __init__(self, client: redis.Redis | None = None) -> None:
+        self.client = client if client is not None else redis.from_url(settings.REDIS_URL, decode_responses=True)
 
     async def set_json(self, key: str, value: Any, ex: int | None = None) -> None:
         await self.client.set(key, json.dumps(value), ex=ex)
@@ -23,3 +42,36 @@ class RedisKV:
 
     async def delete(self, key: str) -> None:
         await self.client.delete(key)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        return await self.client.hincrby(key, field, amount)
+
+    async def take_hash(self, key: str) -> dict[str, str]:
+        """Atomically move a hash out of the way and return its contents (empty if it did not exist)."""
+        claimed = f"{key}:claimed:{uuid.uuid4().hex}"
+        try:
+            await self.client.rename(key, claimed)
+        except redis.ResponseError:
+            return {}  # no such key
+        data = await self.client.hgetall(claimed)
+        await self.client.delete(claimed)
+        return data
+
+    async def pfadd(self, key: str, *values: str, ex: int | None = None) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.pfadd(key, *values)
+            if ex is not None:
+                pipe.expire(key, ex)
+            await pipe.execute()
+
+    async def pfcount(self, key: str) -> int:
+        return await self.client.pfcount(key)
+
+    async def acquire_lease(self, key: str, owner: str, ttl_ms: int) -> bool:
+        return bool(await self.client.eval(ACQUIRE_LEASE_SCRIPT, 1, key, owner, ttl_ms))
+
+    async def release_lease(self, key: str, owner: str) -> None:
+        await self.client.eval(RELEASE_LEASE_SCRIPT, 1, key, owner)
@@ -1,4 +1,8 @@
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
 from typing import Any, Optional
 
 from jose import jwt
@@ -13,3 +17,24 @@ def create_access_token(subject: str | int, expires_delta: Optional[timedelta] =
     to_encode: dict[str, Any] = {"exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
+
+
+def _url_signature(path: str, expires: int) -> str:
+    message = f"{path}\n{expires}".encode("utf-8")
+    return hmac.new(settings.URL_SIGNING_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def create_signed_url(path: str, expires_seconds: Optional[int] = None) -> tuple[str, datetime]:
+    """Absolute URL for an API ``path`` (relative to API_V1_PREFIX) carrying an HMAC over path and expiry."""
+    if expires_seconds is None:
+        expires_seconds = settings.TEMP_URL_EXPIRES_SECONDS
+    expires = int(time.time()) + expires_seconds
+    query = f"exp={expires}&sig={_url_signature(path, expires)}"
+    url = f"{settings.PUBLIC_BASE_URL}{settings.API_V1_PREFIX}{quote(path)}?{query}"
+    return url, datetime.fromtimestamp(expires, timezone.utc)
+
+
+def verify_signed_url(path: str, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_url_signature(path, expires), signature)
@@ -0,0 +1,190 @@
+"""Subscription digest dispatch throughput on a seeded SQLite database.
+
+Seeds ``--subscribers`` due subscriptions over ``--categories`` categories, runs the batched dispatcher
+and extrapolates to a million subscribers; then times the naive way (one magazine query, render and
+UPDATE + outbox INSERT per subscriber) on a sample for comparison.
+
+Usage:
+    uv run python benchmarks/digest_dispatch.py [--subscribers 100000] [--categories 50] [--batch-size 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import BigInteger, insert, select, update  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+from app.models import (  # noqa: E402,F401  (register every mapped class, as alembic/env.py does)
+    audit_log,
+    member_tier,
+    payment,
+    social_account,
+    user_membership,
+)
+from app.models.base import Base  # noqa: E402
+from app.models.email_outbox import EmailOutbox  # noqa: E402
+from app.models.magazine import Magazine, MagazineCategoryLink  # noqa: E402
+from app.models.magazine_category import MagazineCategory  # noqa: E402
+from app.models.subscription import Subscription  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.digest_service import DigestDispatcher, DigestItem, next_send_at, render_digest  # noqa: E402
+from app.services.email_outbox_service import enqueue_many  # noqa: E402
+
+NOW = datetime(2026, 10, 18, 8, 0, tzinfo=timezone.utc)
+TABLES = [User, MagazineCategory, Magazine, MagazineCategoryLink, Subscription, EmailOutbox]
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    return "INTEGER"
+
+
+async def _seed(engine, subscribers: int, categories: int) -> None:
+    rng = random.Random(0)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[model.__table__ for model in TABLES])
+        await conn.execute(
+            insert(MagazineCategory),
+            [{"id": c, "name": f"分类 {c}", "created_at": NOW} for c in range(1, categories + 1)],
+        )
+        magazines = [
+            {
+                "id": m,
+                "title": f"杂志 {m}",
+                "issue_number": str(m),
+                "publish_date": NOW.date() - timedelta(days=rng.randint(1, 40)),
+                "file_path": f"{m}.pdf",
+                "is_published": True,
+                "created_at": NOW,
+                "updated_at": NOW,
+            }
+            for m in range(1, categories * 20 + 1)
+        ]
+        await conn.execute(insert(Magazine), magazines)
+        await conn.execute(
+            insert(MagazineCategoryLink),
+            [{"magazine_id": m["id"], "category_id": (m["id"] - 1) % categories + 1} for m in magazines],
+        )
+        for start in range(1, subscribers + 1, 10_000):
+            ids = range(start, min(start + 10_000, subscribers + 1))
+            await conn.execute(
+                insert(User),
+                [
+                    {
+                        "id": i,
+                        "username": f"u{i}",
+                        "email": f"u{i}@example.com",
+                        "password_hash": "x",
+                        "created_at": NOW,
+                        "updated_at": NOW,
+                    }
+                    for i in ids
+                ],
+            )
+            await conn.execute(
+                insert(Subscription),
+                [
+                    {
+                        "id": i,
+                        "user_id": i,
+                        "category_id": rng.randint(1, categories),
+                        "frequency": rng.choice(("daily", "daily", "weekly", "monthly")),
+                        "last_sent_at": NOW - timedelta(days=rng.choice((1, 7, 30))) if i % 3 else None,
+                        "next_send_at": NOW - timedelta(minutes=rng.randint(1, 600)),
+                        "status": "active",
+                        "created_at": NOW,
+                        "updated_at": NOW,
+                    }
+                    for i in ids
+                ],
+            )
+
+
+async def _naive(session_maker, sample: int) -> float:
+    """One query, render and write per subscriber, as a straightforward loop would do it."""
+    started = time.perf_counter()
+    async with session_maker() as db:
+        subscriptions = (
+            await db.execute(
+                select(Subscription, User.email)
+                .join(User, User.id == Subscription.user_id)
+                .where(Subscription.status == "active", Subscription.next_send_at <= NOW)
+                .limit(sample)
+            )
+        ).all()
+        for subscription, email in subscriptions:
+            since = (subscription.last_sent_at or NOW - timedelta(days=1)).date()
+            rows = (
+                await db.execute(
+                    select(Magazine.id, Magazine.title, Magazine.issue_number, Magazine.publish_date)
+                    .join(MagazineCategoryLink, MagazineCategoryLink.magazine_id == Magazine.id)
+                    .where(
+                        MagazineCategoryLink.category_id == subscription.category_id,
+                        Magazine.is_published == True,
+                        Magazine.publish_date >= since,
+                        Magazine.publish_date < NOW.date(),
+                    )
+                    .order_by(Magazine.publish_date.desc())
+                    .limit(10)
+                )
+            ).all()
+            if rows:
+                html = render_digest("分类", [DigestItem(*row) for row in rows])
+                await enqueue_many(db, [(email, "订阅更新", html)])
+            await db.execute(
+                update(Subscription)
+                .where(Subscription.id == subscription.id)
+                .values(next_send_at=next_send_at(subscription.frequency, NOW, 8, timezone.utc), updated_at=NOW)
+            )
+            await db.commit()
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--naive-sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in ("batched", "naive"):
+            engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/{run}.db")
+            started = time.perf_counter()
+            await _seed(engine, args.subscribers if run == "batched" else args.naive_sample, args.categories)
+            seeded = time.perf_counter() - started
+            session_maker = async_sessionmaker(engine, expire_on_commit=False)
+            if run == "batched":
+                print(f"seeded {args.subscribers} subscriptions in {seeded:.1f}s")
+                dispatcher = DigestDispatcher(args.batch_size, 10, 8, session_factory=session_maker)
+                stats = await dispatcher.run(NOW)
+                rate = stats.subscriptions / stats.seconds
+                print(
+                    f"batched: {stats.subscriptions} subscriptions, {stats.emails} emails, "
+                    f"{stats.categories} categories in {stats.seconds:.1f}s -> {rate:,.0f}/s, "
+                    f"1M in {1_000_000 / rate / 60:.1f} min"
+                )
+            else:
+                seconds = await _naive(session_maker, args.naive_sample)
+                naive_rate = args.naive_sample / seconds
+                print(
+                    f"naive:   {args.naive_sample} subscriptions in {seconds:.1f}s -> {naive_rate:,.0f}/s, "
+                    f"1M in {1_000_000 / naive_rate / 60:.1f} min ({rate / naive_rate:.0f}x slower)"
+                )
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
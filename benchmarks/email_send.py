@@ -0,0 +1,77 @@
+"""Email throughput against the in-process fake SMTP server: per-message smtplib vs the async pool.
+
+The fake server delays every reply by the round-trip latency and every new connection by the handshake
+cost (TCP + TLS), so the numbers show what connection reuse, pipelining and concurrency save without a
+real mail server. The baseline opens, authenticates and quits one smtplib connection per message, as
+``EmailService.send_email`` does (minus TLS, which the fake server does not speak).
+
+Usage:
+    uv run python benchmarks/email_send.py [--messages 200] [--latency-ms 20] [--connect-ms 60]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.services.email_service import SMTPPool, build_message  # noqa: E402
+from app.testing.fake_smtp import FakeSMTPServer  # noqa: E402
+
+
+def _messages(n: int):
+    return [build_message("Benchmark", [f"user{i}@example.com"], f"<p>message {i}</p>") for i in range(n)]
+
+
+def _send_per_connection(host: str, port: int, messages) -> None:
+    for msg in messages:
+        with smtplib.SMTP(host, port) as server:
+            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+            server.send_message(msg)
+
+
+async def _run(mode: str, pool_size: int, n: int, latency: float, connect_latency: float) -> tuple[float, int]:
+    async with FakeSMTPServer(latency, connect_latency, "bench", "bench") as server:
+        settings.SMTP_HOST, settings.SMTP_PORT = server.host, server.port
+        messages = _messages(n)
+        started = time.perf_counter()
+        if mode == "smtplib":
+            # Blocking client in a thread: the fake server runs on this event loop
+            await asyncio.to_thread(_send_per_connection, server.host, server.port, messages)
+        else:
+            async with SMTPPool(pool_size, settings.SMTP_MAX_MESSAGES_PER_CONNECTION) as pool:
+                errors = [e for e in await pool.send_many(messages) if e is not None]
+                assert not errors, errors[0]
+        elapsed = time.perf_counter() - started
+        assert len(server.messages) == n
+        return n / elapsed, server.connections_opened
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20, help="round trip per reply")
+    parser.add_argument("--connect-ms", type=float, default=60, help="TCP + TLS handshake per connection")
+    parser.add_argument("--pool-size", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    settings.SMTP_USE_SSL = settings.SMTP_STARTTLS = False  # the fake server is plain text
+    settings.SMTP_USERNAME = settings.SMTP_PASSWORD = "bench"
+    settings.MAIL_FROM = "bench@example.com"
+    latency, connect_latency = args.latency_ms / 1000, args.connect_ms / 1000
+    runs = [("smtplib", 1)] + [("pool", size) for size in args.pool_size]
+    print(f"{'transport':>22} {'messages/s':>11} {'connections':>12}")
+    for mode, size in runs:
+        rate, connections = asyncio.run(_run(mode, size, args.messages, latency, connect_latency))
+        label = "smtplib per message" if mode == "smtplib" else f"async pool (size {size})"
+        print(f"{label:>22} {rate:>11.1f} {connections:>12}")
+
+
+if __name__ == "__main__":
+    main()
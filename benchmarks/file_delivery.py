@@ -0,0 +1,125 @@
+"""Compare the buffered and the streaming magazine file delivery paths.
+
+For each size an encrypted object is written to a temporary local storage directory, then every mode is run in a
+fresh subprocess so peak RSS (ru_maxrss) is measured in isolation:
+
+- buffered:  storage.download + decrypt_payload, i.e. what get_decrypted_pdf_bytes does
+- streaming: iter_plaintext_range, the pipeline behind GET /magazines/{id}/file
+
+Usage:
+    uv run python benchmarks/file_delivery.py [--sizes 10 100 500] [--format segmented|legacy]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.models.magazine import Magazine  # noqa: E402
+from app.services.file_crypto_service import (  # noqa: E402
+    SegmentEncryptor,
+    decrypt_payload,
+    derive_key,
+)
+from app.services.magazine_service import iter_plaintext_range, open_encrypted_file  # noqa: E402
+from app.services.storage_service import LocalStorageBackend  # noqa: E402
+
+MB = 1024 * 1024
+MAGAZINE_ID = 1
+
+
+def _write_object(base_dir: str, size: int, fmt: str) -> str:
+    from Crypto.Cipher import AES
+    from Crypto.Random import get_random_bytes
+
+    key = derive_key(MAGAZINE_ID, settings.FILE_CRYPT_MASTER_KEY)
+    path = f"bench-{fmt}-{size}.enc"
+    block = os.urandom(MB)
+    with open(os.path.join(base_dir, path), "wb") as f:
+        if fmt == "segmented":
+            enc = SegmentEncryptor(key, settings.FILE_CRYPT_SEGMENT_SIZE)
+            f.write(enc.header.to_bytes())
+            for _ in range(size // MB):
+                f.write(enc.update(block))
+            f.write(enc.finalize())
+        else:
+            iv = get_random_bytes(16)
+            cipher = AES.new(key, AES.MODE_CBC, iv)
+            f.write(iv)
+            for _ in range(size // MB):
+                f.write(cipher.encrypt(block))
+            f.write(cipher.encrypt(bytes([16] * 16)))
+    return path
+
+
+async def _run(mode: str, base_dir: str, path: str) -> dict[str, float]:
+    storage = LocalStorageBackend(base_dir)
+    magazine = Magazine(id=MAGAZINE_ID, file_path=path, file_size=os.path.getsize(os.path.join(base_dir, path)))
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    ttfb = None
+    total = 0
+    if mode == "buffered":
+        data = decrypt_payload(await storage.download(path), derive_key(MAGAZINE_ID, settings.FILE_CRYPT_MASTER_KEY))
+        ttfb = time.perf_counter() - started
+        total = len(data)
+        del data
+    else:
+        file = await open_encrypted_file(magazine, storage)
+        async for chunk in iter_plaintext_range(file, storage, 0, file.plaintext_size):
+            if ttfb is None:
+                ttfb = time.perf_counter() - started
+            total += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "ttfb_ms": (ttfb or 0.0) * 1000,
+        "total_ms": elapsed * 1000,
+        "bytes": total,
+        "peak_rss_delta_mb": max(0, peak_kb - baseline_kb) / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="object sizes in MB")
+    parser.add_argument("--format", choices=["segmented", "legacy"], default="segmented")
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "DIR", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, base_dir, path = args.worker
+        print(json.dumps(asyncio.run(_run(mode, base_dir, path))))
+        return
+
+    print(f"{'size':>8} {'mode':>10} {'ttfb ms':>10} {'total ms':>10} {'peak RSS +MB':>13}")
+    with tempfile.TemporaryDirectory() as base_dir:
+        for size_mb in args.sizes:
+            path = _write_object(base_dir, size_mb * MB, args.format)
+            for mode in ("buffered", "streaming"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--worker", mode, base_dir, path],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(
+                    f"{size_mb:>6}MB {mode:>10} {r['ttfb_ms']:>10.1f} {r['total_ms']:>10.1f}"
+                    f" {r['peak_rss_delta_mb']:>13.1f}"
+                )
+            os.remove(os.path.join(base_dir, path))
+
+
+if __name__ == "__main__":
+    main()
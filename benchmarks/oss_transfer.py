@@ -0,0 +1,67 @@
+"""OSS upload/download throughput against the in-process fake bucket, by part concurrency.
+
+The fake bucket sleeps per request (latency) and per byte (per-connection bandwidth), so the numbers show
+how multipart concurrency and parallel ranged GETs scale without network access.
+
+Usage:
+    uv run python benchmarks/oss_transfer.py [--size-mb 64] [--latency-ms 30] [--bandwidth-mbps 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.services.storage_service import OSSStorageBackend  # noqa: E402
+from app.testing.fake_oss import FakeBucket  # noqa: E402
+
+MB = 1024 * 1024
+
+
+async def _chunks(data: bytes, size: int = MB):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def _run(data: bytes, concurrency: int, latency: float, bandwidth: float) -> tuple[float, float]:
+    settings.OSS_UPLOAD_CONCURRENCY = concurrency
+    settings.OSS_DOWNLOAD_CONCURRENCY = concurrency
+    backend = OSSStorageBackend(bucket=FakeBucket(latency=latency, bandwidth=bandwidth))
+    started = time.perf_counter()
+    await backend.upload_stream("bench.bin", _chunks(data))
+    upload = time.perf_counter() - started
+    started = time.perf_counter()
+    size = 0
+    async for chunk in backend.download_stream("bench.bin"):
+        size += len(chunk)
+    download = time.perf_counter() - started
+    assert size == len(data)
+    return len(data) / MB / upload, len(data) / MB / download
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--part-mb", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--bandwidth-mbps", type=float, default=20, help="per-connection MB/s")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    settings.OSS_MULTIPART_PART_SIZE = args.part_mb * MB
+    settings.OSS_DOWNLOAD_PART_SIZE = args.part_mb * MB
+    data = os.urandom(args.size_mb * MB)
+    print(f"{'concurrency':>11} {'upload MB/s':>12} {'download MB/s':>14}")
+    for concurrency in args.concurrency:
+        up, down = asyncio.run(_run(data, concurrency, args.latency_ms / 1000, args.bandwidth_mbps * MB))
+        print(f"{concurrency:>11} {up:>12.1f} {down:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""PDF page-text extraction throughput (pages/sec): in-process vs. the ingest process pool.
+
+Generates synthetic PDFs with a text layer and runs ``extract_pdf_file_texts`` over them, first serially
+in this process and then through ``run_cpu`` with the configured number of pool workers.
+
+Usage:
+    uv run python benchmarks/pdf_text_extraction.py [--files 16] [--pages 40] [--lines 40] [--processes 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.services import ingest_service  # noqa: E402
+from app.services.ingest_service import extract_pdf_file_texts, run_cpu  # noqa: E402
+
+FONT = b"/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >>"
+
+
+def make_pdf(pages: int, lines: int) -> bytes:
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for i in range(pages):
+        content = b"BT /F1 10 Tf 72 760 Td " + b"(Page %d line of magazine body text) Tj 0 -12 Td " % i * lines + b"ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R %s >>" % (4 + 2 * i, FONT))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % n + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+async def _pooled(paths: list[str]) -> int:
+    results = await asyncio.gather(*(run_cpu(extract_pdf_file_texts, path) for path in paths))
+    return sum(len(texts) for texts in results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    settings.INGEST_PROCESSES = args.processes
+    data = make_pdf(args.pages, args.lines)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp, f"{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+
+        started = time.perf_counter()
+        pages = sum(len(extract_pdf_file_texts(path)) for path in paths)
+        serial = pages / (time.perf_counter() - started)
+
+        asyncio.run(_pooled(paths))  # warm-up pass: worker start-up and imports stay out of the timing
+        started = time.perf_counter()
+        pages = asyncio.run(_pooled(paths))
+        pooled = pages / (time.perf_counter() - started)
+        ingest_service._get_process_pool().shutdown()
+
+    print(f"{'mode':>16} {'pages/s':>10}")
+    print(f"{'serial':>16} {serial:>10.0f}")
+    print(f"{f'pool x{args.processes}':>16} {pooled:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
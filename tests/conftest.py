@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+from app.models.base import Base
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only auto-increments INTEGER PRIMARY KEY columns
+    return "INTEGER"
+
+
+@pytest.fixture
+def tables():
+    """Models whose tables ``engine`` creates; test modules override this with the ones they use."""
+    return []
+
+
+@pytest.fixture
+async def engine(tmp_path, tables):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[model.__table__ for model in tables])
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(engine):
+    return async_sessionmaker(engine, expire_on_commit=False)
@@ -0,0 +1,21 @@
+from app.services.count_service import CountCache
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.count_service.time.monotonic", lambda: now[0])
+    cache = CountCache(ttl=10)
+    cache.put(("spring", True), 42)
+    assert cache.get(("spring", True)) == 42
+    now[0] += 11
+    assert cache.get(("spring", True)) is None
+
+
+def test_invalidate_and_size_bound():
+    cache = CountCache(ttl=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None and cache.get("c") == 3
+    cache.invalidate()
+    assert cache.get("b") is None
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, insert, select
+
+from app.models import (  # noqa: F401  (register every mapped class, as alembic/env.py does)
+    audit_log,
+    member_tier,
+    payment,
+    social_account,
+    user_membership,
+)
+from app.models.email_outbox import EmailOutbox
+from app.models.magazine import Magazine, MagazineCategoryLink
+from app.models.magazine_category import MagazineCategory
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.services.digest_service import DigestDispatcher, next_send_at
+
+
+NOW = datetime(2026, 10, 18, 8, 0, tzinfo=timezone.utc)
+TODAY = NOW.date()
+
+
+@pytest.fixture
+def tables():
+    return [User, MagazineCategory, Magazine, MagazineCategoryLink, Subscription, EmailOutbox]
+
+
+@pytest.fixture
+async def engine(engine):
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(MagazineCategory),
+            [{"id": 1, "name": "科技", "created_at": NOW}, {"id": 2, "name": "文学", "created_at": NOW}],
+        )
+        magazines = [
+            (1, "芯片周刊", TODAY - timedelta(days=1), [1]),
+            (2, "AI <前沿>", TODAY - timedelta(days=3), [1, 2]),
+            (3, "旧刊", TODAY - timedelta(days=60), [1]),
+            (4, "今日刊", TODAY, [1]),  # published today: goes into tomorrow's digest
+            (5, "草稿", TODAY - timedelta(days=1), [1]),
+        ]
+        for magazine_id, title, published, categories in magazines:
+            await conn.execute(
+                insert(Magazine).values(
+                    id=magazine_id,
+                    title=title,
+                    issue_number=str(magazine_id),
+                    publish_date=published,
+                    file_path=f"{magazine_id}.pdf",
+                    is_published=magazine_id != 5,
+                    created_at=NOW,
+                    updated_at=NOW,
+                )
+            )
+            await conn.execute(
+                insert(MagazineCategoryLink), [{"magazine_id": magazine_id, "category_id": c} for c in categories]
+            )
+    return engine
+
+
+async def _subscribe(session_maker, count, category_id, frequency, last_sent_at=None, status="active"):
+    async with session_maker() as db:
+        first = (await db.execute(select(User.id).order_by(User.id.desc()).limit(1))).scalar() or 0
+        users = [
+            {
+                "id": first + i + 1,
+                "username": f"u{first + i + 1}",
+                "email": f"u{first + i + 1}@example.com",
+                "password_hash": "x",
+                "created_at": NOW,
+                "updated_at": NOW,
+            }
+            for i in range(count)
+        ]
+        await db.execute(insert(User), users)
+        await db.execute(
+            insert(Subscription),
+            [
+                {
+                    "user_id": user["id"],
+                    "category_id": category_id,
+                    "frequency": frequency,
+                    "last_sent_at": last_sent_at,
+                    "next_send_at": NOW - timedelta(minutes=5),
+                    "status": status,
+                    "created_at": NOW,
+                    "updated_at": NOW,
+                }
+                for user in users
+            ],
+        )
+        await db.commit()
+        return [user["email"] for user in users]
+
+
+async def _outbox(session_maker):
+    async with session_maker() as db:
+        return {row.to_email: row for row in (await db.execute(select(EmailOutbox))).scalars()}
+
+
+def test_next_send_at_keeps_the_send_hour():
+    tz = timezone(timedelta(hours=8))
+    late = datetime(2026, 1, 31, 23, 30, tzinfo=timezone.utc)  # 2026-02-01 07:30 in tz
+    assert next_send_at("daily", late, 8, tz) == datetime(2026, 2, 2, 0, 0, tzinfo=timezone.utc)
+    assert next_send_at("weekly", NOW, 8, timezone.utc) == NOW + timedelta(days=7)
+    assert next_send_at("monthly", datetime(2026, 12, 31, 9, tzinfo=timezone.utc), 8, timezone.utc) == datetime(
+        2027, 1, 28, 8, tzinfo=timezone.utc
+    )
+
+
+async def test_digests_are_queued_once_per_subscription(engine, session_maker):
+    daily = await _subscribe(session_maker, 5, 1, "daily")
+    weekly = await _subscribe(session_maker, 3, 1, "weekly")
+    literature = await _subscribe(session_maker, 2, 2, "daily", last_sent_at=NOW - timedelta(days=5))
+
+    magazine_queries = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("SELECT") and "FROM magazines" in statement:
+            magazine_queries.append(statement)
+
+    dispatcher = DigestDispatcher(batch_size=3, max_items=10, send_hour=8, session_factory=session_maker)
+    stats = await dispatcher.run(NOW)
+    assert (stats.subscriptions, stats.emails, stats.categories) == (10, 10, 2)
+    assert len(magazine_queries) == 2  # one per category, however many batches
+
+    outbox = await _outbox(session_maker)
+    assert set(outbox) == set(daily + weekly + literature)
+    daily_html, weekly_html = outbox[daily[0]].html, outbox[weekly[0]].html
+    assert "芯片周刊" in daily_html and "AI" not in daily_html  # only yesterday's issues
+    assert "芯片周刊" in weekly_html and "AI &lt;前沿&gt;" in weekly_html
+    for html in (daily_html, weekly_html):
+        assert "旧刊" not in html and "今日刊" not in html and "草稿" not in html
+    assert outbox[literature[0]].subject == "订阅更新：文学"
+    assert "AI &lt;前沿&gt;" in outbox[literature[0]].html  # since the last digest five days ago
+
+    async with session_maker() as db:
+        subscriptions = list((await db.execute(select(Subscription).order_by(Subscription.id))).scalars())
+    next_times = {(s.frequency, s.next_send_at) for s in subscriptions}
+    assert next_times == {
+        ("daily", datetime(2026, 10, 19, 8, 0)),
+        ("weekly", datetime(2026, 10, 25, 8, 0)),
+    }
+    assert {s.last_sent_at for s in subscriptions} == {NOW.replace(tzinfo=None)}
+
+    # Nothing is due any more
+    assert (await dispatcher.run(NOW + timedelta(hours=1))).subscriptions == 0
+    assert len(await _outbox(session_maker)) == 10
+
+
+async def test_subscriptions_without_news_advance_silently(session_maker):
+    await _subscribe(session_maker, 2, 2, "daily")  # category 2 has nothing from yesterday
+    await _subscribe(session_maker, 2, 1, "daily", last_sent_at=NOW - timedelta(hours=1))
+    await _subscribe(session_maker, 1, 1, "daily", status="paused")
+
+    dispatcher = DigestDispatcher(batch_size=100, max_items=10, send_hour=8, session_factory=session_maker)
+    stats = await dispatcher.run(NOW)
+    assert (stats.subscriptions, stats.emails) == (4, 0)
+    assert await _outbox(session_maker) == {}
+
+    async with session_maker() as db:
+        subscriptions = list((await db.execute(select(Subscription))).scalars())
+    active = [s for s in subscriptions if s.status == "active"]
+    assert {s.next_send_at for s in active} == {datetime(2026, 10, 19, 8, 0)}
+    assert [s.last_sent_at for s in active if s.user_id <= 2] == [None, None]
+    (skipped,) = [s for s in subscriptions if s.status == "paused"]
+    assert skipped.next_send_at == (NOW - timedelta(minutes=5)).replace(tzinfo=None)
+
+
+async def test_a_batch_advanced_elsewhere_is_not_queued_twice(session_maker):
+    await _subscribe(session_maker, 3, 1, "daily")
+    first = DigestDispatcher(batch_size=100, max_items=10, send_hour=8, session_factory=session_maker)
+    second = DigestDispatcher(batch_size=100, max_items=10, send_hour=8, session_factory=session_maker)
+
+    original = first._load_categories
+
+    async def load_then_lose_the_race(session, category_ids, today):
+        # Another dispatcher handles the same rows between this one's SELECT and UPDATE
+        await second.run(NOW)
+        return await original(session, category_ids, today)
+
+    first._load_categories = load_then_lose_the_race
+    stats = await first.run(NOW)
+    assert stats.conflicts == 1 and stats.emails == 0
+    assert len(await _outbox(session_maker)) == 3
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import (  # noqa: F401  (register every mapped class, as alembic/env.py does)
+    audit_log,
+    magazine_category,
+    member_tier,
+    payment,
+    social_account,
+    subscription,
+    user,
+    user_membership,
+)
+from app.models.download import Download
+from app.models.magazine import Magazine
+from app.services.download_event_service import DownloadEvent, DownloadRecorder
+
+
+@pytest.fixture
+def tables():
+    return [Magazine, Download]
+
+
+@pytest.fixture
+async def session_maker(session_maker):
+    async with session_maker() as db:
+        for magazine_id in (1, 2):
+            db.add(
+                Magazine(
+                    id=magazine_id,
+                    title=f"m{magazine_id}",
+                    issue_number=str(magazine_id),
+                    publish_date=date(2024, 1, 1),
+                    file_path="",
+                    download_count=5,
+                    created_at=datetime.now(timezone.utc),
+                    updated_at=datetime.now(timezone.utc),
+                )
+            )
+        await db.commit()
+    return session_maker
+
+
+def _event(magazine_id: int, status: str = "success") -> DownloadEvent:
+    return DownloadEvent(user_id=1, magazine_id=magazine_id, download_time=datetime.now(timezone.utc), status=status)
+
+
+async def test_events_are_batched_and_counts_aggregated(session_maker):
+    flushed: list[int] = []
+    recorder = DownloadRecorder(flush_interval=0.05, batch_size=4, maxsize=100, session_factory=session_maker)
+    original_flush = recorder._flush
+
+    async def counting_flush(batch):
+        flushed.append(len(batch))
+        await original_flush(batch)
+
+    recorder._flush = counting_flush
+    await asyncio.gather(*(recorder.record(_event(1 if i % 3 else 2)) for i in range(10)))
+    await recorder.record(_event(2, status="failed"))
+    await recorder.drain()
+
+    assert sum(flushed) == 11 and max(flushed) <= 4
+    async with session_maker() as db:
+        assert (await db.execute(select(func.count()).select_from(Download))).scalar_one() == 11
+        counts = dict((await db.execute(select(Magazine.id, Magazine.download_count))).all())
+    assert counts == {1: 5 + 6, 2: 5 + 4}
+
+
+async def test_drain_flushes_a_partial_batch_before_the_interval(session_maker):
+    recorder = DownloadRecorder(flush_interval=30, batch_size=100, maxsize=100, session_factory=session_maker)
+    await recorder.record(_event(1))
+    await asyncio.wait_for(recorder.drain(), timeout=5)
+    async with session_maker() as db:
+        assert (await db.get(Magazine, 1)).download_count == 6
+
+
+async def test_failed_flushes_are_retried_until_the_database_is_back(session_maker):
+    failures = 3
+
+    def flaky_session():
+        nonlocal failures
+        if failures:
+            failures -= 1
+            raise RuntimeError("database down")
+        return session_maker()
+
+    recorder = DownloadRecorder(
+        flush_interval=0.01, batch_size=10, maxsize=100, session_factory=flaky_session, retry_base=0.01
+    )
+    await recorder.record(_event(1))
+    while failures:
+        await asyncio.sleep(0.01)
+    await recorder.drain()
+    async with session_maker() as db:
+        assert (await db.get(Magazine, 1)).download_count == 6
+
+
+async def test_a_dead_flusher_is_restarted(session_maker):
+    recorder = DownloadRecorder(flush_interval=0.01, batch_size=10, maxsize=1, session_factory=session_maker)
+    await recorder.record(_event(1))
+    recorder._task.cancel()
+    await asyncio.gather(recorder._task, return_exceptions=True)
+    await asyncio.wait_for(asyncio.gather(*(recorder.record(_event(2)) for _ in range(3))), timeout=5)
+    await recorder.drain()
+    async with session_maker() as db:
+        assert (await db.get(Magazine, 2)).download_count == 5 + 3
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import (  # noqa: F401  (register every mapped class, as alembic/env.py does)
+    audit_log,
+    magazine,
+    magazine_category,
+    member_tier,
+    payment,
+    social_account,
+    subscription,
+    user,
+    user_membership,
+)
+from app.models.download import Download, DownloadQuotaUsage
+from app.services.quota_service import consume_download, current_month, downloads_used
+
+
+@pytest.fixture
+def tables():
+    return [Download, DownloadQuotaUsage]
+
+
+def test_current_month_bounds():
+    assert current_month(datetime(2024, 12, 31, 23, 0, tzinfo=timezone.utc)) == (
+        "2024-12",
+        datetime(2024, 12, 1, tzinfo=timezone.utc),
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+async def test_counter_is_seeded_from_existing_downloads(session_maker):
+    now = datetime.now(timezone.utc)
+    async with session_maker() as db:
+        db.add_all(
+            [
+                Download(id=1, user_id=7, magazine_id=1, download_time=now, status="success"),
+                Download(id=2, user_id=7, magazine_id=2, download_time=now, status="failed"),
+                Download(id=3, user_id=7, magazine_id=3, download_time=now - timedelta(days=40), status="success"),
+            ]
+        )
+        await db.commit()
+        assert await downloads_used(db, 7) == 1
+        assert await consume_download(db, 7, limit=2)
+        assert not await consume_download(db, 7, limit=2)
+        await db.commit()
+        assert await downloads_used(db, 7) == 2
+
+
+async def test_concurrent_consumers_cannot_overshoot_the_limit(session_maker):
+    async def attempt() -> bool:
+        async with session_maker() as db:
+            ok = await consume_download(db, 9, limit=3)
+            await db.commit()
+            return ok
+
+    results = await asyncio.gather(*(attempt() for _ in range(10)))
+    assert sum(results) == 3
+    async with session_maker() as db:
+        assert await downloads_used(db, 9) == 3
+        assert await consume_download(db, 9, limit=None)
@@ -0,0 +1,131 @@
+import smtplib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.email_outbox import EmailOutbox
+from app.services.email_outbox_service import DomainRateLimiter, OutboxWorker, enqueue_email
+
+
+@pytest.fixture
+def tables():
+    return [EmailOutbox]
+
+
+class _Transport:
+    """Records sent messages; ``errors`` maps a recipient to the exception its sends raise."""
+
+    def __init__(self) -> None:
+        self.sent = []
+        self.errors = {}
+
+    async def send_many(self, messages):
+        results = []
+        for msg in messages:
+            error = self.errors.get(msg["To"])
+            if error is None:
+                self.sent.append(msg["To"])
+            results.append(error)
+        return results
+
+
+def _worker(session_maker, transport, **kwargs):
+    options = dict(
+        batch_size=10,
+        poll_interval=0.01,
+        lease_seconds=60,
+        max_attempts=3,
+        retry_base=30,
+        retry_max=3600,
+        limiter=DomainRateLimiter(per_minute=600, burst=100),
+    )
+    options.update(kwargs)
+    return OutboxWorker(**options, session_factory=session_maker, send_many=transport.send_many)
+
+
+async def _enqueue(session_maker, *addresses):
+    async with session_maker() as db:
+        enqueue_email(db, "subject", addresses, "<p>hi</p>")
+        await db.commit()
+
+
+async def _rows(session_maker):
+    async with session_maker() as db:
+        return {row.to_email: row for row in (await db.execute(select(EmailOutbox))).scalars()}
+
+
+async def test_queued_emails_are_sent_once(session_maker):
+    transport = _Transport()
+    await _enqueue(session_maker, "a@example.com", "b@example.org")
+    worker = _worker(session_maker, transport)
+    assert await worker.run_once() == 2
+    assert await worker.run_once() == 0
+    assert sorted(transport.sent) == ["a@example.com", "b@example.org"]
+    rows = await _rows(session_maker)
+    assert {r.status for r in rows.values()} == {"sent"} and {r.attempts for r in rows.values()} == {1}
+
+
+async def test_failures_are_retried_with_backoff_or_failed(session_maker):
+    transport = _Transport()
+    transport.errors["flaky@example.com"] = smtplib.SMTPServerDisconnected("gone")
+    transport.errors["nobody@example.com"] = smtplib.SMTPRecipientsRefused({"nobody@example.com": (550, "no such user")})
+    await _enqueue(session_maker, "flaky@example.com", "nobody@example.com")
+    worker = _worker(session_maker, transport)
+    before = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert await worker.run_once() == 2
+
+    rows = await _rows(session_maker)
+    assert rows["nobody@example.com"].status == "failed"
+    flaky = rows["flaky@example.com"]
+    assert flaky.status == "pending" and flaky.attempts == 1 and "SMTPServerDisconnected" in flaky.last_error
+    assert before + timedelta(seconds=14) <= flaky.next_attempt_at <= before + timedelta(seconds=31)
+    assert await worker.run_once() == 0  # not due yet
+
+    async with session_maker() as db:
+        for _ in range(2):
+            await db.execute(update(EmailOutbox).values(next_attempt_at=datetime.now(timezone.utc)))
+            await db.commit()
+            await worker.run_once()
+    assert (await _rows(session_maker))["flaky@example.com"].status == "failed"  # max_attempts reached
+
+
+async def test_claims_are_disjoint_and_expire(session_maker):
+    await _enqueue(session_maker, *(f"u{i}@example.com" for i in range(15)))
+    worker_a = _worker(session_maker, _Transport())
+    worker_b = _worker(session_maker, _Transport())
+    now = datetime.now(timezone.utc)
+    async with session_maker() as a, session_maker() as b:
+        claimed_a = {row.id for row in await worker_a._claim(a, now)}
+        claimed_b = {row.id for row in await worker_b._claim(b, now)}
+    assert len(claimed_a) == 10 and len(claimed_b) == 5 and not claimed_a & claimed_b
+
+    # Both died holding their claims: the rows come back once the lease has run out
+    worker_c = _worker(session_maker, _Transport(), batch_size=100)
+    async with session_maker() as db:
+        assert await worker_c._claim(db, now + timedelta(seconds=30)) == []
+        reclaimed = await worker_c._claim(db, now + timedelta(seconds=61))
+    assert {row.id for row in reclaimed} == claimed_a | claimed_b
+
+
+async def test_domain_rate_limit_defers_without_counting_attempts(session_maker):
+    transport = _Transport()
+    await _enqueue(session_maker, *(f"u{i}@slow.example" for i in range(5)), "x@fast.example")
+    limiter = DomainRateLimiter(per_minute=600, burst=2, overrides={"slow.example": 60})
+    worker = _worker(session_maker, transport, limiter=limiter)
+    assert await worker.run_once() == 6
+    assert len(transport.sent) == 3 and "x@fast.example" in transport.sent
+
+    deferred = [r for r in (await _rows(session_maker)).values() if r.status == "pending"]
+    assert len(deferred) == 3 and {r.attempts for r in deferred} == {0}
+    assert all(r.claim_token is None for r in deferred)
+
+
+def test_rate_limiter_refills_at_the_sustained_rate():
+    limiter = DomainRateLimiter(per_minute=60, burst=2)
+    assert limiter.acquire("example.com", now=0) == 0
+    assert limiter.acquire("example.com", now=0) == 0
+    assert limiter.acquire("example.com", now=0) == pytest.approx(1.0)
+    assert limiter.acquire("example.com", now=0.5) == pytest.approx(0.5)
+    assert limiter.acquire("example.com", now=1.0) == 0
+    assert limiter.acquire("other.com", now=1.0) == 0
@@ -0,0 +1,115 @@
+import asyncio
+import smtplib
+import time
+
+import pytest
+
+from app.services.email_service import SMTPPool, build_message
+from app.testing.fake_smtp import FakeSMTPServer
+from app.utils.async_smtp import AsyncSMTPConnection
+
+
+def _connector(server: FakeSMTPServer, username: str = "", password: str = "", starttls: bool = False):
+    async def connect():
+        # The fake server speaks plain text only
+        conn = AsyncSMTPConnection(
+            server.host, server.port, starttls=starttls, username=username, password=password, timeout=5
+        )
+        await conn.connect()
+        return conn
+
+    return connect
+
+
+def _msg(to: str, text: str | None = None):
+    msg = build_message("subject", [to], "<p>hi</p>", text)
+    msg.replace_header("From", "noreply@example.com")
+    return msg
+
+
+async def test_connections_are_reused_and_concurrency_bounded():
+    async with FakeSMTPServer(latency=0.002) as server:
+        async with SMTPPool(3, max_messages_per_connection=100, connect=_connector(server)) as pool:
+            results = await pool.send_many(_msg(f"u{i}@example.com") for i in range(30))
+        assert results == [None] * 30
+        assert server.connections_opened <= 3
+        assert sorted(m.rcpt_to[0] for m in server.messages) == sorted(f"u{i}@example.com" for i in range(30))
+        assert server.commands["QUIT"] == server.connections_opened
+
+
+async def test_connection_is_retired_after_max_messages():
+    async with FakeSMTPServer() as server:
+        async with SMTPPool(1, max_messages_per_connection=4, connect=_connector(server)) as pool:
+            for i in range(10):
+                await pool.send(_msg(f"u{i}@example.com"))
+        assert server.connections_opened == 3 and len(server.messages) == 10
+
+
+async def test_dropped_connection_is_reopened_and_rejections_keep_it():
+    async with FakeSMTPServer() as server:
+        server.reject_recipients.add("bad@example.com")
+        async with SMTPPool(1, idle_check_seconds=3600, connect=_connector(server)) as pool:
+            await pool.send(_msg("a@example.com"))
+            server.drop_connections()
+            await pool.send(_msg("b@example.com"))
+            assert server.connections_opened == 2
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                await pool.send(_msg("bad@example.com"))
+            results = await pool.send_many([_msg("c@example.com"), _msg("bad@example.com")])
+            assert results[0] is None and isinstance(results[1], smtplib.SMTPRecipientsRefused)
+        assert server.connections_opened == 2
+        assert [m.rcpt_to for m in server.messages] == [["a@example.com"], ["b@example.com"], ["c@example.com"]]
+
+
+async def test_idle_connection_is_health_checked_before_reuse():
+    async with FakeSMTPServer() as server:
+        async with SMTPPool(1, idle_check_seconds=0, connect=_connector(server)) as pool:
+            await pool.send(_msg("a@example.com"))
+            await pool.send(_msg("b@example.com"))
+            assert server.commands["NOOP"] == 1 and server.connections_opened == 1
+            server.drop_connections()
+            await asyncio.sleep(0.01)
+            await pool.send(_msg("c@example.com"))
+        assert server.connections_opened == 2 and len(server.messages) == 3
+
+
+async def test_message_encoding_auth_and_bcc():
+    async with FakeSMTPServer(username="mailer", password="s3cret") as server:
+        conn = await _connector(server, "mailer", "s3cret")()
+        msg = _msg("to@example.com", text="first line\n.starts with a dot\n")
+        msg["Bcc"] = "hidden@example.com"
+        assert await conn.send_message(msg) == {}
+        await conn.quit()
+
+        with pytest.raises(smtplib.SMTPAuthenticationError):
+            await _connector(server, "mailer", "wrong")()
+
+    received = server.messages[0]
+    assert received.mail_from == "noreply@example.com"
+    assert received.rcpt_to == ["to@example.com", "hidden@example.com"]
+    assert b"\r\n.starts with a dot\r\n" in received.data
+    assert b"hidden@example.com" not in received.data
+    assert "Bcc" in msg  # the caller's message is left as it was
+
+
+async def test_credentials_are_not_sent_without_starttls():
+    async with FakeSMTPServer(username="mailer", password="s3cret") as server:
+        with pytest.raises(smtplib.SMTPNotSupportedError):
+            await _connector(server, "mailer", "s3cret", starttls=True)()
+    assert server.commands["EHLO"] == 1 and server.commands["AUTH"] == 0
+
+
+@pytest.mark.parametrize("pipelining", [True, False])
+async def test_pipelining_saves_round_trips(pipelining):
+    latency = 0.05
+    async with FakeSMTPServer(latency=latency, pipelining=pipelining) as server:
+        conn = await _connector(server)()
+        started = time.perf_counter()
+        await conn.send_message(_msg("a@example.com"))
+        elapsed = time.perf_counter() - started
+        await conn.quit()
+    # MAIL, RCPT and DATA share one round trip when pipelined; the message body takes the second
+    if pipelining:
+        assert elapsed < 2.8 * latency
+    else:
+        assert elapsed >= 4 * latency
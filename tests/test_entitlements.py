@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+from app.services.entitlement_service import FREE, Entitlement, EntitlementCache
+from app.testing.fake_redis import FakeRedis
+from app.utils.redis_kv import RedisKV
+
+
+def test_snapshot_stops_counting_as_member_after_end_date():
+    today = date.today()
+    entitlement = Entitlement(tier_id=2, active_until=today, remaining_downloads=3)
+    assert entitlement.is_member(today)
+    assert not entitlement.is_member(today + timedelta(days=1))
+    assert not FREE.is_member(today)
+    assert Entitlement.from_json(entitlement.to_json()) == entitlement
+
+
+async def test_local_cache_expires_and_invalidates():
+    cache = EntitlementCache(ttl=60, max_entries=2)
+    member = Entitlement(tier_id=1, active_until=date.today())
+    await cache.put(1, member)
+    assert await cache.get(1) == member
+    await cache.invalidate(1)
+    assert await cache.get(1) is None
+
+    for user_id in (1, 2, 3):
+        await cache.put(user_id, FREE)
+    assert await cache.get(1) is None and await cache.get(3) == FREE
+
+    expired = EntitlementCache(ttl=-1, max_entries=2)
+    await expired.put(1, member)
+    assert await expired.get(1) is None
+
+
+async def test_redis_tier_is_shared_and_invalidate_all_bumps_generation():
+    kv = RedisKV(client=FakeRedis())
+    worker_a = EntitlementCache(ttl=60, max_entries=10, redis=kv)
+    worker_b = EntitlementCache(ttl=60, max_entries=10, redis=kv)
+    member = Entitlement(tier_id=1, active_until=date.today(), remaining_downloads=5)
+
+    await worker_a.put(7, member)
+    assert await worker_b.get(7) == member
+    await worker_a.invalidate(7)
+    worker_b._entries.clear()
+    assert await worker_b.get(7) is None
+
+    await worker_a.put(8, member)
+    await worker_b.invalidate_all()
+    assert await worker_b.get(8) is None
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from app.services.file_crypto_service import (
+    SEGMENT_HEADER_SIZE,
+    SegmentedHeader,
+    SegmentEncryptor,
+    SegmentLayout,
+    cbc_ciphertext_span,
+    cbc_plaintext_size,
+    decrypt_cbc_range,
+    decrypt_payload,
+    decrypt_range,
+    derive_key,
+    encrypt_aes_cbc,
+)
+
+KEY = derive_key(1, "test-master-key")
+
+
+def _encrypt(data: bytes, segment_size: int, chunk: int = 1000) -> bytes:
+    enc = SegmentEncryptor(KEY, segment_size)
+    out = [enc.header.to_bytes()]
+    for i in range(0, len(data), chunk):
+        out.append(enc.update(data[i : i + chunk]))
+    out.append(enc.finalize())
+    return b"".join(out)
+
+
+@pytest.mark.parametrize("size", [0, 1, 4095, 4096, 4097, 3 * 4096, 50_000])
+def test_segmented_roundtrip(size):
+    data = os.urandom(size)
+    payload = _encrypt(data, 4096)
+    layout = SegmentLayout(header=SegmentedHeader.parse(payload), ciphertext_size=len(payload))
+    assert layout.plaintext_size == size
+    assert decrypt_payload(payload, KEY) == data
+
+
+def test_decrypt_range_reads_only_covering_segments():
+    data = os.urandom(50_000)
+    payload = _encrypt(data, 4096)
+    layout = SegmentLayout(header=SegmentedHeader.parse(payload[:SEGMENT_HEADER_SIZE]), ciphertext_size=len(payload))
+    for start, stop in [(0, 1), (4095, 4097), (10_000, 30_000), (49_999, 50_000), (0, 50_000)]:
+        first, last = layout.segments_for_range(start, stop)
+        offset, length = layout.ciphertext_span(first, last)
+        assert length <= (last - first + 1) * (4096 + 16)
+        assert decrypt_range(KEY, layout, start, stop, payload[offset : offset + length]) == data[start:stop]
+
+
+def test_legacy_cbc_payload_still_readable():
+    data = os.urandom(10_000)
+    iv, ciphertext = encrypt_aes_cbc(data, KEY)
+    assert SegmentedHeader.parse(iv + ciphertext) is None
+    assert decrypt_payload(iv + ciphertext, KEY) == data
+
+
+def test_legacy_cbc_payload_supports_ranges():
+    data = os.urandom(10_007)
+    iv, ciphertext = encrypt_aes_cbc(data, KEY)
+    payload = iv + ciphertext
+    assert cbc_plaintext_size(len(payload), payload[-32:], KEY) == len(data)
+    for start, stop in [(0, 1), (15, 17), (5000, 6000), (10_000, 10_007)]:
+        offset, length = cbc_ciphertext_span(start, stop)
+        assert decrypt_cbc_range(KEY, start, stop, payload[offset : offset + length]) == data[start:stop]
+
+
+def test_tampering_and_truncation_are_detected():
+    data = os.urandom(20_000)
+    payload = bytearray(_encrypt(data, 4096))
+    payload[SEGMENT_HEADER_SIZE + 10] ^= 1
+    with pytest.raises(ValueError):
+        decrypt_payload(bytes(payload), KEY)
+    # Dropping the final segment leaves a non-final segment at the end, which must not verify as last
+    truncated = _encrypt(data, 4096)[: SEGMENT_HEADER_SIZE + 4 * (4096 + 16)]
+    with pytest.raises(ValueError):
+        decrypt_payload(truncated, KEY)
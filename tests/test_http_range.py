@@ -0,0 +1,33 @@
+import pytest
+
+from app.utils.http_range import RangeNotSatisfiable, content_range, parse_range_header
+
+
+def test_absent_or_malformed_range_serves_full_content():
+    assert parse_range_header(None, 100) is None
+    assert parse_range_header("items=0-1", 100) is None
+    assert parse_range_header("bytes=abc", 100) is None
+    assert parse_range_header("bytes=5-1", 100) is None
+
+
+def test_single_suffix_and_open_ranges():
+    assert parse_range_header("bytes=0-9", 100) == [(0, 10)]
+    assert parse_range_header("bytes=90-", 100) == [(90, 100)]
+    assert parse_range_header("bytes=-5", 100) == [(95, 100)]
+    assert parse_range_header("bytes=95-500", 100) == [(95, 100)]
+    assert parse_range_header("bytes=-500", 100) == [(0, 100)]
+
+
+def test_multiple_ranges_keep_order_and_drop_unsatisfiable_parts():
+    assert parse_range_header("bytes=50-59, 0-1, 200-300", 100) == [(50, 60), (0, 2)]
+
+
+def test_unsatisfiable_range():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=100-", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=-0", 100)
+
+
+def test_content_range_is_inclusive():
+    assert content_range(0, 10, 100) == "bytes 0-9/100"
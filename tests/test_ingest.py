@@ -0,0 +1,179 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.models.magazine import Magazine
+from app.services import magazine_service
+from app.services.ingest_service import IngestQueue, process_pdf, run_cpu
+from app.services.storage_service import OSSStorageBackend
+from app.testing.fake_oss import FakeBucket
+
+
+def _make_pdf(pages: int = 2, lines: int = 200) -> bytes:
+    """Minimal PDF with uncompressed, repetitive page content streams."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for i in range(pages):
+        content = b"BT /F1 12 Tf " + b"72 720 Td (Hello magazine page %d) Tj 0 -14 Td " % (i + 1) * lines + b"ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            "/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % n + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+async def test_process_pdf_counts_pages_and_compresses_in_pool(tmp_path):
+    source, compressed = tmp_path / "in.pdf", tmp_path / "out.pdf"
+    source.write_bytes(_make_pdf(pages=3))
+    result = await run_cpu(process_pdf, str(source), str(compressed))
+    assert result.page_count == 3
+    assert result.path == str(compressed)
+    assert result.stored_size == os.path.getsize(compressed) < result.original_size
+
+
+async def test_process_pdf_extracts_page_texts(tmp_path):
+    source = tmp_path / "in.pdf"
+    source.write_bytes(_make_pdf(pages=2, lines=3))
+    result = await run_cpu(process_pdf, str(source), str(tmp_path / "out.pdf"), True)
+    assert result.page_texts is not None and len(result.page_texts) == 2
+    assert result.page_texts[1].startswith("Hello magazine page 2")
+    assert process_pdf(str(source), str(tmp_path / "out.pdf")).page_texts is None
+
+
+async def test_process_pdf_keeps_source_when_not_a_pdf(tmp_path):
+    source = tmp_path / "in.pdf"
+    source.write_bytes(b"not a pdf")
+    result = process_pdf(str(source), str(tmp_path / "out.pdf"))
+    assert result.page_count is None
+    assert result.path == str(source)
+
+
+async def test_queue_is_bounded_and_drained_by_workers():
+    release = asyncio.Event()
+    done: list[int] = []
+
+    async def handler(job: int) -> None:
+        await release.wait()
+        if job == 2:
+            raise RuntimeError("boom")
+        done.append(job)
+
+    queue = IngestQueue(handler, workers=2, maxsize=2)
+    assert not queue.full()
+    for job in range(4):
+        await queue.put(job)
+    await asyncio.sleep(0)
+    assert queue.full()  # two jobs running, two waiting
+    release.set()
+    await queue.join()
+    assert sorted(done) == [0, 1, 3]
+    assert not queue.full()
+
+
+class _Queue:
+    def __init__(self) -> None:
+        self.jobs: list[int] = []
+
+    async def put(self, job: int) -> None:
+        self.jobs.append(job)
+
+
+@pytest.fixture
+def tables():
+    return [Magazine]
+
+
+async def test_recovery_takes_over_only_uploads_whose_worker_stopped(tmp_path, monkeypatch, session_maker):
+    monkeypatch.setattr(settings, "INGEST_STAGING_DIR", str(tmp_path / "staging"))
+    queue = _Queue()
+    monkeypatch.setattr(magazine_service, "ingest_queue", queue)
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.INGEST_LEASE_SECONDS + 1)
+    uploads = {
+        1: ("pending", "other-live-worker", now),
+        2: ("processing", "crashed-worker", stale),  # staged on this host
+        3: ("pending", "crashed-worker-elsewhere", stale),  # staged on a host that is gone
+        4: ("pending", magazine_service.INGEST_OWNER, stale),  # ours: heartbeated, not taken over
+    }
+    async with session_maker() as db:
+        for magazine_id, (status, owner, heartbeat) in uploads.items():
+            await db.execute(
+                insert(Magazine).values(
+                    id=magazine_id,
+                    title="t",
+                    issue_number="1",
+                    publish_date=now.date(),
+                    file_path="",
+                    processing_status=status,
+                    processing_owner=owner,
+                    processing_heartbeat_at=heartbeat,
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        await db.commit()
+    for magazine_id in (1, 2, 4):
+        with open(magazine_service._staging_paths(magazine_id)[0], "wb") as f:
+            f.write(b"%PDF")
+
+    recovery = magazine_service.UploadRecovery(interval=1, session_factory=session_maker)
+    assert await recovery.run_once() == 1
+    assert queue.jobs == [2]
+    async with session_maker() as db:
+        rows = {m.id: m for m in (await db.execute(select(Magazine))).scalars()}
+    assert (rows[1].processing_status, rows[1].processing_owner) == ("pending", "other-live-worker")
+    assert (rows[2].processing_status, rows[2].processing_owner) == ("pending", magazine_service.INGEST_OWNER)
+    assert rows[3].processing_status == "failed" and "lost" in rows[3].processing_error
+    assert rows[4].processing_status == "pending" and rows[4].processing_heartbeat_at > stale.replace(tzinfo=None)
+    assert await recovery.run_once() == 0  # nothing stale any more
+
+
+async def test_storing_the_same_file_again_resumes_its_upload(tmp_path, monkeypatch, session_maker):
+    monkeypatch.setattr(settings, "OSS_MULTIPART_PART_SIZE", 4096)
+    monkeypatch.setattr(settings, "OSS_RETRIES", 0)
+    monkeypatch.setattr(settings, "OSS_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    bucket = FakeBucket()
+    storage = OSSStorageBackend(bucket=bucket)
+    now = datetime.now(timezone.utc)
+    async with session_maker() as db:
+        magazine = Magazine(
+            id=1, title="t", issue_number="1", publish_date=now.date(), file_path="", created_at=now, updated_at=now
+        )
+        db.add(magazine)
+        await db.flush()
+
+        async def store(data: bytes) -> None:
+            source = tmp_path / "in.pdf"
+            source.write_bytes(data)
+            magazine.updated_at = datetime.now(timezone.utc)  # SQLite cannot run the onupdate default
+            with open(source, "rb") as f:
+                await magazine_service.store_magazine_file(db, magazine, f, None, storage)
+
+        data = os.urandom(40_000)
+        bucket.fail_next["complete_multipart_upload"] = 1
+        with pytest.raises(Exception):
+            await store(data)  # the worker is interrupted before the upload completes
+        uploaded = bucket.requests["upload_part"]
+        await store(data)
+        assert bucket.requests["upload_part"] == uploaded  # same ciphertext: every part was resumed
+        assert not list((tmp_path / "checkpoints").iterdir())
+        first_path, first_nonce = magazine.file_path, magazine.encrypted_key
+
+        await store(os.urandom(40_000))
+        assert magazine.file_path != first_path and magazine.encrypted_key != first_nonce
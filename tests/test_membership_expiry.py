@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.api.v1.members import get_membership_history
+from app.models import (  # noqa: F401  (register every mapped class, as alembic/env.py does)
+    audit_log,
+    member_tier,
+    payment,
+    social_account,
+    user_membership,
+)
+from app.models.member_tier import MemberTier
+from app.models.user_membership import UserMembership
+from app.services.auth_service import AuthService
+from app.services.membership_service import MembershipService
+
+NOW = datetime.now(timezone.utc)
+TODAY = date.today()
+
+
+@pytest.fixture
+def tables():
+    return [MemberTier, UserMembership]
+
+
+@pytest.fixture
+async def session_maker(session_maker):
+    async with session_maker() as db:
+        await db.execute(insert(MemberTier).values(id=1, name="黄金会员", level=1, created_at=NOW))
+        await db.commit()
+    return session_maker
+
+
+async def _add(session_maker, rows):
+    async with session_maker() as db:
+        await db.execute(
+            insert(UserMembership),
+            [
+                {
+                    "id": membership_id,
+                    "user_id": user_id,
+                    "tier_id": 1,
+                    "start_date": end - timedelta(days=30),
+                    "end_date": end,
+                    "status": status,
+                    "created_at": NOW,
+                }
+                for membership_id, user_id, end, status in rows
+            ],
+        )
+        await db.commit()
+
+
+async def _statuses(session_maker):
+    async with session_maker() as db:
+        return dict((await db.execute(select(UserMembership.id, UserMembership.status))).all())
+
+
+async def test_due_memberships_expire_across_batches(session_maker):
+    due = [(i, 100 + i, TODAY - timedelta(days=i), "active") for i in range(1, 8)]
+    await _add(
+        session_maker,
+        due
+        + [
+            (8, 108, TODAY, "active"),  # ends today: still valid
+            (9, 109, TODAY + timedelta(days=3), "active"),
+            (10, 110, TODAY - timedelta(days=5), "cancelled"),
+        ],
+    )
+    async with session_maker() as db:
+        assert await MembershipService.expire_due_memberships(db, batch_size=3) == 7
+    statuses = await _statuses(session_maker)
+    assert {i: statuses[i] for i in range(1, 8)} == dict.fromkeys(range(1, 8), "expired")
+    assert (statuses[8], statuses[9], statuses[10]) == ("active", "active", "cancelled")
+    async with session_maker() as db:
+        assert await MembershipService.expire_due_memberships(db, batch_size=3) == 0
+
+
+async def test_history_reports_past_due_memberships_as_expired_before_the_job_runs(session_maker):
+    await _add(
+        session_maker,
+        [
+            (1, 7, TODAY - timedelta(days=40), "active"),  # the job has not reached it yet
+            (2, 7, TODAY + timedelta(days=20), "active"),
+            (3, 7, TODAY - timedelta(days=70), "cancelled"),
+        ],
+    )
+    token = AuthService.create_token_pair(7)[0]
+    async with session_maker() as db:
+        history = await get_membership_history(f"Bearer {token}", db)
+    assert [(item.id, item.status) for item in history] == [(2, "active"), (1, "expired"), (3, "cancelled")]
+    assert (await _statuses(session_maker))[1] == "active"
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import time
+
+import oss2
+import pytest
+
+from app.core.config import settings
+from app.services.storage_service import CachingStorageBackend, DiskLRU, OSSStorageBackend
+from app.testing.fake_oss import FakeBucket
+
+
+async def _chunks(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+@pytest.fixture
+def small_parts(monkeypatch):
+    monkeypatch.setattr(settings, "OSS_MULTIPART_PART_SIZE", 4096)
+    monkeypatch.setattr(settings, "OSS_DOWNLOAD_PART_SIZE", 4096)
+    monkeypatch.setattr(settings, "OSS_UPLOAD_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "OSS_DOWNLOAD_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "OSS_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "OSS_CHECKPOINT_DIR", "")
+
+
+async def test_multipart_upload_and_parallel_download_roundtrip(small_parts):
+    bucket = FakeBucket()
+    backend = OSSStorageBackend(bucket=bucket)
+    data = os.urandom(50_000)
+    await backend.upload_stream("a.bin", _chunks(data))
+    assert bucket.objects["a.bin"] == data
+    assert bucket.requests["upload_part"] == 13
+    assert await backend.download("a.bin") == data
+    ranged = b"".join([c async for c in backend.download_stream("a.bin", 1000, 20_000, chunk_size=777)])
+    assert ranged == data[1000:21_000]
+
+
+async def test_transient_part_failures_are_retried(small_parts):
+    bucket = FakeBucket()
+    bucket.fail_next["upload_part"] = 2
+    bucket.fail_next["get_object"] = 1
+    backend = OSSStorageBackend(bucket=bucket)
+    data = os.urandom(20_000)
+    await backend.upload_stream("b.bin", _chunks(data))
+    assert await backend.download("b.bin") == data
+
+
+async def test_failed_upload_resumes_from_checkpoint(small_parts, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "OSS_CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "OSS_RETRIES", 0)
+    bucket = FakeBucket()
+    backend = OSSStorageBackend(bucket=bucket)
+    data = os.urandom(40_000)
+    bucket.fail_next["complete_multipart_upload"] = 1
+    with pytest.raises(Exception):
+        await backend.upload_stream("c.bin", _chunks(data), resume_key="job-1")
+    uploaded = bucket.requests["upload_part"]
+    await backend.upload_stream("c.bin", _chunks(data), resume_key="job-1")
+    assert bucket.requests["upload_part"] == uploaded  # every part was skipped on resume
+    assert bucket.objects["c.bin"] == data
+    assert not list(tmp_path.iterdir())
+
+
+async def test_failed_upload_without_resume_key_is_aborted(small_parts, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "OSS_CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "OSS_RETRIES", 0)
+    bucket = FakeBucket()
+    bucket.fail_next["upload_part"] = 1
+    with pytest.raises(Exception):
+        await OSSStorageBackend(bucket=bucket).upload_stream("d.bin", _chunks(os.urandom(40_000)))
+    assert bucket.uploads == {} and bucket.requests["abort_multipart_upload"] == 1
+    assert not list(tmp_path.iterdir())
+
+
+async def test_expired_upload_is_restarted(small_parts, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "OSS_CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "OSS_RETRIES", 0)
+    bucket = FakeBucket()
+    backend = OSSStorageBackend(bucket=bucket)
+    data = os.urandom(40_000)
+    bucket.fail_next["complete_multipart_upload"] = 1
+    with pytest.raises(Exception):
+        await backend.upload_stream("e.bin", _chunks(data), resume_key="job-2")
+    assert len(list(tmp_path.iterdir())) == 1
+    bucket.uploads.clear()  # the server dropped the incomplete upload
+    await backend.upload_stream("e.bin", _chunks(data), resume_key="job-2")
+    assert bucket.objects["e.bin"] == data and bucket.requests["init_multipart_upload"] == 2
+    assert not list(tmp_path.iterdir())
+
+    # An upload expiring mid-way drops its checkpoint too, so the next attempt starts clean
+    async def expiring_chunks():
+        async for chunk in _chunks(data):
+            yield chunk
+        bucket.uploads.clear()
+
+    with pytest.raises(oss2.exceptions.NoSuchUpload):
+        await backend.upload_stream("f.bin", expiring_chunks(), resume_key="job-3")
+    assert not list(tmp_path.iterdir())
+
+
+async def test_cache_coalesces_concurrent_misses(small_parts, tmp_path):
+    bucket = FakeBucket(latency=0.01)
+    data = os.urandom(20_000)
+    bucket.objects["d.bin"] = data
+    backend = CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=1 << 20)
+    results = await asyncio.gather(*(backend.download_range("d.bin", 100, 50) for _ in range(500)))
+    assert all(r == data[100:150] for r in results)
+    assert bucket.requests["head_object"] == 1
+    assert bucket.requests["get_object"] == 5  # one parallel ranged fetch of the whole object
+    assert await backend.download("d.bin") == data
+    assert bucket.requests["get_object"] == 5
+
+
+async def test_cache_evicts_least_recently_used(small_parts, tmp_path):
+    bucket = FakeBucket()
+    for key in ("a", "b", "c"):
+        bucket.objects[key] = os.urandom(1000)
+    backend = CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=2500)
+    await backend.download("a")
+    await backend.download("b")
+    await backend.download("a")
+    await backend.download("c")
+    assert backend.total_bytes == 2000
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(DiskLRU.name_for(k) for k in ("a", "c"))
+    reopened = CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=2500)
+    assert reopened.total_bytes == 2000
+
+
+async def test_objects_larger_than_the_cache_bypass_it(small_parts, tmp_path):
+    bucket = FakeBucket()
+    data = os.urandom(10_000)
+    bucket.objects["big"] = data
+    backend = CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=6000)
+    assert await backend.download("big") == data
+    assert not list(tmp_path.iterdir()) and backend.total_bytes == 0
+    fetched = bucket.requests["get_object"]
+    assert b"".join([c async for c in backend.download_stream("big", 100, 5000)]) == data[100:5100]
+    assert await backend.download_range("big", 9000, 10) == data[9000:9010]
+    assert bucket.requests["get_object"] == fetched + 3  # straight from the origin, no second fill
+
+
+async def test_stream_falls_back_to_origin_when_the_cached_file_is_gone(small_parts, tmp_path):
+    bucket = FakeBucket()
+    data = os.urandom(5000)
+    bucket.objects["a"] = data
+    backend = CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=1 << 20)
+    await backend.download("a")
+    os.remove(tmp_path / DiskLRU.name_for("a"))  # evicted by another worker
+    assert b"".join([c async for c in backend.download_stream("a", 10)]) == data[10:]
+    assert backend.total_bytes == 0
+
+
+async def test_startup_keeps_temp_files_of_live_fills(small_parts, tmp_path):
+    bucket = FakeBucket(latency=0.02)
+    data = os.urandom(20_000)
+    bucket.objects["a"] = data
+    backend = CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=1 << 20)
+    fill = asyncio.ensure_future(backend.download("a"))
+    while not list(tmp_path.glob("*.tmp-*")):
+        await asyncio.sleep(0.001)
+    dead = tmp_path / f"{DiskLRU.name_for('b')}.tmp-{2**22 + 1}-1"  # above any pid_max: never alive
+    stale = tmp_path / f"{DiskLRU.name_for('c')}.tmp-{os.getpid()}-2"
+    dead.write_bytes(b"x")
+    stale.write_bytes(b"x")
+    old = time.time() - DiskLRU.TEMP_FILE_MAX_AGE_SECONDS - 1
+    os.utime(stale, (old, old))
+    CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=1 << 20)  # a sibling starts
+    assert not dead.exists() and not stale.exists()
+    assert await fill == data
+    assert backend.total_bytes == len(data)
+
+
+async def test_fill_that_loses_its_temp_file_is_served_from_origin(small_parts, tmp_path):
+    bucket = FakeBucket(latency=0.02)
+    data = os.urandom(20_000)
+    bucket.objects["a"] = data
+    backend = CachingStorageBackend(OSSStorageBackend(bucket=bucket), str(tmp_path), max_bytes=1 << 20)
+
+    async def stream():
+        return b"".join([c async for c in backend.download_stream("a", 100)])
+
+    reads = [asyncio.ensure_future(backend.download("a")), asyncio.ensure_future(stream())]
+    while not list(tmp_path.glob("*.tmp-*")):
+        await asyncio.sleep(0.001)
+    for tmp in tmp_path.glob("*.tmp-*"):
+        tmp.unlink()
+    assert await reads[0] == data and await reads[1] == data[100:]
+    assert backend.total_bytes == 0
@@ -0,0 +1,16 @@
+import pytest
+
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip_is_url_safe():
+    payload = {"s": "publish_date", "o": "desc", "v": "2024-01-02", "id": 123456}
+    cursor = encode_cursor(payload)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == payload
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24", "WzEsMl0"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
@@ -0,0 +1,86 @@
+import asyncio
+
+from app.services.response_cache_service import ResponseCache, render_json
+from app.testing.fake_redis import FakeRedis
+from app.utils.redis_kv import RedisKV
+
+
+def test_etag_matching():
+    cached = render_json({"items": ["经济"]})
+    assert cached.body == '{"items":["经济"]}'.encode("utf-8")
+    assert cached.matches(cached.etag)
+    assert cached.matches(f'"other", W/{cached.etag}')
+    assert cached.matches("*")
+    assert not cached.matches('"other"') and not cached.matches(None)
+
+
+async def test_concurrent_misses_render_once_until_invalidated():
+    cache = ResponseCache("test", ttl=60, max_entries=8)
+    renders = 0
+
+    async def render():
+        nonlocal renders
+        renders += 1
+        await asyncio.sleep(0.01)
+        return {"n": renders}
+
+    results = await asyncio.gather(*(cache.get_or_render("k", render) for _ in range(50)))
+    assert renders == 1 and {r.etag for r in results} == {results[0].etag}
+    await cache.invalidate()
+    assert (await cache.get_or_render("k", render)).body == b'{"n":2}'
+
+
+async def test_render_racing_an_invalidation_is_not_kept():
+    cache = ResponseCache("test", ttl=60, max_entries=8)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        started.set()
+        await release.wait()
+        return "stale"
+
+    pending = asyncio.ensure_future(cache.get_or_render("k", slow))
+    await started.wait()
+    await cache.invalidate()
+    release.set()
+    assert (await pending).body == b'"stale"'
+
+    async def fresh():
+        return "fresh"
+
+    assert (await cache.get_or_render("k", fresh)).body == b'"fresh"'
+
+
+async def test_shared_tier_is_used_across_workers_and_versioned():
+    kv = RedisKV(client=FakeRedis())
+    worker_a = ResponseCache("test", ttl=60, max_entries=8, redis=kv)
+    worker_b = ResponseCache("test", ttl=60, max_entries=8, redis=kv)
+
+    async def render_a():
+        return "a"
+
+    async def render_b():
+        return "b"
+
+    assert (await worker_a.get_or_render("k", render_a)).body == b'"a"'
+    assert (await worker_b.get_or_render("k", render_b)).body == b'"a"'
+    await worker_a.invalidate()
+    worker_b._entries.clear()  # as if worker b's local TTL had run out
+    assert (await worker_b.get_or_render("k", render_b)).body == b'"b"'
+
+
+async def test_render_survives_the_first_caller_being_cancelled():
+    cache = ResponseCache("test", ttl=60, max_entries=8)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def render():
+        started.set()
+        await release.wait()
+        return "ok"
+
+    first = asyncio.ensure_future(cache.get_or_render("k", render))
+    await started.wait()
+    second = asyncio.ensure_future(cache.get_or_render("k", render))
+    first.cancel()
+    release.set()
+    assert (await second).body == b'"ok"'
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models.scheduler import JobRun, SchedulerLease
+from app.services.scheduler_service import CronSchedule, DatabaseLease, RedisLease, Scheduler
+from app.testing.fake_redis import FakeRedis
+from app.utils.redis_kv import RedisKV
+
+
+@pytest.fixture
+def tables():
+    return [JobRun, SchedulerLease]
+
+
+def _at(text: str) -> datetime:
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "cron, after, expected",
+    [
+        ("0 */6 * * *", "2026-10-18 05:59:30", "2026-10-18 06:00"),
+        ("0 */6 * * *", "2026-10-18 06:00:00", "2026-10-18 12:00"),
+        ("30 9 * * 1-5", "2026-10-16 10:00", "2026-10-19 09:30"),  # Friday -> Monday
+        ("0 0 1,15 * 0", "2026-10-02 00:00", "2026-10-04 00:00"),  # day of month OR day of week
+        ("0 0 29 2 *", "2026-03-01 00:00", "2028-02-29 00:00"),
+        ("*/20 * * 12 *", "2026-10-18 00:00", "2026-12-01 00:00"),
+    ],
+)
+def test_cron_next_after(cron, after, expected):
+    assert CronSchedule(cron).next_after(_at(after)) == _at(expected)
+
+
+def test_cron_in_a_time_zone_and_invalid_expressions():
+    tz = timezone(timedelta(hours=8))
+    assert CronSchedule("0 9 * * *", tz).next_after(_at("2026-10-18 02:00")) == _at("2026-10-19 01:00")
+    for bad in ("* * * *", "60 * * * *", "0 0 30 2 *", "*/0 * * * *"):
+        with pytest.raises(ValueError):
+            CronSchedule(bad).next_after(_at("2026-01-01 00:00"))
+
+
+@pytest.fixture(params=["database", "redis"])
+def make_lease(request, session_maker):
+    redis = FakeRedis()
+
+    def make():
+        if request.param == "database":
+            return DatabaseLease(session_maker)
+        return RedisLease(RedisKV(client=redis))
+
+    return make
+
+
+async def test_lease_is_exclusive_until_it_expires(make_lease):
+    a, b = make_lease(), make_lease()
+    assert await a.acquire("leader", "a", 60)
+    assert not await b.acquire("leader", "b", 60)
+    assert await a.acquire("leader", "a", 60)  # renewal
+    await b.release("leader", "b")  # not the owner: no effect
+    assert not await b.acquire("leader", "b", 60)
+    await a.release("leader", "a")
+    assert await b.acquire("leader", "b", 1)
+    assert not await a.acquire("leader", "a", 60)
+    await asyncio.sleep(1.1)
+    assert await a.acquire("leader", "a", 60)  # b's lease ran out
+
+
+async def _settle(scheduler):
+    await asyncio.gather(*list(scheduler._running.values()))
+
+
+async def _runs(session_maker):
+    async with session_maker() as db:
+        return list((await db.execute(select(JobRun).order_by(JobRun.id))).scalars())
+
+
+async def test_only_the_leader_runs_each_slot_once(session_maker):
+    calls = []
+
+    async def job():
+        calls.append(1)
+
+    workers = [Scheduler(DatabaseLease(session_maker), 1, 60, session_factory=session_maker) for _ in range(3)]
+    for worker in workers:
+        worker.register("cleanup", "0 * * * *", job)
+    start = _at("2026-10-18 10:30")
+    for worker in workers:
+        assert await worker.tick(start) == []  # first hour not due yet
+    assert [w.is_leader for w in workers] == [True, False, False]
+
+    for minute in (0, 1, 2):
+        for worker in workers:
+            await worker.tick(_at("2026-10-18 11:00") + timedelta(minutes=minute))
+            await _settle(worker)
+    assert len(calls) == 1
+    runs = await _runs(session_maker)
+    assert [(r.status, r.scheduled_for) for r in runs] == [("success", datetime(2026, 10, 18, 11, 0))]
+    assert runs[0].owner == workers[0].owner and runs[0].duration_ms is not None
+
+
+async def test_failover_resumes_after_the_last_recorded_run(session_maker):
+    calls = []
+
+    async def job():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("boom")
+
+    leader = Scheduler(DatabaseLease(session_maker), 1, 60, session_factory=session_maker)
+    standby = Scheduler(DatabaseLease(session_maker), 1, 60, session_factory=session_maker)
+    for worker in (leader, standby):
+        worker.register("cleanup", "0 * * * *", job)
+    await leader.tick(_at("2026-10-18 10:30"))
+    await leader.tick(_at("2026-10-18 11:00"))
+    await _settle(leader)
+    await standby.tick(_at("2026-10-18 11:01"))
+    assert not standby.is_leader
+
+    # The leader goes away; the standby takes over hours later and runs the missed slots only once
+    await leader.lease.release(Scheduler.LEADER_LEASE, leader.owner)
+    assert await standby.tick(_at("2026-10-18 14:20")) == ["cleanup"]
+    await _settle(standby)
+    assert await standby.tick(_at("2026-10-18 14:30")) == []
+    assert await standby.tick(_at("2026-10-18 15:00")) == ["cleanup"]
+    await _settle(standby)
+
+    runs = await _runs(session_maker)
+    assert [r.status for r in runs] == ["success", "failed", "success"]
+    assert "RuntimeError: boom" in runs[1].error
+    status = (await standby.status())[0]
+    assert status["last_run"]["status"] == "success"
+    assert status["last_success"]["scheduled_for"] == _at("2026-10-18 15:00")
+    assert status["next_run"] == _at("2026-10-18 16:00")
+
+
+async def test_jitter_delays_a_run_by_a_stable_amount(session_maker):
+    async def job():
+        pass
+
+    worker = Scheduler(DatabaseLease(session_maker), 1, 60, jitter_seconds=600, session_factory=session_maker)
+    registered = worker.register("cleanup", "0 * * * *", job)
+    slot = _at("2026-10-18 11:00")
+    delay = registered.delay(slot)
+    assert 0 < delay <= 600 and delay == registered.delay(slot)
+    await worker.tick(_at("2026-10-18 10:30"))
+    assert await worker.tick(slot + timedelta(seconds=delay - 1)) == []
+    assert await worker.tick(slot + timedelta(seconds=delay + 1)) == ["cleanup"]
+    await _settle(worker)
@@ -0,0 +1,77 @@
+from app.services.search_service import InvertedIndex, MemorySearchBackend, SearchDocument, tokenize
+
+
+def test_tokenize_cjk_bigrams_and_words():
+    assert tokenize("中国经济 Weekly-2024 的") == ["中国", "国经", "经济", "weekly", "2024", "的"]
+    assert tokenize(None) == []
+
+
+def test_bm25_prefers_rarer_terms_and_shorter_documents():
+    index = InvertedIndex()
+    index.add(1, [("common", 1), ("rare", 1)])
+    index.add(2, [("common", 1)] + [("filler", 1)] * 20)
+    index.add(3, [("common", 1)])
+    scores = index.scores(["common", "rare"])
+    assert max(scores, key=scores.get) == 1
+    assert scores[3] > scores[2]
+    index.remove(1)
+    assert set(index.scores(["rare"])) == set()
+
+
+async def test_memory_backend_ranks_title_matches_and_hides_unpublished():
+    backend = MemorySearchBackend(index_pages=True)
+    await backend.index(
+        [
+            SearchDocument(1, {"title": "科技日报", "description": "经济新闻"}),
+            SearchDocument(2, {"title": "中国经济周刊", "description": "宏观"}),
+            SearchDocument(3, {"title": "经济观察", "description": None}, published=False),
+        ]
+    )
+    hits = await backend.search("经济", offset=0, limit=10)
+    assert hits.ids == [2, 1] and hits.total == 2
+    assert (await backend.search("经济", offset=0, limit=10, published_only=False)).total == 3
+
+    async def batches():
+        yield [SearchDocument(4, {"title": "经济"})]
+
+    assert await backend.rebuild(batches()) == 1
+    assert (await backend.search("经济", offset=0, limit=10)).ids == [4]
+
+
+async def test_memory_backend_reports_matching_pages():
+    backend = MemorySearchBackend(index_pages=True)
+    await backend.index(
+        [
+            SearchDocument(1, {"title": "科技日报"}, pages=["封面", "人工智能专题", "", "人工智能与芯片"]),
+            SearchDocument(2, {"title": "人工智能周刊"}, pages=["目录"]),
+        ]
+    )
+    hits = await backend.search("人工智能", offset=0, limit=10)
+    assert set(hits.ids) == {1, 2}
+    assert sorted(hits.pages[1]) == [2, 4] and 2 not in hits.pages
+
+    # A metadata-only update keeps the indexed pages; an explicit page list replaces them
+    await backend.index([SearchDocument(1, {"title": "科技日报 新版"})])
+    assert sorted((await backend.search("芯片", offset=0, limit=10)).pages[1]) == [4]
+    await backend.index([SearchDocument(1, {"title": "科技日报"}, pages=["芯片"])])
+    assert (await backend.search("芯片", offset=0, limit=10)).pages[1] == [1]
+    assert (await backend.search("人工智能", offset=0, limit=10)).ids == [2]
+
+
+async def test_memory_backend_skips_pages_by_default():
+    backend = MemorySearchBackend()
+    await backend.index([SearchDocument(1, {"title": "科技日报"}, pages=["人工智能专题"])])
+    hits = await backend.search("人工智能", offset=0, limit=10)
+    assert hits.ids == [] and hits.total == 0 and len(backend.pages) == 0
+
+
+async def test_pruned_queries_fill_pages_and_report_a_stable_total():
+    backend = MemorySearchBackend(index_pages=True)
+    # "alpha" is in every magazine, "zeta" in ten of them, eight of which are unpublished
+    await backend.index(
+        SearchDocument(i, {"title": "alpha zeta" if i <= 10 else "alpha"}, published=i > 8) for i in range(1, 101)
+    )
+    first = await backend.search("zeta alpha", offset=0, limit=5)
+    second = await backend.search("zeta alpha", offset=5, limit=5)
+    assert first.ids[:2] == [10, 9] and len(first.ids) == len(second.ids) == 5
+    assert first.total == second.total == 92
@@ -0,0 +1,50 @@
+from app.services.segment_cache_service import DecryptedSegmentCache
+
+
+def test_lru_eviction_by_size():
+    cache = DecryptedSegmentCache(max_bytes=30, block_size=10)
+    for i in range(3):
+        cache.put(1, "v1", i, bytes([i]) * 10)
+    assert cache.get(1, "v1", 0) is not None  # 0 becomes most recently used
+    cache.put(1, "v1", 3, b"x" * 10)
+    assert cache.get(1, "v1", 1) is None
+    assert cache.get(1, "v1", 0) is not None
+    assert cache.memory_bytes == 30
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_evicted_blocks_spill_to_disk(tmp_path):
+    cache = DecryptedSegmentCache(max_bytes=10, block_size=10, spill_dir=str(tmp_path), spill_max_bytes=20)
+    for i in range(4):
+        cache.put(7, "v1", i, bytes([i]) * 10)
+    assert cache.get(7, "v1", 3) == bytes([3]) * 10  # memory
+    assert cache.get(7, "v1", 2) == bytes([2]) * 10  # disk
+    assert cache.get(7, "v1", 0) is None  # pushed out of the disk tier too
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_blocks_put_without_spill_never_reach_disk(tmp_path):
+    cache = DecryptedSegmentCache(max_bytes=10, block_size=10, spill_dir=str(tmp_path), spill_max_bytes=100)
+    cache.put(1, "secret", 0, b"s" * 10, spill=False)
+    cache.put(2, "v1", 0, b"a" * 10)  # evicts the sensitive block
+    cache.put(2, "v1", 1, b"b" * 10)  # evicts an ordinary one, which spills
+    assert [p.read_bytes() for p in tmp_path.iterdir()] == [b"a" * 10]
+    assert cache.get(1, "secret", 0) is None
+
+
+def test_invalidate_drops_every_version_of_a_magazine(tmp_path):
+    cache = DecryptedSegmentCache(max_bytes=10, block_size=10, spill_dir=str(tmp_path), spill_max_bytes=100)
+    cache.put(1, "v1", 0, b"a" * 10)
+    cache.put(1, "v2", 0, b"b" * 10)
+    cache.put(2, "v1", 0, b"c" * 10)
+    cache.put_file(1, "v2", object())
+    cache.invalidate(1)
+    assert cache.get(1, "v1", 0) is None and cache.get(1, "v2", 0) is None
+    assert cache.get_file(1, "v2") is None
+    assert cache.get(2, "v1", 0) == b"c" * 10
+
+
+def test_disabled_cache_stores_nothing():
+    cache = DecryptedSegmentCache(max_bytes=0, block_size=10)
+    cache.put(1, "v1", 0, b"a" * 10)
+    assert not cache.enabled and cache.get(1, "v1", 0) is None
@@ -0,0 +1,57 @@
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import files
+from app.core.config import settings
+from app.services import storage_service
+from app.services.file_delivery_service import DecryptedFileStore
+from app.services.storage_service import LocalStorageBackend
+from app.utils.security import create_signed_url, verify_signed_url
+
+
+def test_signed_url_roundtrip_and_tampering():
+    url, _ = create_signed_url("/files/magazines/7", 60)
+    query = parse_qs(urlsplit(url).query)
+    exp, sig = int(query["exp"][0]), query["sig"][0]
+    assert urlsplit(url).path == f"{settings.API_V1_PREFIX}/files/magazines/7"
+    assert verify_signed_url("/files/magazines/7", exp, sig)
+    assert not verify_signed_url("/files/magazines/8", exp, sig)
+    assert not verify_signed_url("/files/magazines/7", exp + 1, sig)
+    assert not verify_signed_url("/files/magazines/7", exp - 3600, sig)
+
+
+async def test_local_temp_link_is_served_by_files_endpoint(tmp_path, monkeypatch):
+    backend = LocalStorageBackend(str(tmp_path))
+    await backend.upload("magazines/1/a.enc", b"0123456789")
+    monkeypatch.setattr(storage_service, "_storage_backend", backend)
+    app = FastAPI()
+    app.include_router(files.router, prefix=f"{settings.API_V1_PREFIX}/files")
+    client = TestClient(app)
+
+    link = await backend.generate_temp_link("magazines/1/a.enc", 60)
+    response = client.get(link.url, headers={"Range": "bytes=2-4"})
+    assert response.status_code == 206 and response.content == b"234"
+    assert client.get(link.url.replace("a.enc", "b.enc")).status_code == 403
+
+
+async def test_decrypted_store_materializes_once(tmp_path):
+    store = DecryptedFileStore(str(tmp_path), max_bytes=1 << 20)
+    calls = 0
+
+    async def chunks():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        yield b"%PDF-"
+        yield b"body"
+
+    assert store.lookup("magazines/1/a.enc") is None
+    for _ in range(10):
+        store.materialize("magazines/1/a.enc", chunks)
+    await asyncio.gather(*store._inflight.values())
+    local = store.lookup("magazines/1/a.enc")
+    assert calls == 1
+    assert local is not None and open(local, "rb").read() == b"%PDF-body"
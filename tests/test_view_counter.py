@@ -0,0 +1,133 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.magazine import Magazine
+from app.services.view_counter_service import HyperLogLog, ViewCounter
+from app.testing.fake_redis import FakeRedis
+from app.utils.redis_kv import RedisKV
+
+
+@pytest.fixture
+def tables():
+    return [Magazine]
+
+
+@pytest.fixture
+async def session_maker(session_maker):
+    now = datetime.now(timezone.utc)
+    async with session_maker() as db:
+        for magazine_id in (1, 2, 3):
+            db.add(
+                Magazine(
+                    id=magazine_id,
+                    title=f"m{magazine_id}",
+                    issue_number=str(magazine_id),
+                    publish_date=date(2024, 1, 1),
+                    file_path="",
+                    view_count=10,
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        await db.commit()
+    return session_maker
+
+
+@pytest.mark.parametrize("n", [10, 1000, 50000])
+def test_hyperloglog_estimate_is_close(n):
+    hll = HyperLogLog()
+    for i in range(n):
+        hll.add(f"user-{i}")
+        hll.add(f"user-{i}")  # duplicates do not count
+    assert abs(hll.count() - n) <= max(1, n * 0.05)
+
+    other = HyperLogLog()
+    for i in range(n, 2 * n):
+        other.add(f"user-{i}")
+    hll.merge(other)
+    assert abs(hll.count() - 2 * n) <= max(1, n * 0.1)
+
+
+async def _view_counts(session_maker):
+    async with session_maker() as db:
+        return {m.id: m.view_count for m in [await db.get(Magazine, i) for i in (1, 2, 3)]}
+
+
+async def test_views_are_buffered_and_flushed_in_one_update(session_maker):
+    counter = ViewCounter(flush_interval=3600, session_factory=session_maker)
+    for i in range(30):
+        await counter.record(1, f"u:{i % 4}")
+    await counter.record(2, "u:1")
+    assert counter.pending(1) == 30
+    assert await counter.unique_viewers(1) == 4
+    assert await _view_counts(session_maker) == {1: 10, 2: 10, 3: 10}
+
+    await counter.drain()
+    assert await _view_counts(session_maker) == {1: 40, 2: 11, 3: 10}
+    assert counter.pending(1) == 0 and await counter.flush() == 0
+
+
+async def test_failed_flush_keeps_the_increments(session_maker):
+    def broken_session():
+        raise RuntimeError("database down")
+
+    counter = ViewCounter(flush_interval=3600, session_factory=broken_session)
+    await counter.record(3, "u:1")
+    assert await counter.flush() == 0 and counter.pending(3) == 1
+    counter.session_factory = session_maker
+    assert await counter.flush() == 1
+    await counter.drain()
+    assert (await _view_counts(session_maker))[3] == 11
+
+
+async def test_redis_buffer_is_shared_between_workers(session_maker):
+    kv = RedisKV(client=FakeRedis())
+    worker_a = ViewCounter(flush_interval=3600, redis=kv, session_factory=session_maker)
+    worker_b = ViewCounter(flush_interval=3600, redis=kv, session_factory=session_maker)
+    await worker_a.record(1, "u:1")
+    await worker_b.record(1, "u:2")
+    await worker_b.record(1, "u:2")
+    assert await worker_a.unique_viewers(1) == 2
+    assert await worker_a.flush() == 3  # one worker writes the increments of both
+    assert await worker_b.flush() == 0
+    await worker_a.drain()
+    await worker_b.drain()
+    assert (await _view_counts(session_maker))[1] == 13
+
+
+class _FlakyHLL(FakeRedis):
+    """FakeRedis whose PFADD fails while ``down`` is set."""
+
+    down = True
+
+    async def pfadd(self, key: str, *values: str) -> int:
+        if self.down:
+            raise ConnectionError("redis down")
+        return await super().pfadd(key, *values)
+
+
+async def test_view_that_reached_redis_is_not_buffered_again(session_maker):
+    client = _FlakyHLL()
+    kv = RedisKV(client=client)
+    counter = ViewCounter(flush_interval=3600, redis=kv, session_factory=session_maker)
+    await counter.record(1, "u:1")
+    await counter.record(1, "u:2")
+    assert counter.pending(1) == 0  # the increments are in Redis; only the viewers are held back
+    assert await counter.unique_viewers(1) == 0
+
+    client.down = False
+    await ViewCounter(flush_interval=3600, redis=kv, session_factory=session_maker).record(1, "u:2")
+    assert await counter.flush() == 3
+    assert await counter.unique_viewers(1) == 2  # merged into the shared sketch, u:2 counted once
+    await counter.drain()
+    assert (await _view_counts(session_maker))[1] == 13
+
+
+async def test_unique_viewers_are_counted_in_the_configured_timezone(session_maker):
+    tz = timezone(timedelta(hours=14))
+    counter = ViewCounter(flush_interval=3600, session_factory=session_maker, tz=tz)
+    await counter.record(1, "u:1")
+    assert counter.today() == datetime.now(tz).date()
+    assert await counter.unique_viewers(1, datetime.now(tz).date()) == 1
+    await counter.drain()